@@ -0,0 +1,10 @@
+"""Benchmarks das partes críticas de desempenho do programa.
+
+Cada módulo pode ser executado diretamente a partir da raiz do repositório, por exemplo:
+``python -m benchmarks.leitura_planilha``.
+"""
+
+import os
+
+# src.local.types importa o Kivy, que tomaria para si os argumentos de linha de comando.
+os.environ.setdefault("KIVY_NO_ARGS", "1")
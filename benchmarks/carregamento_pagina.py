@@ -0,0 +1,125 @@
+"""Compara o carregamento de páginas no navegador sem otimizações com o perfil de raspagem
+(:data:`~src.utils.acesso.PERFIL_NAVEGADOR`: recursos pesados bloqueados e animações desligadas),
+usando um site local com imagens, fontes e CSS animado servido em localhost.
+
+Precisa do Chrome instalado. Os dois navegadores são abertos em modo headless.
+"""
+
+import argparse
+import functools
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from os.path import join
+from pathlib import Path
+from typing import Tuple
+
+import undetected_chromedriver as uc
+
+from src.utils.acesso import PerfilNavegador, bloquear_recursos, inicializar_driver
+
+__all__ = ["gerar_site", "main"]
+
+_SCRIPT_MEDIDAS = """
+const navegacao = performance.getEntriesByType("navigation")[0];
+const recursos = performance.getEntriesByType("resource");
+return [
+    navegacao.loadEventEnd - navegacao.startTime,
+    recursos.reduce((total, r) => total + r.transferSize, navegacao.transferSize),
+];
+"""
+
+
+def gerar_site(pasta: str, imagens: int, tamanho_imagem: int) -> None:
+    """Gera uma página parecida com as do ESocial: uma lista de dados do funcionário cercada de
+    imagens, fontes e animações.
+
+    :param pasta: Pasta onde o site é gerado.
+    :param imagens: Quantidade de imagens na página.
+    :param tamanho_imagem: Tamanho de cada imagem em bytes.
+    """
+    for i in range(imagens):
+        Path(join(pasta, f"imagem{i}.png")).write_bytes(b"\x89PNG" + bytes(tamanho_imagem))
+    Path(join(pasta, "fonte.woff2")).write_bytes(bytes(tamanho_imagem))
+    estilo = """
+    @font-face { font-family: Rawline; src: url(fonte.woff2); }
+    body { font-family: Rawline, sans-serif; }
+    li { animation: aparecer 1s; transition: all 0.5s; }
+    @keyframes aparecer { from { opacity: 0; } to { opacity: 1; } }
+    """
+    itens = "".join(
+        f'<li><span class="MuiListItemText-primary">Rótulo {i}</span>'
+        f'<p class="MuiListItemText-secondary">Valor {i}</p></li>'
+        for i in range(10)
+    )
+    figuras = "".join(f'<img src="imagem{i}.png">' for i in range(imagens))
+    Path(join(pasta, "index.html")).write_text(
+        f'<html><head><style>{estilo}</style></head><body>{figuras}'
+        f'<div role="tabpanel"><ul>{itens}</ul></div></body></html>',
+        encoding="utf-8",
+    )
+
+
+def _servir(pasta: str, latencia: float) -> ThreadingHTTPServer:
+    class Handler(SimpleHTTPRequestHandler):
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            time.sleep(latencia)
+            super().do_GET()
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=pasta))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def _medir(nome: str, driver: uc.Chrome, url: str, repeticoes: int) -> Tuple[float, float]:
+    # sem cache, como na primeira visita de cada sessão
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+    tempo = bytes_ = 0.0
+    for _ in range(repeticoes):
+        driver.get(url)
+        duracao, transferido = driver.execute_script(_SCRIPT_MEDIDAS)
+        tempo += duracao
+        bytes_ += transferido
+    tempo, bytes_ = tempo / repeticoes, bytes_ / repeticoes
+    print(f"{nome:<12} {tempo:8.1f}ms  {bytes_ / 1024:10.1f}KiB por carregamento")
+    return tempo, bytes_
+
+
+def main() -> None:
+    """Executa o benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--imagens", type=int, default=30)
+    parser.add_argument("--tamanho-imagem", type=int, default=50_000)
+    parser.add_argument("--latencia", type=float, default=0.01)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        gerar_site(pasta, args.imagens, args.tamanho_imagem)
+        servidor = _servir(pasta, args.latencia)
+        url = f"http://127.0.0.1:{servidor.server_address[1]}/index.html"
+        try:
+            driver = inicializar_driver(PerfilNavegador(True, False, False))
+            try:
+                _medir("completo", driver, url, args.repeticoes)
+            finally:
+                driver.quit()
+
+            driver = inicializar_driver(PerfilNavegador(True, True, True))
+            try:
+                bloquear_recursos(driver)
+                _medir("raspagem", driver, url, args.repeticoes)
+            finally:
+                driver.quit()
+        finally:
+            servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
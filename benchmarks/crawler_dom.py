@@ -0,0 +1,104 @@
+"""Compara a leitura dos dados do funcionário por
+:class:`~src.webdriver.caminhos.FuncionarioCrawlerBase` (uma chamada ao webdriver para todos os
+rótulos e valores) com a leitura anterior, que pegava o texto de cada elemento separadamente, usando
+uma página HTML local no formato da página do ESocial.
+
+Precisa do Chrome instalado.
+"""
+
+import argparse
+import tempfile
+import time
+from os.path import join
+from pathlib import Path
+from typing import Callable, List
+
+import undetected_chromedriver as uc
+from webdriver_manager.chrome import ChromeDriverManager
+
+from src.webdriver.caminhos import Caminhos
+
+__all__ = ["gerar_pagina", "leitura_por_elemento", "main"]
+
+ROTULOS = [
+    "Nome",
+    "CPF",
+    "Data de nascimento",
+    "Matrícula",
+    "Categoria",
+    "Situação",
+    "Data de admissão",
+    "Data de desligamento",
+]
+
+
+def gerar_pagina(itens_extras: int) -> str:
+    """Gera uma página com o painel de dados do funcionário no formato do ESocial.
+
+    :param itens_extras: Quantidade de itens além dos rótulos relevantes, para simular painéis
+        maiores.
+    :return: HTML da página.
+    """
+    rotulos = ROTULOS + [f"Campo extra {i}" for i in range(itens_extras)]
+    itens = "\n".join(
+        f'<li><span class="MuiListItemText-primary">{rotulo}</span>'
+        f'<p class="MuiListItemText-secondary">valor {i}</p></li>'
+        for i, rotulo in enumerate(rotulos)
+    )
+    return f'<html><body><div role="tabpanel"><ul>{itens}</ul></div></body></html>'
+
+
+def leitura_por_elemento(driver: uc.Chrome) -> List[List[str]]:
+    """Leitura anterior de ``FuncionarioCrawlerBase``, usada como referência."""
+    formulario = Caminhos.ESocial.Formulario
+    return [
+        [elem.text for elem in driver.find_elements(*formulario._rotulos_seletor)],
+        [elem.text for elem in driver.find_elements(*formulario._valores_seletor)],
+    ]
+
+
+def _medir(nome: str, repeticoes: int, funcao: Callable[[], List[List[str]]]) -> List[List[str]]:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"{nome:<14} {duracao / repeticoes * 1000:8.2f}ms por funcionário")
+    return resultado
+
+
+def main() -> None:
+    """Executa o benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticoes", type=int, default=50)
+    parser.add_argument("--itens-extras", type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        pagina = join(pasta, "funcionario.html")
+        Path(pagina).write_text(gerar_pagina(args.itens_extras), encoding="utf-8")
+
+        options = uc.ChromeOptions()
+        options.add_argument("--headless=new")
+        driver = uc.Chrome(
+            options=options, driver_executable_path=ChromeDriverManager().install()
+        )
+        try:
+            driver.get(Path(pagina).as_uri())
+            por_elemento = _medir(
+                "por elemento", args.repeticoes, lambda: leitura_por_elemento(driver)
+            )
+
+            def crawler() -> List[List[str]]:
+                formulario = Caminhos.ESocial.Formulario(driver)
+                return [formulario.rotulos, formulario.valores]
+
+            uma_chamada = _medir("uma chamada", args.repeticoes, crawler)
+        finally:
+            driver.quit()
+
+    assert por_elemento == uma_chamada, "Resultados diferentes"
+    print("Resultados idênticos.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""Servidor local que imita as páginas do ESocial usadas pelo programa (veja
+:class:`~src.webdriver.caminhos.Caminhos`): login, seleção de certificado, troca de perfil, menu do
+módulo, ``gestaoTrabalhadores`` nas variantes de formulário e de lista, página de erro e página de
+logout.
+
+As páginas são sintéticas: têm só os elementos e comportamentos que os seletores e as esperas do
+programa usam. A latência de cada resposta (e das atualizações feitas pelo JavaScript da página,
+como as do ESocial) e a injeção de falhas são configuráveis.
+
+Executado diretamente, só inicia o servidor com dados gerados, para uso manual no navegador.
+"""
+
+import argparse
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, NamedTuple
+from urllib.parse import parse_qs, urlparse
+
+from src.webdriver.planilha import DadosFuncionario, apenas_digitos
+from src.webdriver.types import CelulaVazia
+from src.local.types import Float
+
+__all__ = [
+    "CAMINHO_LOGIN",
+    "CAMINHO_PERFIL",
+    "EmpresaReplay",
+    "FuncionarioReplay",
+    "ServidorReplay",
+    "gerar_empresas",
+]
+
+CAMINHO_LOGIN = "/login.aspx"
+"""Página inicial, equivalente a :data:`~src.webdriver.acesso.LINK_PRINCIPAL`."""
+CAMINHO_PERFIL = "/portal/Home/Index?trocarPerfil=true"
+"""Página de troca de perfil, equivalente a :data:`~src.webdriver.acesso.LINK_CNPJ_INPUT`."""
+
+FuncionarioReplay = NamedTuple(
+    "FuncionarioReplay", [("CPF", str), ("nome", str), ("dados", DadosFuncionario)]
+)
+"""Funcionário servido pelo replay, com o CPF pontuado como na planilha."""
+
+EmpresaReplay = NamedTuple(
+    "EmpresaReplay",
+    [("CNPJ", str), ("nome", str), ("lista", bool), ("funcionarios", List[FuncionarioReplay])],
+)
+"""Empresa servida pelo replay. Se ``lista`` for verdadeiro, ``gestaoTrabalhadores`` mostra os
+funcionários em cartões (:class:`~src.webdriver.caminhos.Caminhos.ESocial.Lista`) em vez do
+formulário de pesquisa."""
+
+
+def _data(rng: random.Random, de: int, ate: int) -> str:
+    return f"{rng.randint(1, 28):02}/{rng.randint(1, 12):02}/{rng.randint(de, ate)}"
+
+
+def gerar_empresas(
+    empresas: int, funcionarios: int, proporcao_lista: float = 0.2, semente: int = 0
+) -> List[EmpresaReplay]:
+    """Gera empresas e funcionários sintéticos.
+
+    :param empresas: Quantidade de empresas (matrizes).
+    :param funcionarios: Quantidade de funcionários de cada empresa.
+    :param proporcao_lista: Proporção das empresas na variante de lista.
+    :param semente: Semente dos números aleatórios.
+    """
+    rng = random.Random(semente)
+    resultado: List[EmpresaReplay] = []
+    for e in range(empresas):
+        pessoas: List[FuncionarioReplay] = []
+        for f in range(funcionarios):
+            n = e * funcionarios + f
+            desligado = rng.random() < 0.15
+            dados = DadosFuncionario(
+                SITUACAO="Desligado" if desligado else "Ativo",
+                ADMISSAO=_data(rng, 2000, 2022),
+                NASCIMENTO=_data(rng, 1950, 2000),
+                MATRICULA=f"{e:03}{f:05}",
+                DEMISSAO=_data(rng, 2023, 2023) if desligado else CelulaVazia,
+            )
+            cpf = f"{n:09}{n % 97:02}"
+            pessoas.append(
+                FuncionarioReplay(
+                    f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}", f"FUNCIONARIO {n}", dados
+                )
+            )
+        cnpj = f"{e + 10:08}"
+        resultado.append(
+            EmpresaReplay(
+                f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:]}/0001-{e % 100:02}",
+                f"EMPRESA {e}",
+                rng.random() < proporcao_lista,
+                pessoas,
+            )
+        )
+    return resultado
+
+
+_ESTILO = """
+[hidden] { display: none !important; }
+li[role=option], .MuiGrid-item { cursor: pointer; padding: 4px; border: 1px solid #ccc; }
+"""
+
+_SCRIPT_COMUM = """
+const LATENCIA = () => %(latencia)d + Math.random() * %(variacao)d;
+const FALHA_ERRO = %(falha_erro)f;
+function depois(fn) { setTimeout(fn, LATENCIA()); }
+function talvezErro() {
+    if (Math.random() < FALHA_ERRO) { location.href = "/portal/erro"; return true; }
+    return false;
+}
+function apenasDigitos(texto) { return texto.replace(/\\D/g, ""); }
+function mostrarPainel(funcionario) {
+    const painel = document.querySelector("div[role=tabpanel] ul");
+    painel.innerHTML = "";
+    depois(() => {
+        if (talvezErro()) return;
+        for (const [rotulo, valor] of funcionario.rotulos) {
+            const li = document.createElement("li");
+            li.innerHTML = '<span class="MuiListItemText-primary"></span>'
+                + '<p class="MuiListItemText-secondary"></p>';
+            li.children[0].textContent = rotulo;
+            li.children[1].textContent = valor;
+            painel.appendChild(li);
+        }
+    });
+}
+"""
+
+
+def _pagina(titulo: str, corpo: str, script: str = "", tempo_sessao: str = "29:59") -> str:
+    return f"""<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>{html.escape(titulo)}</title>
+<style>{_ESTILO}</style></head>
+<body>{corpo}
+<div class="tempo-sessao">{tempo_sessao}</div>
+<script>{script}</script>
+</body></html>"""
+
+
+def _rotulos(funcionario: FuncionarioReplay) -> List[List[str]]:
+    dados = funcionario.dados
+    rotulos = [
+        ["Nome", funcionario.nome],
+        ["CPF", funcionario.CPF],
+        ["Data de nascimento", dados.NASCIMENTO],
+        ["Matrícula", dados.MATRICULA],
+        ["Categoria", "101 - Empregado"],
+        ["Situação", dados.SITUACAO],
+        ["Data de admissão", dados.ADMISSAO],
+    ]
+    if isinstance(dados.DEMISSAO, str):
+        rotulos.append(["Data de desligamento", dados.DEMISSAO])
+    return rotulos
+
+
+class ServidorReplay:
+    """Servidor HTTP do replay, executado numa thread.
+
+    :param empresas: Empresas servidas, veja :func:`gerar_empresas`.
+    :param latencia: Segundos de espera antes de cada resposta e de cada atualização feita pelo
+        JavaScript da página.
+    :param variacao: Segundos aleatórios somados a cada latência.
+    :param falha_erro: Probabilidade de cada ação em ``gestaoTrabalhadores`` levar à página de erro.
+    :param falha_sessao: Probabilidade de cada página mostrar a sessão quase expirada (o que faz
+        o programa considerar o ESocial deslogado).
+    """
+
+    def __init__(
+        self,
+        empresas: List[EmpresaReplay],
+        latencia: Float = Float(0.05),
+        variacao: Float = Float(0.05),
+        falha_erro: Float = Float(0.0),
+        falha_sessao: Float = Float(0.0),
+    ) -> None:
+        self.empresas: Dict[str, EmpresaReplay] = {
+            apenas_digitos(empresa.CNPJ): empresa for empresa in empresas
+        }
+        self.latencia = latencia
+        self.variacao = variacao
+        self.falha_erro = falha_erro
+        self.falha_sessao = falha_sessao
+        self.requisicoes = 0
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                replay.requisicoes += 1
+                time.sleep(replay.latencia + random.random() * replay.variacao)
+                url = urlparse(self.path)
+                status, corpo = replay.responder(url.path, parse_qs(url.query))
+                dados = corpo.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.servidor.daemon_threads = True
+        self._thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Endereço base do servidor."""
+        return f"http://127.0.0.1:{self.servidor.server_address[1]}"
+
+    def iniciar(self) -> "ServidorReplay":
+        """Começa a atender requisições."""
+        self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        """Para de atender requisições."""
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def responder(self, caminho: str, parametros: Dict[str, List[str]]) -> tuple[int, str]:
+        """Gera a página do caminho pedido.
+
+        :return: Código HTTP e HTML da página.
+        """
+        tempo_sessao = "05:00" if random.random() < self.falha_sessao else "29:59"
+        script = _SCRIPT_COMUM % {
+            "latencia": int(self.latencia * 1000),
+            "variacao": int(self.variacao * 1000),
+            "falha_erro": self.falha_erro,
+        }
+        cnpj = apenas_digitos(parametros.get("cnpj", [""])[0])
+
+        if caminho == CAMINHO_LOGIN:
+            corpo = '<div id="login-acoes"><button class="sign-in">Entrar com gov.br</button></div>'
+            acao = 'document.querySelector(".sign-in").onclick = () => location.href = "/govbr";'
+            return 200, _pagina("Login", corpo, acao, tempo_sessao)
+        if caminho == "/govbr":
+            corpo = (
+                '<div id="cert-digital"><button type="submit">Certificado digital</button></div>'
+            )
+            acao = (
+                'document.querySelector("#cert-digital button").onclick = '
+                '() => location.href = "/portal/Home/Index";'
+            )
+            return 200, _pagina("gov.br", corpo, acao, tempo_sessao)
+        if caminho == "/portal/Home/Index" and "trocarPerfil" in parametros:
+            script += _SCRIPT_PERFIL
+            return 200, _pagina("Perfil", self._corpo_perfil(), script, tempo_sessao)
+        if caminho == "/portal/Home/Index":
+            corpo = (
+                '<a class="alterar-perfil" href="/portal/Home/Index?trocarPerfil=true">'
+                "Trocar perfil</a>"
+            )
+            return 200, _pagina("Início", corpo, "", tempo_sessao)
+        if caminho == "/portal/sst" and cnpj in self.empresas:
+            return 200, _pagina("SST", _nav(cnpj), _SCRIPT_MENU, tempo_sessao)
+        if caminho == "/portal/gestaoTrabalhadores" and cnpj in self.empresas:
+            return 200, self._pagina_gestao(self.empresas[cnpj], script, tempo_sessao)
+        if caminho == "/portal/erro":
+            return 500, _pagina("Erro", "<h1>Ocorreu um erro no sistema</h1>")
+        if caminho == "/portal/logout":
+            return 200, _pagina("Logout", '<div class="logout-sucesso">Sessão encerrada</div>')
+        return 404, _pagina("Não encontrado", "<h1>404</h1>")
+
+    @staticmethod
+    def _corpo_perfil() -> str:
+        return """
+<select id="perfilAcesso"><option>Procurador de pessoa jurídica - CNPJ</option></select>
+<input id="procuradorCnpj" type="text">
+<button id="btn-verificar-procuracao-cnpj">Verificar</button>
+<div id="comSelecaoModulo" hidden><div class="modulos"><button id="sst">SST</button></div></div>
+<div class="logout"><a href="/portal/logout">Sair</a></div>
+<button id="sairAplicacao" onclick="location.href='/portal/logout'">Sair</button>
+"""
+
+    def _pagina_gestao(self, empresa: EmpresaReplay, script: str, tempo_sessao: str) -> str:
+        funcionarios = {
+            apenas_digitos(f.CPF): {"cpf": f.CPF, "nome": f.nome, "rotulos": _rotulos(f)}
+            for f in empresa.funcionarios
+        }
+        dados = "const FUNCIONARIOS = {};".format(json.dumps(funcionarios))
+        painel = '<div role="tabpanel"><ul></ul></div>'
+        if empresa.lista:
+            cartoes = "".join(
+                '<div class="MuiGrid-item" data-cpf="{}"><div class="MuiCardContent-root">'
+                "<p>{}</p><p>{}</p></div></div>".format(
+                    apenas_digitos(f.CPF), html.escape(f.nome), f.CPF
+                )
+                for f in empresa.funcionarios
+            )
+            corpo = (
+                f'{_nav(apenas_digitos(empresa.CNPJ))}<div id="div-gestao-trabalhadores">'
+                f"<fieldset>{cartoes}</fieldset><fieldset></fieldset></div>{painel}"
+            )
+            script += dados + _SCRIPT_LISTA
+            return _pagina("Gestão de trabalhadores", corpo, script, tempo_sessao)
+
+        corpo = (
+            f'{_nav(apenas_digitos(empresa.CNPJ))}<div id="div-pesquisa"><input type="text"></div>'
+            '<div role="presentation"><ul></ul></div>'
+            f'{painel}<div id="mensagens-gerais"></div>'
+        )
+        script += dados + _SCRIPT_FORMULARIO
+        return _pagina("Gestão de trabalhadores", corpo, script, tempo_sessao)
+
+
+def _nav(cnpj: str) -> str:
+    return f"""<nav>
+<button aria-haspopup="true">Trabalhador</button>
+<div role="menu" hidden><div role="menuitem">
+<a href="/portal/gestaoTrabalhadores?cnpj={cnpj}">Empregados</a>
+</div></div>
+</nav>"""
+
+
+_SCRIPT_PERFIL = """
+document.querySelector("#btn-verificar-procuracao-cnpj").onclick = () => depois(() => {
+    document.querySelector("#comSelecaoModulo").hidden = false;
+});
+document.querySelector("#sst").onclick = () => {
+    const cnpj = apenasDigitos(document.querySelector("#procuradorCnpj").value);
+    location.href = "/portal/sst?cnpj=" + cnpj;
+};
+"""
+
+_SCRIPT_MENU = """
+document.querySelector("nav button").onclick = () => {
+    document.querySelector("nav [role=menu]").hidden = false;
+};
+"""
+
+_SCRIPT_FORMULARIO = (
+    _SCRIPT_MENU
+    + """
+const entrada = document.querySelector("#div-pesquisa input");
+const opcoes = document.querySelector("div[role=presentation] ul");
+const mensagens = document.querySelector("#mensagens-gerais");
+let pesquisa = 0;
+entrada.addEventListener("input", () => {
+    const atual = ++pesquisa;
+    opcoes.innerHTML = "";
+    mensagens.innerHTML = "";
+    document.querySelector("div[role=tabpanel] ul").innerHTML = "";
+    const cpf = apenasDigitos(entrada.value);
+    if (cpf.length !== 11) return;
+    depois(() => {
+        if (atual !== pesquisa || talvezErro()) return;
+        const funcionario = FUNCIONARIOS[cpf];
+        if (!funcionario) {
+            mensagens.innerHTML = '<div role="alert"><div class="MuiAlert-message">'
+                + "Trabalhador não encontrado</div></div>";
+            return;
+        }
+        const opcao = document.createElement("li");
+        opcao.setAttribute("role", "option");
+        opcao.textContent = funcionario.cpf + " - " + funcionario.nome;
+        opcao.onclick = () => mostrarPainel(funcionario);
+        opcoes.appendChild(opcao);
+    });
+});
+"""
+)
+
+_SCRIPT_LISTA = (
+    _SCRIPT_MENU
+    + """
+for (const cartao of document.querySelectorAll(".MuiGrid-item")) {
+    cartao.onclick = () => {
+        if (!talvezErro()) mostrarPainel(FUNCIONARIOS[cartao.dataset.cpf]);
+    };
+}
+"""
+)
+
+
+def main() -> None:
+    """Inicia o servidor com dados gerados até ser interrompido."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--empresas", type=int, default=3)
+    parser.add_argument("--funcionarios", type=int, default=20)
+    parser.add_argument("--latencia", type=float, default=0.05)
+    args = parser.parse_args()
+
+    servidor = ServidorReplay(
+        gerar_empresas(args.empresas, args.funcionarios), Float(args.latencia)
+    ).iniciar()
+    print(f"Servindo em {servidor.url}{CAMINHO_LOGIN}. Ctrl+C para parar.")
+    for empresa in servidor.empresas.values():
+        print(f"  {empresa.CNPJ} {'lista' if empresa.lista else 'formulário'}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        servidor.parar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Compara a leitura completa da planilha (``pd.read_excel``) com a leitura apenas das colunas de
+:class:`~src.webdriver.planilha.ColunaPlanilha` (:func:`~src.webdriver.planilha.ler_planilha`)."""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, List
+
+from openpyxl import Workbook
+import pandas as pd
+
+from src.webdriver.planilha import COLUNAS_PLANILHA, ColunaPlanilha, ler_planilha
+
+__all__ = ["gerar_planilha", "main"]
+
+
+def gerar_planilha(caminho: str, linhas: int, colunas: int) -> None:
+    """Gera uma planilha sintética parecida com as exportações do RH.
+
+    :param caminho: Caminho do arquivo ``.xlsx`` a ser criado.
+    :param linhas: Quantidade de linhas de funcionários.
+    :param colunas: Quantidade total de colunas da planilha.
+    """
+    livro = Workbook(write_only=True)
+    aba = livro.create_sheet()
+    aba.append(["Modelo 1"])
+    aba.append([f"Coluna {c}" for c in range(colunas)])
+    for i in range(linhas):
+        linha: List[Any] = [f"valor {i}-{c}" if c % 3 else i * c for c in range(colunas)]
+        linha[ColunaPlanilha.CPF] = f"{i % 1000:03}.{i // 1000 % 1000:03}.000-{i % 100:02}"
+        linha[ColunaPlanilha.CNPJ_UNIDADE] = f"00.{i % 50:03}.017/{i % 7 + 1:04}-26"
+        linha[ColunaPlanilha.CNPJ] = ""
+        linha[ColunaPlanilha.NOME_FUNCIONARIO] = f" FUNCIONARIO {i} "
+        linha[ColunaPlanilha.NOME_UNIDADE] = f"EMPRESA {i % 50}"
+        aba.append(linha)
+    livro.save(caminho)
+
+
+def _medir(nome: str, funcao: Callable[[], pd.DataFrame], repeticoes: int) -> pd.DataFrame:
+    tempos: List[float] = []
+    tabela = pd.DataFrame()
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        tabela = funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{nome:<14} melhor {min(tempos):8.3f}s  pico {pico / 2**20:8.1f} MiB  "
+        f"tabela {tabela.memory_usage(deep=True).sum() / 2**20:8.1f} MiB  forma {tabela.shape}"
+    )
+    return tabela
+
+
+def main() -> None:
+    """Executa o benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=10_000)
+    parser.add_argument("--colunas", type=int, default=64)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "planilha.xlsx")
+        gerar_planilha(caminho, args.linhas, args.colunas)
+
+        completa = _medir(
+            "read_excel",
+            lambda: pd.read_excel(caminho, header=None, engine="openpyxl"),
+            args.repeticoes,
+        )
+        projetada = _medir("ler_planilha", lambda: ler_planilha(caminho), args.repeticoes)
+
+    pd.testing.assert_frame_equal(completa[list(COLUNAS_PLANILHA)], projetada)
+    print("Resultados idênticos para as colunas de ColunaPlanilha.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Testa e mede :class:`~src.webdriver.direto.SessaoDireta` contra um servidor local que imita as
+requisições de dados dos funcionários: aprende o formato com um funcionário, busca o restante um
+por vez e em paralelo e confere os resultados, inclusive a volta para o DOM (None) quando a
+resposta falha ou não tem o formato aprendido.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+
+from src.webdriver.direto import SessaoDireta
+from src.webdriver.planilha import DadosFuncionario
+from src.webdriver.types import CelulaVazia
+from src.local.types import Int
+
+__all__ = ["gerar_funcionarios", "main", "servidor_stub"]
+
+CAMINHO_API = "/api/gestaoTrabalhadores/trabalhador/"
+
+
+def gerar_funcionarios(quantidade: int) -> Dict[str, Dict[str, object]]:
+    """Gera as respostas do servidor para cada CPF (sem pontuação).
+
+    Um a cada dez funcionários foi desligado e um a cada cinquenta tem a resposta num formato
+    diferente, que deve cair para o DOM.
+    """
+    funcionarios: Dict[str, Dict[str, object]] = {}
+    for i in range(quantidade):
+        cpf = f"{i:011}"
+        desligado = i % 10 == 0
+        resposta: Dict[str, object] = {
+            "cpf": cpf,
+            "nome": f"FUNCIONARIO {i}",
+            "vinculo": {
+                "matricula": f"M{i:06}",
+                "situacao": "Desligado" if desligado else "Ativo",
+                "dtAdmissao": f"20{i % 20:02}-0{i % 9 + 1}-1{i % 10}T00:00:00",
+                "dtDesligamento": f"2023-0{i % 9 + 1}-2{i % 10}" if desligado else None,
+            },
+            "dtNascimento": f"19{50 + i % 40}-1{i % 3}-0{i % 9 + 1}",
+        }
+        if i % 50 == 49:
+            resposta = {"erro": "formato diferente"}
+        funcionarios[cpf] = resposta
+    return funcionarios
+
+
+def esperado(resposta: Dict[str, object]) -> DadosFuncionario | None:
+    """Dados como o raspador do DOM os leria da página do funcionário."""
+    if "vinculo" not in resposta:
+        return None
+    vinculo: Dict[str, str] = resposta["vinculo"]  # type: ignore[assignment]
+
+    def data(iso: str | None) -> str:
+        ano, mes, dia = str(iso)[:10].split("-")
+        return f"{dia}/{mes}/{ano}"
+
+    return DadosFuncionario(
+        SITUACAO=vinculo["situacao"],
+        ADMISSAO=data(vinculo["dtAdmissao"]),
+        NASCIMENTO=data(resposta["dtNascimento"]),  # type: ignore[arg-type]
+        MATRICULA=vinculo["matricula"],
+        DEMISSAO=data(vinculo["dtDesligamento"]) if vinculo["dtDesligamento"] else CelulaVazia,
+    )
+
+
+def servidor_stub(
+    funcionarios: Dict[str, Dict[str, object]], latencia: float
+) -> ThreadingHTTPServer:
+    """Inicia o servidor em uma thread numa porta livre de localhost.
+
+    :param funcionarios: Respostas para cada CPF, veja :func:`gerar_funcionarios`.
+    :param latencia: Segundos de espera antes de cada resposta.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            time.sleep(latencia)
+            cpf = self.path.removeprefix(CAMINHO_API)
+            if "sessao=abc" not in self.headers.get("Cookie", ""):
+                self._responder(401, {"erro": "deslogado"})
+            elif cpf not in funcionarios:
+                self._responder(404, {"erro": "não encontrado"})
+            else:
+                self._responder(200, funcionarios[cpf])
+
+        def _responder(self, status: int, corpo: object) -> None:
+            dados = json.dumps(corpo).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def _medir(
+    nome: str, quantidade: int, funcao: Callable[[], List[DadosFuncionario | None]]
+) -> List[DadosFuncionario | None]:
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"{nome:<12} {duracao:8.3f}s  {quantidade / duracao * 60:10.0f} funcionários/min")
+    return resultado
+
+
+def main() -> None:
+    """Executa o benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--funcionarios", type=int, default=500)
+    parser.add_argument("--latencia", type=float, default=0.02)
+    parser.add_argument("--conexoes", type=int, default=8)
+    args = parser.parse_args()
+
+    funcionarios = gerar_funcionarios(args.funcionarios)
+    servidor = servidor_stub(funcionarios, args.latencia)
+    base = f"http://127.0.0.1:{servidor.server_address[1]}{CAMINHO_API}"
+    cookies = [{"name": "sessao", "value": "abc", "domain": "127.0.0.1", "path": "/"}]
+    sessao = SessaoDireta(cookies, {"Accept": "application/json"}, Int(args.conexoes))
+    try:
+        # requisições que a página teria feito ao mostrar os dois primeiros funcionários
+        for cpf in ("00000000001", "00000000000"):
+            urls = [base.replace("trabalhador/", "lista"), base + cpf]
+            assert sessao.aprender_de_urls(urls, cpf, esperado(funcionarios[cpf])), cpf
+        assert sessao.completa, "Caminho da demissão não aprendido"
+
+        cpfs = list(funcionarios) + ["99999999999"]
+        esperados = [esperado(funcionarios[cpf]) if cpf in funcionarios else None for cpf in cpfs]
+        um_por_vez = _medir("um por vez", len(cpfs), lambda: [sessao.buscar(c) for c in cpfs])
+        paralelo = _medir(
+            "paralelo", len(cpfs), lambda: list(sessao.buscar_varios(cpfs).values())
+        )
+    finally:
+        sessao.fechar()
+        servidor.shutdown()
+
+    assert um_por_vez == paralelo == esperados, "Resultados diferentes do esperado"
+    print(f"Resultados corretos ({sum(d is None for d in esperados)} caem para o DOM).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Compara :func:`~src.webdriver.planilha.registro_de_dados_relevantes` com a implementação
+iterativa anterior, que verificava CNPJs repetidos percorrendo a lista inteira."""
+
+import argparse
+import re
+import time
+from math import nan
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.webdriver.planilha import (
+    DELTA,
+    RegistroCNPJ,
+    RegistroCPF,
+    RegistroDados,
+    registro_de_dados_relevantes,
+)
+from src.local.types import Int
+
+__all__ = ["gerar_colunas", "main", "registro_iterativo"]
+
+
+def registro_iterativo(
+    coluna_cnpj_unidade: Any,
+    coluna_cnpj: Any,
+    coluna_cpf: Any,
+    coluna_cnpj_nomes: Any,
+    coluna_cpf_nomes: Any,
+) -> RegistroDados:
+    """Implementação original de ``registro_de_dados_relevantes``, usada como referência."""
+    registro = RegistroDados()
+    for index, info in enumerate(zip(coluna_cpf, coluna_cpf_nomes)):
+        CPF, nome = info
+        if not isinstance(CPF, str):
+            continue
+        pos_linha = Int(DELTA + index)
+        registro.CPF_lista.append(RegistroCPF(CPF, pos_linha, nome.strip()))
+
+    cnpj_nomes = coluna_cnpj_nomes.to_list()
+    cnpj_length = len(cnpj_nomes)
+    for index, CNPJ in enumerate([*coluna_cnpj_unidade, *coluna_cnpj]):
+        nome = cnpj_nomes[index - cnpj_length] if index >= cnpj_length else cnpj_nomes[index]
+        if not isinstance(CNPJ, str):
+            continue
+        if not re.split("[\\/-]", CNPJ)[1] == "0001":
+            continue
+        if len(registro.CNPJ_lista) != 0 and CNPJ in (r.CNPJ for r in registro.CNPJ_lista):
+            continue
+        registro.CNPJ_lista.append(RegistroCNPJ(CNPJ, nome.strip()))
+
+    # índices de RegistroDados, montados linha por linha
+    matriz_por_raiz: Dict[str, str] = {}
+    for empresa in registro.CNPJ_lista:
+        matriz_por_raiz.setdefault(re.sub(r"\D", "", empresa.CNPJ)[:8], empresa.CNPJ)
+    unidades, matrizes = list(coluna_cnpj_unidade), list(coluna_cnpj)
+    for cpf_registro in registro.CPF_lista:
+        registro.CPF_indice.setdefault(re.sub(r"\D", "", cpf_registro.CPF), []).append(cpf_registro)
+        index = cpf_registro.linha - DELTA
+        CNPJ = unidades[index] if isinstance(unidades[index], str) else matrizes[index]
+        if not isinstance(CNPJ, str):
+            continue
+        if (matriz := matriz_por_raiz.get(re.sub(r"\D", "", CNPJ)[:8])) is not None:
+            registro.CNPJ_CPFs.setdefault(matriz, []).append(cpf_registro)
+
+    return registro
+
+
+def gerar_colunas(linhas: int, empresas: int) -> List[Any]:
+    """Gera colunas sintéticas no formato em que ``webdriver.main`` as extrai da planilha.
+
+    :param linhas: Quantidade de linhas de funcionários.
+    :param empresas: Quantidade de raízes de CNPJ distintas.
+    """
+    rng = np.random.default_rng(0)
+    raiz = rng.integers(0, empresas, linhas)
+    filial = rng.integers(1, 4, linhas)
+    cnpj_unidade = np.array(
+        [f"{r // 1000:02}.{r % 1000:03}.017/{f:04}-26" for r, f in zip(raiz, filial)], dtype=object
+    )
+    cnpj_unidade[rng.random(linhas) < 0.3] = nan
+    cnpj = np.where(
+        pd.isna(cnpj_unidade),
+        np.array([f"{r // 1000:02}.{r % 1000:03}.017/0001-26" for r in raiz], dtype=object),
+        nan,
+    ).astype(object)
+    cpf = np.array(
+        [f"{i % 1000:03}.{i // 1000 % 1000:03}.000-{i % 100:02}" for i in range(linhas)],
+        dtype=object,
+    )
+    cpf[rng.random(linhas) < 0.05] = nan
+    cnpj_nomes = pd.Series([f" EMPRESA {r} " for r in raiz], index=range(DELTA, linhas + DELTA))
+    cpf_nomes = pd.Series([f" FUNCIONARIO {i} " for i in range(linhas)])
+    return [cnpj_unidade, cnpj, cpf, cnpj_nomes, cpf_nomes]
+
+
+def _medir(nome: str, funcao: Callable[[], RegistroDados]) -> RegistroDados:
+    inicio = time.perf_counter()
+    registro = funcao()
+    print(
+        f"{nome:<12} {time.perf_counter() - inicio:8.3f}s  "
+        f"CPFs {len(registro.CPF_lista)}  CNPJs {len(registro.CNPJ_lista)}"
+    )
+    return registro
+
+
+def main() -> None:
+    """Executa o benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--empresas", type=int, default=5_000)
+    args = parser.parse_args()
+
+    colunas = gerar_colunas(args.linhas, args.empresas)
+    iterativo = _medir("iterativo", lambda: registro_iterativo(*colunas))
+    vetorizado = _medir("vetorizado", lambda: registro_de_dados_relevantes(*colunas))
+
+    assert iterativo == vetorizado, "Resultados diferentes"
+    print("Resultados idênticos.")
+
+
+if __name__ == "__main__":
+    main()
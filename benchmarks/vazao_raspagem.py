@@ -0,0 +1,158 @@
+"""Mede a vazão de ponta a ponta de :func:`~src.webdriver.acesso.processar_planilha` (funcionários
+por minuto) contra o servidor de replay do ESocial (:mod:`benchmarks.esocial_replay`), e confere
+se os dados escritos na tabela são os servidos.
+
+Precisa do Chrome instalado. O CAPTCHA do login é pulado e, por padrão, os navegadores são abertos
+em modo headless.
+"""
+
+import argparse
+import multiprocessing
+import time
+from typing import List, Tuple
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import src.webdriver.acesso as acesso
+from src.async_vitals.messaging import ProgressStateNamespace
+from src.utils.acesso import PERFIL_NAVEGADOR
+from src.webdriver.planilha import (
+    COLUNAS_PLANILHA,
+    COLUNAS_RESULTADO,
+    DELTA,
+    ColunaPlanilha,
+    registro_de_dados_relevantes,
+)
+from src.webdriver.pool import PoolNavegadores
+from src.local.types import Float, Int
+from benchmarks.esocial_replay import (
+    CAMINHO_LOGIN,
+    CAMINHO_PERFIL,
+    EmpresaReplay,
+    ServidorReplay,
+    gerar_empresas,
+)
+
+__all__ = ["gerar_tabela", "main"]
+
+
+def gerar_tabela(empresas: List[EmpresaReplay], ausentes: int) -> pd.DataFrame:
+    """Gera a tabela no formato de :func:`~src.webdriver.planilha.ler_planilha` com uma linha por
+    funcionário servido, mais ``ausentes`` funcionários que não existem no servidor por empresa.
+    """
+    linhas = []
+    for e, empresa in enumerate(empresas):
+        cpfs = [funcionario.CPF for funcionario in empresa.funcionarios]
+        cpfs += [f"999.{e:03}.{i:03}-99" for i in range(ausentes)]
+        linhas += [(empresa.CNPJ, empresa.nome, cpf) for cpf in cpfs]
+
+    tabela = pd.DataFrame(
+        np.full((DELTA + len(linhas), len(COLUNAS_PLANILHA)), np.nan, dtype=object),
+        columns=COLUNAS_PLANILHA,
+    )
+    for i, (cnpj, nome, cpf) in enumerate(linhas, start=DELTA):
+        tabela.loc[i, ColunaPlanilha.CNPJ] = cnpj
+        tabela.loc[i, ColunaPlanilha.NOME_UNIDADE] = nome
+        tabela.loc[i, ColunaPlanilha.CPF] = cpf
+        tabela.loc[i, ColunaPlanilha.NOME_FUNCIONARIO] = "FUNCIONARIO"
+    return tabela
+
+
+def _conferir(tabela: pd.DataFrame, empresas: List[EmpresaReplay]) -> Tuple[int, int]:
+    """Retorna quantos funcionários servidos foram escritos corretamente e quantos não."""
+    esperados = {
+        funcionario.CPF: funcionario.dados
+        for empresa in empresas
+        for funcionario in empresa.funcionarios
+    }
+    corretos = errados = 0
+    for _, linha in tabela.loc[DELTA:].iterrows():
+        if (dados := esperados.get(linha[ColunaPlanilha.CPF])) is None:
+            continue
+        obtidos = [linha[coluna] for coluna in COLUNAS_RESULTADO]
+        if all(pd.isna(a) and pd.isna(b) or a == b for a, b in zip(obtidos, dados)):
+            corretos += 1
+        else:
+            errados += 1
+    return corretos, errados
+
+
+def main() -> None:
+    """Executa o benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--empresas", type=int, default=4)
+    parser.add_argument("--funcionarios", type=int, default=25)
+    parser.add_argument("--ausentes", type=int, default=1, help="CPFs inexistentes por empresa")
+    parser.add_argument("--proporcao-lista", type=float, default=0.25)
+    parser.add_argument("--trabalhadores", type=int, default=2)
+    parser.add_argument("--abas", type=int, default=3, help="Abas por navegador")
+    parser.add_argument("--latencia", type=float, default=0.05)
+    parser.add_argument("--variacao", type=float, default=0.05)
+    parser.add_argument("--falha-erro", type=float, default=0.0)
+    parser.add_argument("--falha-sessao", type=float, default=0.0)
+    parser.add_argument("--visivel", action="store_true", help="Abre os navegadores com janela")
+    args = parser.parse_args()
+
+    empresas = gerar_empresas(args.empresas, args.funcionarios, args.proporcao_lista)
+    tabela = gerar_tabela(empresas, args.ausentes)
+    funcionarios = registro_de_dados_relevantes(
+        tabela.loc[DELTA:, ColunaPlanilha.CNPJ_UNIDADE].values,
+        tabela.loc[DELTA:, ColunaPlanilha.CNPJ].values,
+        tabela.loc[DELTA:, ColunaPlanilha.CPF].values,
+        tabela.loc[DELTA:, ColunaPlanilha.NOME_UNIDADE],
+        tabela.loc[DELTA:, ColunaPlanilha.NOME_FUNCIONARIO],
+    )
+    servidor = ServidorReplay(
+        empresas,
+        Float(args.latencia),
+        Float(args.variacao),
+        Float(args.falha_erro),
+        Float(args.falha_sessao),
+    ).iniciar()
+    pool = PoolNavegadores(
+        Int(args.trabalhadores), perfil=PERFIL_NAVEGADOR._replace(headless=not args.visivel)
+    )
+    progresso = multiprocessing.Value(ProgressStateNamespace)
+
+    inicio = time.perf_counter()
+    try:
+        with (
+            mock.patch.object(acesso, "LINK_PRINCIPAL", servidor.url + CAMINHO_LOGIN),
+            mock.patch.object(acesso, "LINK_CNPJ_INPUT", servidor.url + CAMINHO_PERFIL),
+            mock.patch("builtins.input", return_value=""),
+            mock.patch("builtins.print"),
+        ):
+            tabela, estatisticas = acesso.processar_planilha(
+                funcionarios,
+                tabela,
+                progresso,
+                pool=pool,
+                trabalhadores=Int(args.trabalhadores),
+                abas=Int(args.abas),
+            )
+    finally:
+        duracao = time.perf_counter() - inicio
+        pool.fechar()
+        servidor.parar()
+
+    total = sum(len(empresa.funcionarios) for empresa in empresas)
+    corretos, errados = _conferir(tabela, empresas)
+    print(
+        f"{total} funcionários em {args.empresas} empresas, {args.trabalhadores} navegadores "
+        f"com {args.abas} abas"
+    )
+    print(f"{duracao:.1f}s, {total / duracao * 60:.1f} funcionários/min")
+    print(f"{corretos} corretos, {errados} errados, {total - corretos - errados} faltando")
+    print(f"{servidor.requisicoes} requisições ao servidor")
+    if inicializacoes := estatisticas.inicializacoes:
+        print(
+            f"{len(inicializacoes)} navegadores abertos: "
+            f"{sum(t.resolucao for t in inicializacoes):.1f}s resolvendo o chromedriver, "
+            f"{sum(t.navegador for t in inicializacoes):.1f}s abrindo o Chrome"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -13,10 +13,17 @@ import tkinter.messagebox as messagebox
 
 from aioprocessing.queues import AioQueue
 from src.webdriver.types import PlanilhaPronta
+from src.webdriver.planilha import mesclar_resultado
+from src.webdriver.diario import DiarioRaspagem, hash_arquivo
 from src.local.types import Int
 from src.utils.python import string_multilinha
 
 __all__ = [
+    "CAMINHO_CACHE",
+    "CAMINHO_CHROMEDRIVER",
+    "CAMINHO_DIARIO",
+    "CAMINHO_PRAZOS",
+    "PASTA_PERFIS_CHROME",
     "PastasSistema",
     "aguardar_antes_de_salvar",
     "buscar_planilhas",
@@ -27,15 +34,35 @@ __all__ = [
 ]
 
 PastasSistema = NamedTuple(
-    "PastasSistema", [("input", str), ("output", str), ("pronto", str), ("nao_excel", str)]
+    "PastasSistema",
+    [("input", str), ("output", str), ("pronto", str), ("nao_excel", str), ("dados", str)],
 )(
     "C:\\SISTEMA_PLANILHAS",
     "C:\\SISTEMA_PLANILHAS_PROCESSADAS",
     "C:\\SISTEMA_PLANILHAS_ARQUIVADAS",
     "C:\\SISTEMA_LIXEIRA",
+    "C:\\SISTEMA_DADOS",
 )
 """Lista de pastas do sistema que o programa utiliza."""
 
+CAMINHO_DIARIO: str = join(PastasSistema.dados, "diario_raspagem.sqlite3")
+"""Banco de dados do diário de raspagem (veja :class:`~src.webdriver.diario.DiarioRaspagem`)."""
+
+CAMINHO_CACHE: str = join(PastasSistema.dados, "cache_funcionarios.sqlite3")
+"""Banco de dados do cache de funcionários (veja
+:class:`~src.webdriver.cache.CacheFuncionarios`)."""
+
+CAMINHO_CHROMEDRIVER: str = join(PastasSistema.dados, "chromedriver.json")
+"""Chromedriver resolvido na última execução (veja
+:func:`~src.utils.acesso.resolver_chromedriver`)."""
+
+PASTA_PERFIS_CHROME: str = join(PastasSistema.dados, "perfis_chrome")
+"""Pastas de dados de usuário do Chrome (veja
+:class:`~src.webdriver.perfis_chrome.PerfisChrome`)."""
+
+CAMINHO_PRAZOS: str = join(PastasSistema.dados, "prazos_seletores.json")
+"""Durações das esperas de cada seletor (veja :class:`~src.utils.prazos.PrazosAdaptativos`)."""
+
 
 def criar_pastas_de_sistema() -> None:
     """Cria as pastas que o programa vai utilizar para guardar dados importantes."""
@@ -185,7 +212,9 @@ def salvar_planilha_pronta(queue: AioQueue, queue_para_depois: AioQueue) -> None
         )
         while True:
             try:
-                nova_tabela.dataframe.to_excel(
+                hash_planilha = hash_arquivo(nova_tabela.original_path)
+                # a tabela processada só contém as colunas lidas pelo webdriver
+                mesclar_resultado(nova_tabela.original_path, nova_tabela.dataframe).to_excel(
                     join(PastasSistema.output, nome_nova_planilha),
                     index=False,
                     header=False,
@@ -213,3 +242,9 @@ def salvar_planilha_pronta(queue: AioQueue, queue_para_depois: AioQueue) -> None
                 break
             except FileNotFoundError:
                 break
+            else:
+                # planilha salva, o diário de raspagem dela não é mais necessário
+                diario = DiarioRaspagem(CAMINHO_DIARIO, hash_planilha)
+                diario.descartar()
+                diario.fechar()
+                break
@@ -1,9 +1,13 @@
 """Operações úteis e genéricas relacionadas ao acesso das páginas web relevantes ao programa."""
 
 import datetime
+import json
+import os
+import re
+import threading
 import time
 from sys import maxsize as MAX_INT
-from typing import cast, List
+from typing import cast, List, NamedTuple, Tuple
 
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.remote.webelement import WebElement
@@ -16,18 +20,89 @@ import src.webdriver.windows as windows
 from src.webdriver.caminhos import Caminhos
 from src.webdriver.erros import ESocialDeslogadoError
 from src.utils.python import DEBUG
-from src.utils.selenium import esperar_estar_presente
+from src.utils.metricas import metricas
+from src.utils.selenium import (
+    elemento_com_texto,
+    esperar_estar_presente,
+    esperar_primeiro,
+    fechar_abas_extras,
+)
 from src.local.types import Int, Float
 
 __all__ = [
+    "PERFIL_NAVEGADOR",
+    "PerfilNavegador",
+    "RECURSOS_BLOQUEADOS",
+    "TempoInicializacao",
+    "bloquear_recursos",
     "botao_funcionario",
     "deslogado",
+    "esperar_botao_funcionario",
     "inicializar_driver",
     "ocorreu_erro_funcionario",
+    "resolver_chromedriver",
     "segundos_restantes_de_sessao",
     "teste_deslogado",
 ]
 
+TempoInicializacao = NamedTuple("TempoInicializacao", [("resolucao", Float), ("navegador", Float)])
+"""Segundos gastos resolvendo o chromedriver e abrindo o navegador em :func:`inicializar_driver`."""
+
+PerfilNavegador = NamedTuple(
+    "PerfilNavegador",
+    [("headless", bool), ("bloquear_recursos", bool), ("sem_animacoes", bool)],
+)
+"""Como o navegador de raspagem é aberto.
+
+:param headless: Abre o Chrome sem janela. O bloqueio da janela
+    (:func:`~src.webdriver.windows.bloquear_janela`) só acontece no modo visível.
+:param bloquear_recursos: Bloqueia o download de :attr:`RECURSOS_BLOQUEADOS` depois do login (veja
+    :func:`bloquear_recursos`).
+:param sem_animacoes: Desliga transições e animações CSS em todas as páginas.
+"""
+
+PERFIL_NAVEGADOR = PerfilNavegador(headless=False, bloquear_recursos=True, sem_animacoes=True)
+"""Perfil padrão. O headless fica desligado porque o CAPTCHA do login é resolvido à mão na janela
+do navegador."""
+
+RECURSOS_BLOQUEADOS: Tuple[str, ...] = (
+    # imagens
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.ico",
+    # fontes
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.eot",
+    # métricas e análise
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+)
+"""Padrões de endereços (no formato de ``Network.setBlockedURLs`` do CDP) que não são necessários
+para ler os dados dos funcionários."""
+
+_SCRIPT_SEM_ANIMACOES = """
+const desligarAnimacoes = () => {
+    const estilo = document.createElement("style");
+    estilo.textContent = "*, *::before, *::after { transition: none !important; "
+        + "animation: none !important; scroll-behavior: auto !important; }";
+    (document.head || document.documentElement).appendChild(estilo);
+};
+if (document.documentElement) desligarAnimacoes();
+else document.addEventListener("DOMContentLoaded", desligarAnimacoes);
+"""
+
+_chromedriver: str | None = None
+_trava_chromedriver = threading.Lock()
+
 
 def deslogado(driver: uc.Chrome, timeout: Int) -> bool:
     """Testa se o elemento da mensagem de logout do ESocial aparece dentro do limite de tempo
@@ -63,18 +138,138 @@ def segundos_restantes_de_sessao(driver: uc.Chrome) -> Int:
         return Int(MAX_INT)
 
 
-def inicializar_driver() -> uc.Chrome:
+def _navegador_mtime_ns() -> int | None:
+    """Data de modificação do executável do Chrome, que muda quando ele é atualizado."""
+    try:
+        return os.stat(uc.find_chrome_executable()).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+
+def resolver_chromedriver(caminho: str | None = None) -> str:
+    """Retorna o caminho do chromedriver, resolvendo-o só uma vez por processo.
+
+    Com ``caminho``, o chromedriver resolvido é guardado nesse arquivo junto com a versão e a data
+    de modificação do executável do Chrome. Em execuções seguintes ele é reaproveitado se o arquivo
+    ainda existir e o Chrome não tiver sido atualizado, sem a detecção de versões e a checagem de
+    cache do :class:`ChromeDriverManager`. :func:`inicializar_driver` chama esta função sem
+    ``caminho``, então quem quer a persistência deve chamá-la antes de abrir o primeiro navegador
+    (veja :func:`src.webdriver.main.main`).
+
+    :param caminho: Arquivo JSON onde o chromedriver resolvido é guardado entre execuções.
+    :return: Caminho do executável do chromedriver.
+    """
+    global _chromedriver  # pylint: disable=global-statement
+    with _trava_chromedriver:
+        if _chromedriver and os.path.isfile(_chromedriver):
+            return _chromedriver
+
+        navegador = _navegador_mtime_ns()
+        if caminho is not None:
+            try:
+                with open(caminho, encoding="utf-8") as arquivo:
+                    salvo = json.load(arquivo)
+                if (
+                    navegador is not None
+                    and salvo["navegador_mtime_ns"] == navegador
+                    and os.path.isfile(salvo["caminho"])
+                ):
+                    _chromedriver = cast(str, salvo["caminho"])
+                    return _chromedriver
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+
+        _chromedriver = ChromeDriverManager().install()
+        if caminho is None:
+            return _chromedriver
+        versao = re.search("\\d+(?:\\.\\d+){2,3}", _chromedriver)
+        try:
+            with open(caminho, "w", encoding="utf-8") as arquivo:
+                json.dump(
+                    {
+                        "caminho": _chromedriver,
+                        "versao": versao.group() if versao else None,
+                        "navegador_mtime_ns": navegador,
+                    },
+                    arquivo,
+                )
+        except OSError:
+            # sem persistência, o chromedriver só é resolvido de novo na próxima execução
+            pass
+        return _chromedriver
+
+
+def inicializar_driver(
+    perfil: PerfilNavegador = PERFIL_NAVEGADOR,
+    pasta_usuario: str | None = None,
+    tempos: List[TempoInicializacao] | None = None,
+) -> uc.Chrome:
     """Inicializa o webdriver com as opções e características necessárias.
 
+    :param perfil: Como o navegador deve ser aberto.
+    :param pasta_usuario: Pasta de dados de usuário persistente (veja
+        :class:`~src.webdriver.perfis_chrome.PerfisChrome`). Se não for especificada, uma pasta
+        temporária é criada e apagada ao fechar o navegador.
+    :param tempos: Lista onde o tempo gasto em cada etapa é adicionado.
     :return: Instância do webdriver.
     """
-    driver = uc.Chrome(driver_executable_path=ChromeDriverManager().install())
-    driver.set_window_rect(x=0, y=0, width=1280, height=720)
-    if not DEBUG:
-        windows.bloquear_janela(driver)
+    inicio = time.perf_counter()
+    chromedriver = resolver_chromedriver()
+    resolvido = time.perf_counter()
+    options = uc.ChromeOptions()
+    # abas em segundo plano continuam trabalhando normalmente (veja src.webdriver.acesso.abrir_abas)
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-backgrounding-occluded-windows")
+    options.add_argument("--disable-renderer-backgrounding")
+    if perfil.headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1280,720")
+    if pasta_usuario:
+        # sem isso os cookies de sessão (os do login) não são gravados ao fechar o navegador
+        options.add_experimental_option("prefs", {"session.restore_on_startup": 1})
+    driver = uc.Chrome(
+        options=options, driver_executable_path=chromedriver, user_data_dir=pasta_usuario
+    )
+    if pasta_usuario:
+        # A preferência acima também reabre as abas da sessão anterior, mas quem usa o navegador
+        # (abrir_abas, retomar_sessao) espera uma aba só e em branco. Os cookies de sessão ficam,
+        # as abas restauradas, com páginas do ESocial em estados antigos, não.
+        fechar_abas_extras(driver)
+        driver.get("about:blank")
+    if perfil.sem_animacoes:
+        driver.execute_cdp_cmd(
+            "Page.addScriptToEvaluateOnNewDocument", {"source": _SCRIPT_SEM_ANIMACOES}
+        )
+        driver.execute_cdp_cmd(
+            "Emulation.setEmulatedMedia",
+            {"features": [{"name": "prefers-reduced-motion", "value": "reduce"}]},
+        )
+    if not perfil.headless:
+        driver.set_window_rect(x=0, y=0, width=1280, height=720)
+        if not DEBUG:
+            windows.bloquear_janela(driver)
+    if tempos is not None:
+        tempos.append(
+            TempoInicializacao(Float(resolvido - inicio), Float(time.perf_counter() - resolvido))
+        )
     return driver
 
 
+def bloquear_recursos(driver: uc.Chrome, bloquear: bool = True) -> None:
+    """Bloqueia (ou volta a permitir) o download de :attr:`RECURSOS_BLOQUEADOS`.
+
+    Deve ser chamada só depois do login, já que o CAPTCHA precisa das imagens.
+
+    :param driver: Webdriver.
+    :param bloquear: Se os recursos devem ser bloqueados ou liberados.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd(
+        "Network.setBlockedURLs", {"urls": list(RECURSOS_BLOQUEADOS) if bloquear else []}
+    )
+
+
+@metricas.etapa("teste_deslogado")
 def teste_deslogado(driver: uc.Chrome, timeout: Int) -> None:
     """Testa se o ESocial for deslogado ao checar o tempo restante de sessão e a mensagem de logout.
 
@@ -93,30 +288,45 @@ def botao_funcionario(driver: uc.Chrome, CPF: str) -> WebElement | None:
     :param CPF: CPF do funcionário cujos dados devem ser acessados.
     """
     esperar_estar_presente(driver, Caminhos.ESocial.CPF_OPCAO)
-    opcoes: List[WebElement] = driver.find_elements(*Caminhos.ESocial.CPF_OPCAO)
-    if len(botoes_corretos := [o for o in opcoes if CPF in o.text]) > 0:
-        return botoes_corretos[0]
-    return None
+    # todas as opções numa chamada só ao webdriver
+    return elemento_com_texto(driver, Caminhos.ESocial.CPF_OPCAO, CPF)
 
 
-def ocorreu_erro_funcionario(driver: uc.Chrome) -> bool:
-    """Checa se algum erro relacionado ao funcionário ocorreu.
+def esperar_botao_funcionario(driver: uc.Chrome, CPF: str) -> WebElement | None:
+    """Espera o resultado da pesquisa de funcionários na seleção por formulário e retorna o botão do
+    funcionário referente ao CPF especificado.
+
+    Espera o que aparecer primeiro entre as opções da pesquisa e a mensagem de erro, então um
+    funcionário que não existe é descartado assim que o ESocial responde, em vez de depois de todo
+    o prazo. Só se nenhum dos dois aparecer o prazo inteiro é esperado. Quando as opções aparecem,
+    o botão é procurado entre elas sem esperar de novo.
 
     :param driver: Webdriver ativo na hora da checagem.
-    :return: Se o erro ocorreu ou não.
+    :param CPF: CPF do funcionário pesquisado.
+    :return: O botão ou None se o funcionário não foi encontrado.
     """
-
-    esperar_estar_presente(driver, Caminhos.ESocial.CPF_EMPREGADO_INPUT)
-    element: WebElement = driver.find_element(*Caminhos.ESocial.CPF_EMPREGADO_INPUT)
-
     try:
-        esperar_estar_presente(driver, Caminhos.ESocial.CPF_OPCAO, Float(15))
+        indice, _ = esperar_primeiro(
+            driver,
+            Caminhos.ESocial.CPF_OPCAO,
+            Caminhos.ESocial.Formulario.ERRO_FUNCIONARIO,
+            timeout=Float(15),
+        )
     except TimeoutException:
-        return True
+        return None
+    if indice == 1:
+        return None
+    return elemento_com_texto(driver, Caminhos.ESocial.CPF_OPCAO, CPF)
 
-    cpf = cast(str, element.get_attribute("value"))
-    if botao_funcionario(driver, cpf):
-        return False
-    return True
 
+def ocorreu_erro_funcionario(driver: uc.Chrome) -> bool:
+    """Checa se algum erro relacionado ao funcionário pesquisado ocorreu (veja
+    :func:`esperar_botao_funcionario`).
 
+    :param driver: Webdriver ativo na hora da checagem.
+    :return: Se o erro ocorreu ou não.
+    """
+    esperar_estar_presente(driver, Caminhos.ESocial.CPF_EMPREGADO_INPUT)
+    element: WebElement = driver.find_element(*Caminhos.ESocial.CPF_EMPREGADO_INPUT)
+    cpf = cast(str, element.get_attribute("value"))
+    return esperar_botao_funcionario(driver, cpf) is None
@@ -0,0 +1,224 @@
+"""Medição do tempo gasto em cada operação do Selenium, por etapa da raspagem e por seletor."""
+
+import bisect
+import csv
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Tuple
+
+from src.webdriver.types import SeletorHTML
+from src.local.types import Float, Int
+
+__all__ = [
+    "LIMITES_HISTOGRAMA_MS",
+    "ChaveMetrica",
+    "Histograma",
+    "MetricasEtapas",
+    "metricas",
+]
+
+LIMITES_HISTOGRAMA_MS: Tuple[Float, ...] = tuple(Float(2**i) for i in range(18))
+"""Limite superior (em milissegundos) de cada faixa dos histogramas, de 1ms até pouco mais de 2
+minutos (o :attr:`~src.utils.selenium.TIMEOUT_SECS`). Tempos acima do último limite vão para uma
+faixa extra."""
+
+
+class ChaveMetrica(NamedTuple):
+    """Identifica um histograma.
+
+    :param etapa: Etapa da raspagem em que a operação aconteceu (veja :meth:`MetricasEtapas.etapa`)
+        ou uma string vazia fora de qualquer etapa.
+    :param operacao: Nome da operação, como ``"clicar"``, ou ``"total"`` para a etapa inteira.
+    :param seletor: Seletor usado na operação ou None.
+    """
+
+    etapa: str
+    operacao: str
+    seletor: SeletorHTML | None
+
+
+@dataclass
+class Histograma:
+    """Histograma de tempos com faixas fixas (veja :attr:`LIMITES_HISTOGRAMA_MS`).
+
+    Registrar um tempo custa uma busca binária e algumas somas, então ele pode ficar ligado o
+    tempo todo.
+    """
+
+    contagem: Int = Int(0)
+    erros: Int = Int(0)
+    soma_ms: Float = Float(0.0)
+    minimo_ms: Float = Float(float("inf"))
+    maximo_ms: Float = Float(0.0)
+    faixas: List[Int] = field(default_factory=lambda: [Int(0)] * (len(LIMITES_HISTOGRAMA_MS) + 1))
+
+    def registrar(self, ms: Float, erro: bool = False) -> None:
+        """Registra um tempo.
+
+        :param ms: Milissegundos gastos.
+        :param erro: Se a operação terminou com uma exceção.
+        """
+        self.contagem = Int(self.contagem + 1)
+        if erro:
+            self.erros = Int(self.erros + 1)
+        self.soma_ms = Float(self.soma_ms + ms)
+        self.minimo_ms = min(self.minimo_ms, ms)
+        self.maximo_ms = max(self.maximo_ms, ms)
+        i = bisect.bisect_left(LIMITES_HISTOGRAMA_MS, ms)
+        self.faixas[i] = Int(self.faixas[i] + 1)
+
+    @property
+    def media_ms(self) -> Float:
+        """Tempo médio em milissegundos."""
+        return Float(self.soma_ms / self.contagem) if self.contagem else Float(0.0)
+
+    def percentil(self, p: Float) -> Float:
+        """Estima o percentil especificado pelo limite superior da faixa em que ele cai.
+
+        :param p: Percentil entre 0 e 100.
+        :return: Milissegundos, nunca acima do tempo máximo registrado.
+        """
+        if not self.contagem:
+            return Float(0.0)
+        alvo = p / 100 * self.contagem
+        acumulado = 0
+        for limite, quantidade in zip(LIMITES_HISTOGRAMA_MS, self.faixas):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return min(limite, self.maximo_ms)
+        return self.maximo_ms
+
+
+def _nome_seletor(seletor: SeletorHTML | None, nomes: Mapping[SeletorHTML, str]) -> str:
+    if seletor is None:
+        return ""
+    return nomes.get(seletor, "{}={}".format(*seletor))
+
+
+class MetricasEtapas:
+    """Histogramas de tempo por :class:`ChaveMetrica`, seguro para ser usado por várias threads.
+
+    A etapa atual é guardada por thread, então cada trabalhador da raspagem tem as suas etapas.
+    """
+
+    def __init__(self) -> None:
+        self.histogramas: Dict[ChaveMetrica, Histograma] = {}
+        self._trava = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def etapa_atual(self) -> str:
+        """Etapa mais interna em andamento nesta thread ou uma string vazia."""
+        etapas: List[str] = getattr(self._local, "etapas", [])
+        return etapas[-1] if etapas else ""
+
+    def registrar(self, chave: ChaveMetrica, ms: Float, erro: bool = False) -> None:
+        """Registra um tempo no histograma da chave especificada.
+
+        :param chave: Chave do histograma.
+        :param ms: Milissegundos gastos.
+        :param erro: Se a operação terminou com uma exceção.
+        """
+        with self._trava:
+            if (histograma := self.histogramas.get(chave)) is None:
+                histograma = self.histogramas[chave] = Histograma()
+            histograma.registrar(ms, erro)
+
+    @contextmanager
+    def medir(self, operacao: str, seletor: SeletorHTML | None = None) -> Iterator[None]:
+        """Mede o tempo do bloco ``with`` e o registra na etapa atual.
+
+        :param operacao: Nome da operação.
+        :param seletor: Seletor usado na operação.
+        """
+        chave = ChaveMetrica(self.etapa_atual, operacao, seletor)
+        inicio = time.perf_counter_ns()
+        erro = True
+        try:
+            yield
+            erro = False
+        finally:
+            self.registrar(chave, Float((time.perf_counter_ns() - inicio) / 1_000_000), erro)
+
+    @contextmanager
+    def etapa(self, nome: str) -> Iterator[None]:
+        """Marca o bloco ``with`` (ou a função decorada) como uma etapa da raspagem.
+
+        As operações medidas dentro dela são registradas com o nome da etapa e o tempo total da
+        etapa é registrado na operação ``"total"``. Etapas podem ser aninhadas; as operações ficam
+        com a etapa mais interna.
+
+        :param nome: Nome da etapa, como ``"acessar_perfil"``.
+        """
+        if not hasattr(self._local, "etapas"):
+            self._local.etapas = []
+        self._local.etapas.append(nome)
+        try:
+            with self.medir("total"):
+                yield
+        finally:
+            self._local.etapas.pop()
+
+    def zerar(self) -> None:
+        """Apaga todos os histogramas."""
+        with self._trava:
+            self.histogramas.clear()
+
+    def linhas(self, nomes: Mapping[SeletorHTML, str] | None = None) -> List[Dict[str, object]]:
+        """Resumo de cada histograma, do maior tempo total para o menor.
+
+        :param nomes: Nomes legíveis dos seletores (veja
+            :func:`~src.webdriver.caminhos.nomear_seletores`). Seletores sem nome aparecem como
+            ``"estratégia=valor"``.
+        """
+        nomes = nomes or {}
+        with self._trava:
+            itens = sorted(self.histogramas.items(), key=lambda item: -item[1].soma_ms)
+            return [
+                {
+                    "etapa": chave.etapa,
+                    "operacao": chave.operacao,
+                    "seletor": _nome_seletor(chave.seletor, nomes),
+                    "contagem": histograma.contagem,
+                    "erros": histograma.erros,
+                    "total_ms": round(histograma.soma_ms, 3),
+                    "media_ms": round(histograma.media_ms, 3),
+                    "min_ms": round(histograma.minimo_ms, 3),
+                    "p50_ms": round(histograma.percentil(Float(50)), 3),
+                    "p90_ms": round(histograma.percentil(Float(90)), 3),
+                    "p99_ms": round(histograma.percentil(Float(99)), 3),
+                    "max_ms": round(histograma.maximo_ms, 3),
+                    "faixas": list(histograma.faixas),
+                }
+                for chave, histograma in itens
+            ]
+
+    def salvar(self, caminho_base: str, nomes: Mapping[SeletorHTML, str] | None = None) -> None:
+        """Salva o resumo dos histogramas em ``caminho_base + ".json"`` e ``caminho_base + ".csv"``.
+
+        O CSV não tem as faixas dos histogramas, só os percentis.
+
+        :param caminho_base: Caminho dos arquivos sem a extensão.
+        :param nomes: Nomes legíveis dos seletores (veja :meth:`linhas`).
+        """
+        linhas = self.linhas(nomes)
+        with open(caminho_base + ".json", "w", encoding="utf-8") as arquivo:
+            json.dump(
+                {"limites_ms": LIMITES_HISTOGRAMA_MS, "histogramas": linhas},
+                arquivo,
+                ensure_ascii=False,
+                indent=1,
+            )
+        with open(caminho_base + ".csv", "w", encoding="utf-8", newline="") as arquivo:
+            colunas = [coluna for coluna in linhas[0] if coluna != "faixas"] if linhas else []
+            escritor = csv.DictWriter(arquivo, colunas, extrasaction="ignore")
+            escritor.writeheader()
+            escritor.writerows(linhas)
+
+
+metricas = MetricasEtapas()
+"""Métricas da raspagem neste processo. :mod:`src.webdriver.main` as salva e zera ao fim de cada
+planilha."""
@@ -0,0 +1,161 @@
+"""Prazos das esperas do Selenium aprendidos com o tempo que cada seletor costuma levar para
+aparecer, em vez de prazos fixos que são longos demais quando o ESocial está rápido e curtos demais
+quando ele está lento."""
+
+import json
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+from src.webdriver.types import SeletorHTML
+from src.local.types import Float, Int
+
+__all__ = [
+    "ChavePrazo",
+    "JANELA_PRAZOS",
+    "MARGEM_PRAZO",
+    "MIN_AMOSTRAS_PRAZO",
+    "PRAZOS_ADAPTATIVOS",
+    "PRAZO_MAXIMO_SECS",
+    "PRAZO_MINIMO_SECS",
+    "PrazosAdaptativos",
+    "prazos",
+]
+
+PRAZOS_ADAPTATIVOS = True
+"""Se os prazos aprendidos são usados. Sem eles, cada espera usa o seu prazo fixo."""
+JANELA_PRAZOS = Int(200)
+"""Quantidade de esperas mais recentes de cada seletor usadas para calcular o seu prazo."""
+MIN_AMOSTRAS_PRAZO = Int(20)
+"""Quantidade de esperas de um seletor antes do prazo aprendido substituir o prazo fixo."""
+MARGEM_PRAZO = Float(3.0)
+"""Quantas vezes o percentil 99 do seletor o prazo aprendido espera."""
+PRAZO_MINIMO_SECS = Float(10.0)
+"""Menor prazo aprendido. Um timeout faz o trabalhador fazer login de novo, então o prazo não pode
+ficar curto a ponto de uma lentidão passageira causar um."""
+PRAZO_MAXIMO_SECS = Float(120.0)
+"""Maior prazo aprendido, o mesmo de :attr:`~src.utils.selenium.TIMEOUT_SECS`."""
+
+ChavePrazo = Tuple[str, SeletorHTML]
+"""Tipo da espera (como ``"elemento"`` ou ``"primeiro"``, veja :mod:`src.utils.selenium`) e o
+seletor esperado. Esperas de tipos diferentes pelo mesmo seletor demoram coisas diferentes (a
+mudança de um texto não é o aparecimento do elemento), então cada tipo tem as suas durações."""
+
+
+def _percentil(amostras: Deque[float], p: float) -> float:
+    ordenadas = sorted(amostras)
+    return ordenadas[max(0, math.ceil(p / 100 * len(ordenadas)) - 1)]
+
+
+class PrazosAdaptativos:
+    """Janela das durações mais recentes de cada espera (veja :data:`ChavePrazo`) e os prazos
+    calculados a partir delas.
+
+    O prazo aprendido é o percentil 99 das durações vezes ``margem``, entre ``minimo`` e
+    ``maximo``, e nunca passa do prazo pedido por quem espera: uma sondagem curta continua curta.
+    Só as esperas que terminaram entram na janela. Uma espera que estoura o prazo não diz quanto o
+    elemento demoraria (ou se ele apareceria, como numa sondagem de uma sessão que já acabou);
+    numa lentidão, as esperas mais longas que ainda cabem na margem fazem os prazos crescerem.
+
+    :param janela: Quantidade de durações guardadas por espera.
+    :param min_amostras: Quantidade de durações antes do prazo aprendido ser usado.
+    :param margem: Multiplicador do percentil 99.
+    :param minimo: Menor prazo aprendido.
+    :param maximo: Maior prazo aprendido.
+    """
+
+    def __init__(
+        self,
+        janela: Int = JANELA_PRAZOS,
+        min_amostras: Int = MIN_AMOSTRAS_PRAZO,
+        margem: Float = MARGEM_PRAZO,
+        minimo: Float = PRAZO_MINIMO_SECS,
+        maximo: Float = PRAZO_MAXIMO_SECS,
+    ) -> None:
+        self.janela = janela
+        self.min_amostras = min_amostras
+        self.margem = margem
+        self.minimo = minimo
+        self.maximo = maximo
+        self.amostras: Dict[ChavePrazo, Deque[float]] = {}
+        self._trava = threading.Lock()
+
+    def aprendido(self, chave: ChavePrazo) -> Float | None:
+        """Retorna o prazo aprendido para a espera, sem o limite de quem espera.
+
+        :param chave: Tipo da espera e seletor esperado.
+        :return: O prazo ou None se a espera não tem durações suficientes ou se
+            :attr:`PRAZOS_ADAPTATIVOS` estiver desligado.
+        """
+        if not PRAZOS_ADAPTATIVOS:
+            return None
+        with self._trava:
+            amostras = self.amostras.get(chave)
+            if amostras is None or len(amostras) < self.min_amostras:
+                return None
+            p99 = _percentil(amostras, 99)
+        return Float(min(max(p99 * self.margem, self.minimo), self.maximo))
+
+    def prazo(self, chave: ChavePrazo, fixo: Float) -> Float:
+        """Retorna o prazo de uma espera.
+
+        :param chave: Tipo da espera e seletor esperado.
+        :param fixo: Prazo pedido por quem espera. É usado enquanto a espera não tem um prazo
+            aprendido e é o limite do prazo aprendido.
+        """
+        aprendido = self.aprendido(chave)
+        return fixo if aprendido is None else min(aprendido, fixo)
+
+    def registrar(self, chave: ChavePrazo, segundos: Float) -> None:
+        """Registra a duração de uma espera que terminou.
+
+        :param chave: Tipo da espera e seletor que apareceu.
+        :param segundos: Duração da espera.
+        """
+        with self._trava:
+            if (amostras := self.amostras.get(chave)) is None:
+                amostras = self.amostras[chave] = deque(maxlen=self.janela)
+            amostras.append(segundos)
+
+    def carregar(self, caminho: str) -> None:
+        """Carrega as durações salvas por :meth:`salvar`. Um arquivo inexistente ou inválido é
+        ignorado e os prazos fixos continuam valendo até os seletores terem durações suficientes.
+
+        :param caminho: Caminho do arquivo JSON.
+        """
+        try:
+            with open(caminho, encoding="utf-8") as arquivo:
+                salvas = json.load(arquivo)
+            amostras = {
+                (str(item["tipo"]), (str(item["seletor"][0]), str(item["seletor"][1]))): deque(
+                    (float(s) for s in item["amostras"]), maxlen=self.janela
+                )
+                for item in salvas
+            }
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            return
+        with self._trava:
+            self.amostras.update(amostras)
+
+    def salvar(self, caminho: str) -> None:
+        """Salva as durações de todas as esperas, para a próxima execução.
+
+        :param caminho: Caminho do arquivo JSON.
+        """
+        with self._trava:
+            salvas = [
+                {
+                    "tipo": tipo,
+                    "seletor": list(locator),
+                    "amostras": [round(s, 3) for s in amostras],
+                }
+                for (tipo, locator), amostras in self.amostras.items()
+            ]
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(salvas, arquivo)
+
+
+prazos = PrazosAdaptativos()
+"""Prazos deste processo. :mod:`src.webdriver.main` os carrega ao iniciar e os salva ao fim de cada
+planilha."""
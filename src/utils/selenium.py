@@ -1,89 +1,350 @@
-"""Operações úteis e genérias relacionadas ao Selenium."""
+"""Operações úteis e genérias relacionadas ao Selenium.
+
+O tempo de cada operação é registrado em :data:`~src.utils.metricas.metricas`.
+"""
 
 import time
-from typing import Callable, Literal
-import math
-from urllib.parse import urlparse
+from typing import Any, List, Tuple, cast
 
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.support import expected_conditions as ec
+from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import JavascriptException, TimeoutException
 from undetected_chromedriver import Chrome
 
 from src.webdriver.types import SeletorHTML
-from src.local.types import Float
+from src.utils.metricas import metricas
+from src.utils.prazos import prazos
+from src.local.types import Float, Int
 from src.webdriver.erros import ErroInternoSistema
 
 __all__ = [
-    "ERRO_PERIODO_SECS",
     "TIMEOUT_SECS",
     "apertar_teclas",
-    "checar_erros_entre_esperas",
     "clicar",
     "escrever",
+    "esperar_elemento",
     "esperar_estar_presente",
-    "pagina_de_erro",
+    "esperar_primeiro",
+    "esperar_textos_mudarem",
+    "elemento_com_texto",
+    "fechar_abas_extras",
+    "marcar_elementos",
     "pegar_text",
+    "pegar_textos",
 ]
 
 TIMEOUT_SECS = Float(120.0)
 """Segundos para esperar antes de assumir que a página demorou demais para carregar."""
-ERRO_PERIODO_SECS = Float(2.0)
-"""Quantidade de segundos para esperar antes de checar por erros."""
+ESPERA_SCRIPT_SECS = Float(25.0)
+"""Segundos máximos de cada espera dentro da página em :func:`esperar_elemento`. Tem que ser menor
+que o timeout de scripts do webdriver (30 segundos por padrão)."""
+
+_JS_BUSCAR_TODOS = """
+function buscarTodos(tipo, valor) {
+    if (tipo === "xpath") {
+        const resultado = document.evaluate(
+            valor, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+        );
+        return Array.from(
+            {length: resultado.snapshotLength}, (_, i) => resultado.snapshotItem(i)
+        );
+    }
+    return Array.from(document.querySelectorAll(valor));
+}
+function lerTextos(seletores) {
+    return seletores.map(([tipo, valor]) =>
+        buscarTodos(tipo, valor).map((el) => el.innerText.trim())
+    );
+}
+function paginaDeErro() {
+    return location.pathname.split("/").pop().toLowerCase() === "erro";
+}
+"""
+
+_JS_OBSERVAR = """
+const resultado = checar();
+if (resultado) {
+    terminar(resultado);
+    return;
+}
+let terminado = false;
+const fim = (resultado) => {
+    if (terminado) return;
+    terminado = true;
+    observador.disconnect();
+    clearTimeout(temporizador);
+    terminar(resultado);
+};
+const observador = new MutationObserver(() => {
+    const resultado = checar();
+    if (resultado) fim(resultado);
+});
+observador.observe(
+    document, {childList: true, subtree: true, attributes: true, characterData: true}
+);
+const temporizador = setTimeout(() => fim(checar() || ["timeout", null]), timeoutMs);
+"""
+"""Corpo comum dos scripts de espera: resolve com o resultado de ``checar()`` assim que ele deixa de
+ser nulo, observando as mudanças do DOM em vez de perguntar de tempos em tempos, ou com
+``["timeout", null]`` depois de ``timeoutMs``."""
+
+_SCRIPT_ESPERA = (
+    """
+const [tipo, valor, clicavel, timeoutMs, terminar] = arguments;
+"""
+    + _JS_BUSCAR_TODOS
+    + """
+function checar() {
+    if (paginaDeErro()) return ["erro", null];
+    const el = buscarTodos(tipo, valor)[0];
+    if (!el) return null;
+    if (clicavel) {
+        const estilo = getComputedStyle(el);
+        if (!el.getClientRects().length || estilo.visibility === "hidden" || el.disabled) {
+            return null;
+        }
+    }
+    return ["ok", el];
+}
+"""
+    + _JS_OBSERVAR
+)
+"""Script assíncrono que resolve assim que o elemento aparece (ou fica clicável) ou a página vira a
+página de erro."""
+
+_SCRIPT_TEXTOS = _JS_BUSCAR_TODOS + "return lerTextos(arguments[0]);"
+"""Script que retorna o texto de todos os elementos de cada seletor de uma vez só."""
+
+_SCRIPT_ESPERA_TEXTOS = (
+    """
+const [seletores, anteriores, timeoutMs, terminar] = arguments;
+"""
+    + _JS_BUSCAR_TODOS
+    + """
+function checar() {
+    if (paginaDeErro()) return ["erro", null];
+    const textos = lerTextos(seletores);
+    if (textos.some((lista) => !lista.length)) return null;
+    if (anteriores && JSON.stringify(textos) === JSON.stringify(anteriores)) return null;
+    return ["ok", textos];
+}
+"""
+    + _JS_OBSERVAR
+)
+"""Script assíncrono que resolve com os textos dos seletores assim que todos têm elementos e os
+textos são diferentes dos anteriores, ou a página vira a página de erro."""
+
+_SCRIPT_ESPERA_PRIMEIRO = (
+    """
+const [seletores, timeoutMs, terminar] = arguments;
+"""
+    + _JS_BUSCAR_TODOS
+    + """
+function checar() {
+    if (paginaDeErro()) return ["erro", null];
+    for (let i = 0; i < seletores.length; i++) {
+        const el = buscarTodos(...seletores[i]).find((el) => !el.__esperaIgnorar);
+        if (el) return ["ok", [i, el]];
+    }
+    return null;
+}
+"""
+    + _JS_OBSERVAR
+)
+"""Script assíncrono que resolve com o índice e o elemento do primeiro seletor que tiver um elemento
+não marcado por :data:`_SCRIPT_MARCAR`, ou a página vira a página de erro."""
+
+_SCRIPT_MARCAR = (
+    _JS_BUSCAR_TODOS
+    + """
+for (const [tipo, valor] of arguments[0]) {
+    for (const el of buscarTodos(tipo, valor)) el.__esperaIgnorar = true;
+}
+"""
+)
+"""Script que marca os elementos atuais dos seletores para serem ignorados pelas esperas."""
+
+_SCRIPT_COM_TEXTO = (
+    _JS_BUSCAR_TODOS
+    + """
+const [tipo, valor, texto] = arguments;
+return buscarTodos(tipo, valor).find((el) => el.innerText.includes(texto)) ?? null;
+"""
+)
+"""Script que retorna o primeiro elemento do seletor que contém o texto."""
+
+_CONTEXTO_DESTRUIDO = (
+    "document unloaded",
+    "execution context was destroyed",
+    "cannot find context",
+)
+"""Trechos das mensagens de erro de scripts interrompidos por uma navegação."""
 
 
-def pagina_de_erro(driver: Chrome) -> bool:
-    """Retorna se a página atual é uma página de erro.
+def _seletor_js(locator: SeletorHTML) -> Tuple[str, str]:
+    by, valor = locator
+    if by == By.XPATH:
+        return "xpath", valor
+    if by == By.ID:
+        return "css", '[id="{}"]'.format(valor)
+    if by == By.NAME:
+        return "css", '[name="{}"]'.format(valor)
+    if by == By.CLASS_NAME:
+        return "css", ".{}".format(valor)
+    if by == By.TAG_NAME:
+        return "css", valor
+    if by == By.CSS_SELECTOR:
+        return "css", valor
+    raise ValueError("Seletor não suportado: {}".format(by))
+
+
+def esperar_elemento(
+    driver: Chrome, locator: SeletorHTML, clicavel: bool = False, timeout: Float = TIMEOUT_SECS
+) -> WebElement:
+    """Espera o elemento estar presente (ou clicável) e o retorna.
+
+    A espera acontece dentro da página: um MutationObserver resolve a espera assim que o elemento
+    aparece ou a página vira a página de erro, sem intervalo fixo entre checagens e com uma chamada
+    ao webdriver a cada :attr:`ESPERA_SCRIPT_SECS` segundos no máximo. Se a página navegar no meio
+    da espera, ela é refeita na página nova.
 
     :param driver: Webdriver.
+    :param locator: Seletor que representa o elemento HTML.
+    :param clicavel: Se o elemento também tem que estar visível e habilitado, como em
+        :func:`selenium.webdriver.support.expected_conditions.element_to_be_clickable`.
+    :param timeout: Tempo máximo para esperar. Um prazo aprendido (veja :mod:`src.utils.prazos`)
+        pode encurtá-lo, mas nunca aumentá-lo.
+    :raise TimeoutException: Caso o elemento não apareça dentro do prazo estipulado.
+    :raise ErroInternoSistema: Erro genérico do sistema que impede o acesso.
+    :return: Elemento HTML encontrado.
     """
-    return urlparse(driver.current_url).path.split("/")[-1].lower() == "erro"
+    chave = ("clicavel" if clicavel else "elemento", locator)
+    timeout = prazos.prazo(chave, timeout)
+    resultado = _esperar_script(driver, _SCRIPT_ESPERA, timeout, *_seletor_js(locator), clicavel)
+    if resultado is None:
+        raise TimeoutException("Elemento {} não encontrado em {}s".format(locator, timeout))
+    elemento, segundos = resultado
+    prazos.registrar(chave, segundos)
+    return elemento
 
 
-def checar_erros_entre_esperas(
+def esperar_textos_mudarem(
     driver: Chrome,
-    condition: Callable[[ec.AnyDriver], WebElement | bool],
+    anteriores: List[List[str]] | None,
+    *locators: SeletorHTML,
     timeout: Float = TIMEOUT_SECS,
-) -> None:
-    """Espera a condição especificada ser cumprida.
+) -> List[List[str]]:
+    """Espera todos os seletores terem elementos com textos diferentes dos anteriores e retorna os
+    textos, como em :func:`pegar_textos`.
 
-    A cada dado intervalo de tempo esta função checa por possíveis erros. Se um erro ocorrer, a
-    respectiva Exception é levantada; se não, a função retorna None, significando que a condição foi
-    cumprida com sucesso.
+    Serve para saber quando um painel foi atualizado depois de um clique sem esperar cada elemento
+    do zero: a espera e a leitura acontecem numa chamada só ao webdriver (veja
+    :func:`esperar_elemento`).
 
     :param driver: Webdriver.
-    :param condition: Condição de espera como expecificado por :mod:`selenium.webdriver.support.expected_conditions`.
-    :param timeout: Tempo máximo para esperar.
-    :raise TimeoutException: Exception padrão caso a condição não seja cumprida dentro do prazo estipulado.
+    :param anteriores: Textos lidos antes da mudança ou None para só esperar os elementos
+        aparecerem.
+    :param locators: Seletores que representam os elementos HTML.
+    :param timeout: Tempo máximo para esperar. Um prazo aprendido (veja :mod:`src.utils.prazos`)
+        pode encurtá-lo, mas nunca aumentá-lo.
+    :raise TimeoutException: Caso os textos não mudem dentro do prazo estipulado.
     :raise ErroInternoSistema: Erro genérico do sistema que impede o acesso.
+    :return: Uma lista de textos para cada seletor.
+    """
+    seletores = [_seletor_js(locator) for locator in locators]
+    # os textos aparecerem e mudarem depois de um clique demoram coisas diferentes
+    chave = ("textos" if anteriores is None else "textos_mudarem", locators[0])
+    timeout = prazos.prazo(chave, timeout)
+    with metricas.medir("esperar_textos_mudarem", locators[0]):
+        resultado = _esperar_script(driver, _SCRIPT_ESPERA_TEXTOS, timeout, seletores, anteriores)
+    if resultado is None:
+        raise TimeoutException("Textos de {} não mudaram em {}s".format(locators, timeout))
+    textos, segundos = resultado
+    prazos.registrar(chave, segundos)
+    return textos
+
+
+def marcar_elementos(driver: Chrome, *locators: SeletorHTML) -> None:
+    """Marca os elementos que os seletores encontram agora para que :func:`esperar_primeiro` os
+    ignore. Serve para, antes de uma ação, descartar os resultados da ação anterior que ainda
+    estão na página.
+
+    :param driver: Webdriver.
+    :param locators: Seletores que representam os elementos HTML.
     """
-    last_exception: TimeoutException | None = None
-    loop_times = 1 if timeout < ERRO_PERIODO_SECS else timeout / ERRO_PERIODO_SECS
-    # 'float' sendo 0 < x < 1
-    resto: float | None | Literal[0] = loop_times % 1 if loop_times % 1 < 1 else None
+    driver.execute_script(_SCRIPT_MARCAR, [_seletor_js(locator) for locator in locators])
+
+
+def esperar_primeiro(
+    driver: Chrome, *locators: SeletorHTML, timeout: Float = TIMEOUT_SECS
+) -> Tuple[Int, WebElement]:
+    """Espera o primeiro de vários seletores ter um elemento, em vez de esperar cada um até o fim
+    do prazo. Elementos marcados com :func:`marcar_elementos` são ignorados.
 
-    for i in range(math.ceil(loop_times)):
-        periodo = ERRO_PERIODO_SECS if timeout >= ERRO_PERIODO_SECS else timeout
-        if resto and i + 1 == math.ceil(loop_times):
-            # ultimo loop
-            periodo = resto
+    A espera acontece dentro da página, como em :func:`esperar_elemento`.
+
+    :param driver: Webdriver.
+    :param locators: Seletores que representam os elementos HTML, em ordem de prioridade quando
+        mais de um já tem elementos.
+    :param timeout: Tempo máximo para esperar. Um prazo aprendido (veja :mod:`src.utils.prazos`)
+        pode encurtá-lo, mas nunca aumentá-lo.
+    :raise TimeoutException: Caso nenhum elemento apareça dentro do prazo estipulado.
+    :raise ErroInternoSistema: Erro genérico do sistema que impede o acesso.
+    :return: Índice do seletor que apareceu primeiro e o elemento encontrado.
+    """
+    seletores = [_seletor_js(locator) for locator in locators]
+    # a espera termina com qualquer um dos seletores, então o prazo é o do mais lento deles
+    aprendidos = [prazos.aprendido(("primeiro", locator)) for locator in locators]
+    if None not in aprendidos:
+        timeout = min(max(cast(List[Float], aprendidos)), timeout)
+    with metricas.medir("esperar_primeiro", locators[0]):
+        resultado = _esperar_script(driver, _SCRIPT_ESPERA_PRIMEIRO, timeout, seletores)
+    if resultado is None:
+        raise TimeoutException("Nenhum de {} encontrado em {}s".format(locators, timeout))
+    (indice, elemento), segundos = resultado
+    prazos.registrar(("primeiro", locators[indice]), segundos)
+    return Int(indice), elemento
+
+
+def elemento_com_texto(driver: Chrome, locator: SeletorHTML, texto: str) -> WebElement | None:
+    """Retorna o primeiro elemento do seletor que contém o texto, com uma chamada só ao webdriver.
+
+    Não espera os elementos aparecerem, veja :func:`esperar_estar_presente`.
+
+    :param driver: Webdriver.
+    :param locator: Seletor que representa os elementos HTML.
+    :param texto: Texto procurado dentro de cada elemento.
+    :return: Elemento encontrado ou None.
+    """
+    return driver.execute_script(_SCRIPT_COM_TEXTO, *_seletor_js(locator), texto)
+
+
+def _esperar_script(
+    driver: Chrome, script: str, timeout: Float, *args: Any
+) -> Tuple[Any, Float] | None:
+    """Executa um script de espera assíncrono até ele resolver ou o prazo acabar.
+
+    :return: O valor do resultado ``["ok", valor]`` e os segundos que ele demorou, para serem
+        registrados em :data:`~src.utils.prazos.prazos`, ou None se o prazo acabou.
+    :raise ErroInternoSistema: Se o script resolveu com ``["erro", null]``.
+    """
+    inicio = time.monotonic()
+    limite = inicio + timeout
+    while (restante := limite - time.monotonic()) > 0:
+        espera_ms = int(min(restante, ESPERA_SCRIPT_SECS) * 1000)
         try:
-            WebDriverWait(driver, periodo).until(condition)
-        except TimeoutException as err:
-            if pagina_de_erro(driver):
-                raise ErroInternoSistema() from err
-            if i + 1 == math.ceil(loop_times):
-                # ultimo loop
-                last_exception = err
-            continue
-        else:
-            break
-    if last_exception:
-        # Se todo o tempo tiver passado e condição não foi cumprida,
-        # mas nenhum erro ocorreu.
-        raise last_exception
+            estado, valor = driver.execute_async_script(script, *args, espera_ms)
+        except JavascriptException as err:
+            if any(trecho in err.msg.lower() for trecho in _CONTEXTO_DESTRUIDO):
+                # a página navegou durante a espera
+                continue
+            raise
+        if estado == "ok":
+            return valor, Float(time.monotonic() - inicio)
+        if estado == "erro":
+            raise ErroInternoSistema()
+    return None
 
 
 def clicar(driver: Chrome, locator: SeletorHTML) -> None:
@@ -92,8 +353,8 @@ def clicar(driver: Chrome, locator: SeletorHTML) -> None:
     :param driver: Webdriver ativo no momento do clique.
     :param locator: Seletor que representa o elemento HTML que deve ser clicado.
     """
-    checar_erros_entre_esperas(driver, ec.element_to_be_clickable(locator))
-    driver.find_element(*locator).click()
+    with metricas.medir("clicar", locator):
+        esperar_elemento(driver, locator, clicavel=True).click()
 
 
 def escrever(driver: Chrome, locator: SeletorHTML, *teclas: str) -> None:
@@ -103,8 +364,8 @@ def escrever(driver: Chrome, locator: SeletorHTML, *teclas: str) -> None:
     :param locator: Seletor que representa o elemento HTML que deve ser clicado.
     :param teclas: Lista de teclas a serem tecladas.
     """
-    checar_erros_entre_esperas(driver, ec.element_to_be_clickable(locator))
-    driver.find_element(*locator).send_keys(*teclas)
+    with metricas.medir("escrever", locator):
+        esperar_elemento(driver, locator, clicavel=True).send_keys(*teclas)
 
 
 def esperar_estar_presente(
@@ -114,9 +375,10 @@ def esperar_estar_presente(
 
     :param driver: Webdriver ativo no momento do clique.
     :param locator: Seletor que representa o elemento HTML que deve ser clicado.
-    :param timeout: Tempo máximo de espera.
+    :param timeout: Tempo máximo de espera enquanto o seletor não tem um prazo aprendido.
     """
-    checar_erros_entre_esperas(driver, ec.presence_of_element_located(locator), timeout)
+    with metricas.medir("esperar_estar_presente", locator):
+        esperar_elemento(driver, locator, timeout=timeout)
 
 
 def pegar_text(driver: Chrome, locator: SeletorHTML) -> str:
@@ -126,8 +388,35 @@ def pegar_text(driver: Chrome, locator: SeletorHTML) -> str:
     :param locator: Seletor que representa o elemento HTML que deve ser clicado.
     :return: Texto que estava dentro do elemento HTML.
     """
-    esperar_estar_presente(driver, locator)
-    return driver.find_element(*locator).text
+    with metricas.medir("pegar_text", locator):
+        return esperar_elemento(driver, locator).text
+
+
+def pegar_textos(driver: Chrome, *locators: SeletorHTML) -> List[List[str]]:
+    """Retorna o texto de todos os elementos de cada seletor com uma chamada só ao webdriver, em vez
+    de uma chamada por elemento como em ``[e.text for e in driver.find_elements(...)]``.
+
+    Não espera os elementos aparecerem, veja :func:`esperar_estar_presente`.
+
+    :param driver: Webdriver ativo no momento da leitura.
+    :param locators: Seletores que representam os elementos HTML.
+    :return: Uma lista de textos para cada seletor, na ordem em que os elementos aparecem na página.
+    """
+    with metricas.medir("pegar_textos", locators[0]):
+        return driver.execute_script(
+            _SCRIPT_TEXTOS, [_seletor_js(locator) for locator in locators]
+        )
+
+
+def fechar_abas_extras(driver: Chrome) -> None:
+    """Fecha todas as abas menos a primeira e volta para ela.
+
+    :param driver: Webdriver.
+    """
+    for handle in driver.window_handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(driver.window_handles[0])
 
 
 def apertar_teclas(driver: Chrome, *teclas: str) -> None:
@@ -136,6 +425,7 @@ def apertar_teclas(driver: Chrome, *teclas: str) -> None:
     :param driver: Webdriver ativo no momento do clique.
     :param teclas: Lista de teclas a serem tecladas.
     """
-    for tecla in teclas:
-        time.sleep(0.3)
-        ActionChains(driver).send_keys(tecla).perform()
+    with metricas.medir("apertar_teclas"):
+        for tecla in teclas:
+            time.sleep(0.3)
+            ActionChains(driver).send_keys(tecla).perform()
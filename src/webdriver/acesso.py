@@ -1,61 +1,158 @@
+import queue
+import threading
 import time
-
-from typing import Optional, Set
+from collections import deque
+from urllib.parse import urlparse
+
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Set,
+    Tuple,
+    cast,
+)
 import pandas as pd
 
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.keys import Keys
 import undetected_chromedriver as uc
-from string import digits
 
 from src.webdriver.caminhos import Caminhos, DadoNaoEncontrado, FuncionarioCrawlerBase
-from src.webdriver.erros import FuncionarioNaoEncontradoError
-from src.webdriver.planilha import ColunaPlanilha, RegistroCPF, RegistroDados
+from src.webdriver.cache import CacheFuncionarios
+from src.webdriver.diario import DiarioRaspagem
+from src.webdriver.direto import DIRETO_CONEXOES, MODO_DIRETO, SessaoDireta
+from src.webdriver.erros import ErroInternoSistema, FuncionarioNaoEncontradoError
+from src.webdriver.estatisticas import EstatisticasRaspagem, TrocaPerfil
+from src.webdriver.plano import EmpresaPlanejada, planejar_raspagem
+from src.webdriver.pool import PoolNavegadores
+from src.webdriver.sessao import SessaoESocial
+from src.webdriver.tentativas import (
+    RODADAS_ESTACIONADAS,
+    DisjuntorEmpresa,
+    TentativasEmpresa,
+)
+from src.webdriver.planilha import (
+    DadosFuncionario,
+    RegistroCNPJ,
+    RegistroCPF,
+    RegistroDados,
+    ResultadosRaspagem,
+    apenas_digitos,
+)
 from src.webdriver.types import CelulaVazia
-from src.local.types import Int
+from src.local.types import Float, Int
 from src.utils.acesso import (
-    botao_funcionario,
-    ocorreu_erro_funcionario,
-    inicializar_driver,
+    PERFIL_NAVEGADOR,
+    TempoInicializacao,
+    bloquear_recursos,
+    esperar_botao_funcionario,
     teste_deslogado,
 )
-from src.utils.selenium import clicar, apertar_teclas, escrever
+from src.utils.metricas import metricas
+from src.utils.selenium import (
+    clicar,
+    apertar_teclas,
+    escrever,
+    esperar_estar_presente,
+    fechar_abas_extras,
+    marcar_elementos,
+)
 from src.webdriver.erros import ESocialDeslogadoError
-from src.utils.python import LoopState
-from src.async_vitals.messaging import ProgressStateNamespace as progress_values
+from src.async_vitals.messaging import ProgressStateNamespace as progress_values_t
 
 
 __all__ = [
+    "ABAS_POR_NAVEGADOR",
+    "ESPERA_ABA_SECS",
+    "ESPERA_SESSAO_SECS",
     "LINK_CNPJ_INPUT",
     "LINK_PRINCIPAL",
+    "TRABALHADORES_RASPAGEM",
+    "abrir_abas",
+    "abrir_funcionario",
     "acessar_perfil",
     "carregar_pagina_ate_acessar_perfil",
     "carregar_pagina_ate_cpf_input",
     "entrar_com_cpf",
+    "pesquisar_cpf",
     "processar_planilha",
     "raspar_dados",
+    "retomar_sessao",
+    "trocar_perfil",
 ]
 
 
 LINK_PRINCIPAL = "https://login.esocial.gov.br/login.aspx"
 LINK_CNPJ_INPUT = "https://www.esocial.gov.br/portal/Home/Index?trocarPerfil=true"
 logout_timeout = Int(10)
+TRABALHADORES_RASPAGEM = Int(2)
+"""Quantidade de empresas raspadas ao mesmo tempo, cada uma no seu próprio navegador."""
+ABAS_POR_NAVEGADOR = Int(3)
+"""Quantidade de abas de cada navegador que pesquisam funcionários ao mesmo tempo na seleção por
+formulário, todas com o mesmo login (veja :func:`abrir_abas`)."""
+ESPERA_ABA_SECS = Float(30.0)
+"""Segundos para esperar a pesquisa de funcionários aparecer numa aba nova."""
+ESPERA_SESSAO_SECS = Float(15.0)
+"""Segundos para esperar a troca de perfil aparecer ao tentar continuar uma sessão salva."""
 
+_trava_captcha = threading.Lock()
 
+
+@metricas.etapa("login")
 def carregar_pagina_ate_acessar_perfil(driver: uc.Chrome) -> None:
     """Interage com os elementos corretos até chegar na página de acesso perfil.
 
     :param driver: Webdriver ativo na hora do acesso.
     """
-    driver.get(LINK_PRINCIPAL)
-    # Pausa para resolução manual do CAPTCHA
-    print("\n⚠️ Por favor, resolva o CAPTCHA no navegador e pressione Enter aqui para continuar...")
-    input()
+    # Com vários trabalhadores, um CAPTCHA é pedido de cada vez
+    with _trava_captcha:
+        driver.get(LINK_PRINCIPAL)
+        # Pausa para resolução manual do CAPTCHA
+        print(
+            "\n⚠️ Por favor, resolva o CAPTCHA no navegador e pressione Enter aqui para continuar..."
+        )
+        input()
     clicar(driver, Caminhos.ESocial.BOTAO_LOGIN)
     clicar(driver, Caminhos.Govbr.SELECIONAR_CERTIFICADO)
     clicar(driver, Caminhos.ESocial.TROCAR_PERFIL)
+    if PERFIL_NAVEGADOR.bloquear_recursos:
+        # depois do login as imagens não são mais necessárias para o CAPTCHA
+        bloquear_recursos(driver)
+
 
+@metricas.etapa("retomar_sessao")
+def retomar_sessao(driver: uc.Chrome) -> bool:
+    """Tenta continuar a sessão salva na pasta de dados do navegador (veja
+    :class:`~src.webdriver.perfis_chrome.PerfisChrome`), indo direto para a troca de perfil, sem
+    login nem CAPTCHA.
 
+    Só tenta se o navegador tem cookies do ESocial, então um navegador limpo não perde tempo.
+
+    :param driver: Webdriver recém emprestado.
+    :return: Se a sessão continuou e o navegador está na troca de perfil, como depois de
+        :func:`carregar_pagina_ate_acessar_perfil`.
+    """
+    dominio = urlparse(LINK_CNPJ_INPUT).hostname or ""
+    cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+    if not any(dominio.endswith(cookie["domain"].lstrip(".")) for cookie in cookies):
+        return False
+    driver.get(LINK_CNPJ_INPUT)
+    try:
+        esperar_estar_presente(driver, Caminhos.ESocial.CNPJ_INPUT, ESPERA_SESSAO_SECS)
+    except (TimeoutException, ErroInternoSistema):
+        return False
+    if PERFIL_NAVEGADOR.bloquear_recursos:
+        bloquear_recursos(driver)
+    return True
+
+
+@metricas.etapa("acessar_perfil")
 def acessar_perfil(driver: uc.Chrome, CNPJ: str) -> None:
     """Interage com os elementos corretos para entrar com os dados e acessar o
     base no CNPJ.
@@ -70,6 +167,7 @@ def acessar_perfil(driver: uc.Chrome, CNPJ: str) -> None:
     clicar(driver, Caminhos.ESocial.MENU_OPCAO_EMPREGADOS)
 
 
+@metricas.etapa("entrar_com_cpf")
 def entrar_com_cpf(driver: uc.Chrome, CPF: str) -> None:
     """Entra com os dados do CPF do funcionário quando a forma de pesquisa de
     formulário.
@@ -77,188 +175,659 @@ def entrar_com_cpf(driver: uc.Chrome, CPF: str) -> None:
     :param driver: Webdriver ativo na hora do acesso.
     :param CPF: CPF do funcionário com ou sem pontuação.
     """
+    pesquisar_cpf(driver, CPF)
+    abrir_funcionario(driver, CPF)
+
+
+@metricas.etapa("pesquisar_cpf")
+def pesquisar_cpf(driver: uc.Chrome, CPF: str) -> None:
+    """Primeira metade de :func:`entrar_com_cpf`: escreve o CPF na pesquisa de funcionários sem
+    esperar o resultado.
+
+    :param driver: Webdriver ativo na hora do acesso.
+    :param CPF: CPF do funcionário com ou sem pontuação.
+    """
+    # as opções e o erro da pesquisa anterior não valem para esta (veja esperar_botao_funcionario)
+    marcar_elementos(
+        driver, Caminhos.ESocial.CPF_OPCAO, Caminhos.ESocial.Formulario.ERRO_FUNCIONARIO
+    )
     escrever(driver, Caminhos.ESocial.CPF_EMPREGADO_INPUT, Keys.CONTROL + "a", Keys.DELETE)
     escrever(driver, Caminhos.ESocial.CPF_EMPREGADO_INPUT, CPF)
-    if ocorreu_erro_funcionario(driver):
-        raise FuncionarioNaoEncontradoError()
 
-    if botao := botao_funcionario(driver, CPF):
+
+@metricas.etapa("abrir_funcionario")
+def abrir_funcionario(driver: uc.Chrome, CPF: str) -> None:
+    """Segunda metade de :func:`entrar_com_cpf`: espera o resultado da pesquisa e abre os dados do
+    funcionário.
+
+    :param driver: Webdriver ativo na hora do acesso.
+    :param CPF: CPF do funcionário, o mesmo passado para :func:`pesquisar_cpf`.
+    :raise FuncionarioNaoEncontradoError: Se o funcionário não existe na empresa.
+    """
+    if botao := esperar_botao_funcionario(driver, CPF):
         botao.click()
     else:
         raise FuncionarioNaoEncontradoError()
 
 
 def raspar_dados(
-    tabela: pd.DataFrame, registro: RegistroCPF, crawler: FuncionarioCrawlerBase
-) -> None:
-    """Pega os dados do funcionário utilizando a instância do crawler especificada e
-    dados encontrados na tabela utilizando a posição do CPF relativo a posição da
-    planilha.
-
-    :param tabela: DataFrame que representa a planilha que será mudada.
-    :param registro: Dados do CPF (como posição dele na planilha).
+    resultados: ResultadosRaspagem, registros: List[RegistroCPF], crawler: FuncionarioCrawlerBase
+) -> DadosFuncionario:
+    """Pega os dados do funcionário utilizando a instância do crawler especificada e os guarda no
+    buffer de resultados em todas as linhas da planilha onde o CPF aparece.
+
+    :param resultados: Buffer de resultados que depois é aplicado na planilha.
+    :param registros: Registros de todas as linhas do mesmo CPF (veja
+        :meth:`RegistroDados.buscar_cpf`).
     :param crawler: Instância do crawler correto para raspar os dados do funcionário.
     :raises DadoNaoEncontrado: Quando o dado que você está tentando acessar não é encontrado.
+    :return: Dados raspados do funcionário.
     """
-    tabela[ColunaPlanilha.SITUACAO][registro.linha] = crawler.SITUACAO
-    tabela[ColunaPlanilha.ADMISSAO][registro.linha] = crawler.ADMISSAO
-    tabela[ColunaPlanilha.NASCIMENTO][registro.linha] = crawler.NASCIMENTO
-    tabela[ColunaPlanilha.MATRICULA][registro.linha] = crawler.MATRICULA
+    dados = _ler_dados(crawler)
+    for registro in registros:
+        resultados.adicionar(registro.linha, dados)
+    return dados
+
+
+def _ler_dados(crawler: FuncionarioCrawlerBase) -> DadosFuncionario:
+    """Pega os dados do funcionário utilizando a instância do crawler especificada.
 
+    :param crawler: Instância do crawler correto para raspar os dados do funcionário.
+    :raises DadoNaoEncontrado: Quando o dado que você está tentando acessar não é encontrado.
+    """
     demissao = CelulaVazia
     try:
         demissao = crawler.DEMISSAO
     except DadoNaoEncontrado:
+        # se o funcionario ainda estiver contratado o campo de demissao não existe
         pass
-    # se o funcionario ainda estiver contratado o campo de demissao não existe
-    tabela[ColunaPlanilha.DEMISSAO][registro.linha] = demissao
+
+    return DadosFuncionario(
+        SITUACAO=crawler.SITUACAO,
+        ADMISSAO=crawler.ADMISSAO,
+        NASCIMENTO=crawler.NASCIMENTO,
+        MATRICULA=crawler.MATRICULA,
+        DEMISSAO=demissao,
+    )
 
 
 def carregar_pagina_ate_cpf_input(driver: uc.Chrome, CNPJ: str) -> None:
     """Abstração do processo de chegar até o ponto de selecionar os funcionários e
-    dados.
+    dados. Se a sessão salva do navegador ainda vale, o login é pulado (veja
+    :func:`retomar_sessao`).
     """
-    carregar_pagina_ate_acessar_perfil(driver)
+    if not retomar_sessao(driver):
+        carregar_pagina_ate_acessar_perfil(driver)
     teste_deslogado(driver, logout_timeout)
     acessar_perfil(driver, CNPJ)
     teste_deslogado(driver, logout_timeout)
 
 
+def abrir_abas(driver: uc.Chrome, quantidade: Int) -> List[str]:
+    """Abre abas extras na pesquisa de funcionários da empresa atual, depois de
+    :func:`carregar_pagina_ate_cpf_input`.
+
+    As abas compartilham o login da aba atual, então nenhum CAPTCHA novo é pedido. Se uma aba não
+    chegar na pesquisa de funcionários, ela é fechada e nenhuma outra é aberta.
+
+    :param driver: Webdriver na pesquisa de funcionários.
+    :param quantidade: Quantidade total de abas, contando a atual.
+    :return: Handles das abas que chegaram na pesquisa, começando pela atual, que volta a ser a aba
+        ativa.
+    """
+    original = driver.current_window_handle
+    url = driver.current_url
+    abas = [original]
+    for _ in range(quantidade - 1):
+        driver.switch_to.new_window("tab")
+        try:
+            driver.get(url)
+            esperar_estar_presente(driver, Caminhos.ESocial.CPF_EMPREGADO_INPUT, ESPERA_ABA_SECS)
+        except (TimeoutException, ErroInternoSistema):
+            driver.close()
+            break
+        abas.append(driver.current_window_handle)
+    driver.switch_to.window(original)
+    return abas
+
+
+def _raspar_em_abas(
+    driver: uc.Chrome, abas: List[str], CPFs: Iterable[Tuple[str, str]]
+) -> Iterator[Tuple[str, DadosFuncionario | None]]:
+    """Raspa funcionários da seleção por formulário em várias abas do mesmo navegador.
+
+    Cada funcionário passa por três fases (:func:`pesquisar_cpf`, :func:`abrir_funcionario` e a
+    leitura dos dados) e cada visita a uma aba avança só uma fase, de forma que, enquanto uma aba
+    espera o ESocial responder, as outras são atendidas. Exceções de acesso escapam do gerador; os
+    funcionários que não foram retornados têm que ser raspados de novo.
+
+    :param driver: Webdriver na pesquisa de funcionários.
+    :param abas: Handles das abas (veja :func:`abrir_abas`).
+    :param CPFs: Pares de chave e CPF (com ou sem pontuação) a serem raspados.
+    :return: Pares de chave e dados do funcionário, ou None se ele não foi encontrado, na ordem em
+        que terminam. O navegador fica na aba do funcionário retornado.
+    """
+    fila: Deque[Tuple[str, str]] = deque(CPFs)
+    livres: List[str] = list(reversed(abas))
+    # (aba, chave, CPF, fase seguinte)
+    ocupadas: Deque[Tuple[str, str, str, Literal["abrir", "ler"]]] = deque()
+    atual = driver.current_window_handle
+
+    def ir(aba: str) -> None:
+        nonlocal atual
+        if aba != atual:
+            driver.switch_to.window(aba)
+            atual = aba
+
+    while fila or ocupadas:
+        while livres and fila:
+            aba = livres.pop()
+            chave, CPF = fila.popleft()
+            ir(aba)
+            pesquisar_cpf(driver, CPF)
+            ocupadas.append((aba, chave, CPF, "abrir"))
+
+        aba, chave, CPF, fase = ocupadas.popleft()
+        ir(aba)
+        if fase == "abrir":
+            try:
+                abrir_funcionario(driver, CPF)
+            except FuncionarioNaoEncontradoError:
+                livres.append(aba)
+                yield chave, None
+                continue
+            ocupadas.append((aba, chave, CPF, "ler"))
+        else:
+            with metricas.etapa("formulario"):
+                dados = _ler_dados(Caminhos.ESocial.Formulario(driver))
+            livres.append(aba)
+            yield chave, dados
+
+
+@metricas.etapa("trocar_perfil")
+def trocar_perfil(driver: uc.Chrome, CNPJ: str) -> None:
+    """Acessa o perfil de outra empresa sem sair da sessão, pela página de troca de perfil
+    (:attr:`LINK_CNPJ_INPUT`), evitando um novo login e o seu CAPTCHA.
+
+    As abas extras da empresa anterior (veja :func:`abrir_abas`) são fechadas.
+
+    :param driver: Webdriver já logado, depois de :func:`carregar_pagina_ate_cpf_input`.
+    :param CNPJ: CNPJ da empresa cujo perfil deve ser acessado.
+    :raise ESocialDeslogadoError: Se a sessão acabou; só um login completo resolve.
+    """
+    fechar_abas_extras(driver)
+    driver.get(LINK_CNPJ_INPUT)
+    acessar_perfil(driver, CNPJ)
+    teste_deslogado(driver, logout_timeout)
+
+
+def _atualizar_cnpj(progress_values: progress_values_t, atual: Int, empresa: RegistroCNPJ) -> None:
+    with progress_values.get_lock():
+        progress_values.cnpj_current = atual
+        progress_values_t.set_string(progress_values.cnpj_msg, empresa.CNPJ)
+        progress_values_t.set_string(progress_values.cnpj_long_msg, empresa.nome)
+        progress_values.cnpj_last_updated_ns = time.time_ns()
+
+
+def _atualizar_cpf(progress_values: progress_values_t, atual: Int, CPF: str) -> None:
+    with progress_values.get_lock():
+        progress_values.cpf_current = atual
+        progress_values_t.set_string(progress_values.cpf_msg, CPF)
+        progress_values.cpf_last_updated_ns = time.time_ns()
+
+
 def processar_planilha(
-    funcionarios: RegistroDados, tabela: pd.DataFrame, progress_values: progress_values
-) -> pd.DataFrame:
+    funcionarios: RegistroDados,
+    tabela: pd.DataFrame,
+    progress_values: progress_values_t,
+    diario: DiarioRaspagem | None = None,
+    cache: CacheFuncionarios | None = None,
+    pool: PoolNavegadores | None = None,
+    trabalhadores: Int = TRABALHADORES_RASPAGEM,
+    abas: Int = ABAS_POR_NAVEGADOR,
+) -> Tuple[pd.DataFrame, EstatisticasRaspagem]:
     """Inicializa o webdriver, acessa a página de raspagem e raspa os dados.
 
+    Os funcionários são raspados empresa por empresa (veja :func:`planejar_raspagem`): o perfil de
+    cada empresa é acessado uma vez e todos os seus funcionários são raspados antes de passar para
+    a próxima. As empresas são divididas entre ``trabalhadores`` navegadores que trabalham ao mesmo
+    tempo e os resultados de todos são juntados na tabela. Ao passar para a próxima empresa, o
+    navegador continua logado e só troca de perfil (veja :func:`trocar_perfil`); ele só é devolvido
+    ao pool (limpo, deslogado) quando um erro de acesso ocorre ou o trabalhador termina, em vez de
+    ser fechado e aberto de novo. Na seleção por formulário, cada navegador pesquisa ``abas``
+    funcionários ao mesmo tempo com um login só (veja :func:`abrir_abas`).
+
+    Uma empresa que falha demais é estacionada e tentada de novo no fim, depois das outras, em vez
+    de prender um navegador em logins que nunca terminam (veja :mod:`src.webdriver.tentativas`).
+
     :param funcionarios: Registro de dados dos funcionários.
     :param tabela: Tabela de dados para ser preenchida.
     :param progress_values: Objeto para atualização do progresso.
-    :return: Nova planilha com dados mudados.
+    :param diario: Diário da planilha. Os CPFs que já estão nele não são raspados de novo e cada CPF
+        raspado é gravado nele.
+    :param cache: Cache de funcionários compartilhado entre planilhas. É consultado antes de acessar
+        o ESocial e cada funcionário raspado é gravado nele.
+    :param pool: Pool de navegadores compartilhado entre planilhas. Se não for especificado, um pool
+        é criado e fechado só para esta planilha. Deve ter pelo menos ``trabalhadores`` navegadores,
+        senão os trabalhadores a mais ficam esperando.
+    :param trabalhadores: Quantidade de empresas raspadas ao mesmo tempo.
+    :param abas: Quantidade de abas de cada navegador que pesquisam funcionários ao mesmo tempo
+        (veja :func:`abrir_abas`).
+    :return: Nova planilha com dados mudados e as estatísticas desta raspagem.
     """
-    progress_values.t.update_general_msg(progress_values, "Iniciando etapa de raspagem de dados...")
-    progress_values.cpf_max = len(funcionarios.CPF_lista)
-    progress_values.cpf_current = Int(0)
-    progress_values.cpf_last_updated_ns = time.time_ns()
-
-    for cpf, nome in funcionarios.CPF_lista:
-        with progress_values.get_lock():
-            progress_values.cpf_current += 1
-            progress_values.cpf_last_updated_ns = time.time_ns()
-            progress_values.t.set_string(progress_values.cpf_msg, STR_DUMMY)
-            progress_values.cpf_last_updated_ns = time.time_ns()
-
-        if driver:
-            # É necessário reiniciar o driver para cada CNPJ
-            driver.quit()
-        progress_values.t.update_general_msg(
-            progress_values, "Inicializando motor de busca e recolhimento"
+    progress_values_t.update_general_msg(progress_values, "Iniciando etapa de raspagem de dados...")
+    resultados = ResultadosRaspagem()
+    estatisticas = EstatisticasRaspagem()
+    # CPFs sem pontuação que não precisam mais ser raspados
+    cpfs_ja_vistos: Set[str] = set()
+    matriz_por_linha: Dict[Int, str] = {
+        registro.linha: CNPJ
+        for CNPJ, registros in funcionarios.CNPJ_CPFs.items()
+        for registro in registros
+    }
+
+    if diario:
+        for CPF, dados in diario.carregar().items():
+            for registro in funcionarios.buscar_cpf(CPF):
+                resultados.adicionar(registro.linha, dados)
+            cpfs_ja_vistos.add(CPF)
+    if cache:
+        for registro in funcionarios.CPF_lista:
+            CPF = apenas_digitos(registro.CPF)
+            if CPF in cpfs_ja_vistos or registro.linha not in matriz_por_linha:
+                continue
+            if dados := cache.buscar(matriz_por_linha[registro.linha], CPF):
+                for outro_registro in funcionarios.buscar_cpf(CPF):
+                    resultados.adicionar(outro_registro.linha, dados)
+                cpfs_ja_vistos.add(CPF)
+                estatisticas.do_cache = Int(estatisticas.do_cache + 1)
+    resultados.aplicar(tabela)
+
+    def registrar(registros: List[RegistroCPF], dados: DadosFuncionario) -> None:
+        CPF = apenas_digitos(registros[0].CPF)
+        cpfs_ja_vistos.add(CPF)
+        if diario:
+            diario.registrar(CPF, dados)
+        if cache:
+            for CNPJ in {matriz_por_linha.get(registro.linha) for registro in registros}:
+                if CNPJ:
+                    cache.guardar(CNPJ, CPF, dados)
+
+    # Cada CPF é raspado uma vez só por empresa, mesmo que apareça em várias linhas (vários
+    # contratos), e cada perfil de empresa é acessado uma vez só.
+    plano = planejar_raspagem(funcionarios, cpfs_ja_vistos)
+    total_cpfs = sum(len(empresa.funcionarios) for empresa in plano)
+    estatisticas.consultados = Int(total_cpfs)
+    with progress_values.get_lock():
+        progress_values.cnpj_max = len(plano)
+        progress_values.cnpj_max_last_updated_ns = time.time_ns()
+        progress_values.cnpj_current = 0
+        progress_values.cnpj_last_updated_ns = time.time_ns()
+        progress_values.cpf_max = total_cpfs
+        progress_values.cpf_max_last_updated_ns = time.time_ns()
+        progress_values.cpf_current = 0
+        progress_values_t.set_string(
+            progress_values.cpf_long_msg,
+            "{} CPFs únicos em {} linhas".format(total_cpfs, len(funcionarios.CPF_lista)),
         )
-        driver = inicializar_driver()
-        try:
-            progress_values.t.update_general_msg(
-                progress_values, "Acessando perfil da empresa utilizando o"
+        progress_values.cpf_last_updated_ns = time.time_ns()
+
+    progress_values_t.update_general_msg(
+        progress_values,
+        "Raspando {} empresas com {} navegadores".format(
+            len(plano), max(1, min(trabalhadores, len(plano)))
+        ),
+    )
+    pool_proprio = pool is None
+    pool = pool or PoolNavegadores(trabalhadores)
+    try:
+        _raspar_plano(
+            plano,
+            resultados,
+            tabela,
+            progress_values,
+            pool,
+            registrar,
+            trabalhadores,
+            abas,
+            estatisticas,
+        )
+    finally:
+        if pool_proprio:
+            pool.fechar()
+    resultados.aplicar(tabela)
+    return tabela, estatisticas
+
+
+_EventoRaspagem = NamedTuple(
+    "_EventoRaspagem",
+    [
+        (
+            "tipo",
+            Literal[
+                "empresa",
+                "funcionario",
+                "falha",
+                "estacionada",
+                "concluida",
+                "navegador",
+                "troca_perfil",
+                "fim",
+            ],
+        ),
+        ("empresa", RegistroCNPJ | None),
+        ("registros", List[RegistroCPF]),
+        ("dados", DadosFuncionario | None),
+        ("erro", BaseException | None),
+        ("medida", TempoInicializacao | TrocaPerfil | None),
+    ],
+)
+"""Mensagem de um trabalhador para a thread que coordena a raspagem. Em ``"funcionario"``, ``dados``
+é None quando o funcionário não foi encontrado na empresa. Em ``"estacionada"``, ``registros`` são
+os funcionários que faltaram raspar na empresa (veja :class:`DisjuntorEmpresa`). Em
+``"navegador"`` e ``"troca_perfil"``, ``medida`` é o tempo de abertura de um navegador novo ou de
+uma troca de perfil, para as estatísticas (veja :class:`EstatisticasRaspagem`)."""
+
+_ERROS_ACESSO = (ESocialDeslogadoError, ErroInternoSistema, TimeoutException)
+"""Erros depois dos quais o trabalhador devolve o navegador e tenta de novo com um login novo.
+Capturando TimeoutException para caso a página carregue tanto que exceda o tempo de espera para as
+operações de clicar e escrever, ou seja, se ela carregar de forma incompleta ou nem carregar."""
+
+
+def _raspar_plano(
+    plano: List[EmpresaPlanejada],
+    resultados: ResultadosRaspagem,
+    tabela: pd.DataFrame,
+    progress_values: progress_values_t,
+    pool: PoolNavegadores,
+    registrar: Callable[[List[RegistroCPF], DadosFuncionario], None],
+    trabalhadores: Int,
+    abas: Int,
+    estatisticas: EstatisticasRaspagem,
+) -> None:
+    """Distribui as empresas do plano entre os trabalhadores e junta os resultados.
+
+    Cada trabalhador é uma thread com o seu próprio navegador que pega a próxima empresa da fila e
+    raspa todos os funcionários dela. Só esta thread mexe nos resultados, no diário, no cache e no
+    progresso e nas estatísticas, então nada disso precisa ser thread-safe.
+
+    As empresas que os trabalhadores estacionaram por falharem demais são tentadas de novo, com os
+    funcionários que faltaram, depois que a fila acaba (veja :attr:`RODADAS_ESTACIONADAS`). As
+    empresas que falharam são registradas em ``estatisticas``.
+    """
+    empresas_iniciadas: Set[str] = set()
+    cpfs_processados = 0
+    falhas: Dict[str, Dict[str, Int]] = {}
+    estacionamentos: Dict[str, Int] = {}
+
+    def rodada(empresas_rodada: List[EmpresaPlanejada]) -> List[EmpresaPlanejada]:
+        nonlocal cpfs_processados
+        empresas: "queue.SimpleQueue[EmpresaPlanejada]" = queue.SimpleQueue()
+        for empresa in empresas_rodada:
+            empresas.put(empresa)
+        eventos: "queue.SimpleQueue[_EventoRaspagem]" = queue.SimpleQueue()
+        parar = threading.Event()
+        threads = [
+            threading.Thread(
+                target=_trabalhador,
+                args=(empresas, eventos, pool, parar, abas),
+                name="raspagem-{}".format(i),
+                daemon=True,
             )
-            carregar_pagina_ate_cpf_input(driver, cnpj)
-        except (ESocialDeslogadoError, TimeoutException):
-            # Capturando TimeoutException para caso a pagina carregue tanto
-            # que exceda o tempo de espera para as operações de clicar, escrever
-            # Ou seja, se a pagina carregar de forma incompleta ou nem carregar
-            # reinicia o processo de onde parou até conseguir.
-            continue
-
-        if Caminhos.ESocial.Lista.testar(driver):
-            progress_values.t.update_general_msg(
-                progress_values,
-                "Encontrada lista pré-definida de funcionários. Coletando"
+            for i in range(max(1, min(trabalhadores, len(empresas_rodada))))
+        ]
+        for thread in threads:
+            thread.start()
+
+        estacionadas: List[EmpresaPlanejada] = []
+        erro: BaseException | None = None
+        ativos = len(threads)
+        while ativos:
+            evento = eventos.get()
+            if evento.tipo == "empresa":
+                empresa = cast(RegistroCNPJ, evento.empresa)
+                if empresa.CNPJ not in empresas_iniciadas:
+                    empresas_iniciadas.add(empresa.CNPJ)
+                    _atualizar_cnpj(progress_values, Int(len(empresas_iniciadas)), empresa)
+            elif evento.tipo == "funcionario":
+                cpfs_processados += 1
+                _atualizar_cpf(progress_values, Int(cpfs_processados), evento.registros[0].CPF)
+                if evento.dados is not None:
+                    for registro in evento.registros:
+                        resultados.adicionar(registro.linha, evento.dados)
+                    registrar(evento.registros, evento.dados)
+            elif evento.tipo == "falha":
+                CNPJ = cast(RegistroCNPJ, evento.empresa).CNPJ
+                nome = type(evento.erro).__name__
+                contagem = falhas.setdefault(CNPJ, {})
+                contagem[nome] = Int(contagem.get(nome, 0) + 1)
+            elif evento.tipo == "navegador":
+                estatisticas.inicializacoes.append(cast(TempoInicializacao, evento.medida))
+            elif evento.tipo == "troca_perfil":
+                estatisticas.trocas_perfil.append(cast(TrocaPerfil, evento.medida))
+            elif evento.tipo in ("estacionada", "concluida"):
+                empresa = cast(RegistroCNPJ, evento.empresa)
+                if evento.tipo == "estacionada":
+                    estacionamentos[empresa.CNPJ] = Int(estacionamentos.get(empresa.CNPJ, 0) + 1)
+                    pendentes: Dict[str, List[RegistroCPF]] = {}
+                    for registro in evento.registros:
+                        pendentes.setdefault(apenas_digitos(registro.CPF), []).append(registro)
+                    estacionadas.append(EmpresaPlanejada(empresa, pendentes))
+                # checkpoint: os dados de cada empresa são escritos assim que ela termina
+                resultados.aplicar(tabela)
+            else:
+                ativos -= 1
+                if evento.erro is not None and erro is None:
+                    erro = evento.erro
+                    parar.set()
+
+        for thread in threads:
+            thread.join()
+        if erro is not None:
+            raise erro
+        return estacionadas
+
+    estacionadas = rodada(plano)
+    for _ in range(RODADAS_ESTACIONADAS):
+        if not estacionadas:
+            break
+        progress_values_t.update_general_msg(
+            progress_values,
+            "Tentando de novo {} empresas que falharam demais".format(len(estacionadas)),
+        )
+        estacionadas = rodada(estacionadas)
+
+    abandonadas = {
+        empresa.empresa.CNPJ: Int(len(empresa.funcionarios)) for empresa in estacionadas
+    }
+    for CNPJ, contagem in falhas.items():
+        if CNPJ in abandonadas:
+            resultado: Literal["concluida", "recuperada", "abandonada"] = "abandonada"
+        elif CNPJ in estacionamentos:
+            resultado = "recuperada"
+        else:
+            resultado = "concluida"
+        estatisticas.tentativas.append(
+            TentativasEmpresa(
+                CNPJ,
+                contagem,
+                estacionamentos.get(CNPJ, Int(0)),
+                resultado,
+                abandonadas.get(CNPJ, Int(0)),
             )
-            crawler = Caminhos.ESocial.Lista(driver)
-            with progress_values.get_lock():
-                progress_values.cpf_max = crawler.quantos
-                progress_values.cpf_current = Int(0)
-                progress_values.cpf_last_updated_ns = time.time_ns()
-                progress_values.t.set_string(progress_values.cpf_msg, STR_DUMMY)
-                progress_values.cpf_last_updated_ns = time.time_ns()
-
-            for cpf, nome in crawler.proximo_funcionario():
-                with progress_values.get_lock():
-                    progress_values.cpf_current += 1
-                    progress_values.cpf_last_updated_ns = time.time_ns()
-                    progress_values.t.set_string(progress_values.cpf_msg, STR_DUMMY)
-                    progress_values.cpf_last_updated_ns = time.time_ns()
-
-                generator = (r for r in funcionarios.CPF_lista if r.CPF == cpf)
-                for registro in generator:
-                    if registro.CPF in cpfs_ja_vistos:
-                        continue
-                    raspar_dados(tabela, registro, crawler)
-                    cpfs_ja_vistos.add(registro.CPF)
-
-            cnpj_loop.unlock()
-            with progress_values.get_lock():
-                progress_values.cpf_max = len(funcionarios.CPF_lista)
-                progress_values.cpf_current = Int(0)
-                progress_values.cpf_last_updated_ns = time.time_ns()
-                progress_values.t.set_string(progress_values.cpf_msg, STR_DUMMY)
-                progress_values.cpf_last_updated_ns = time.time_ns()
-
-        else: # assumir formulário
-            cpf_form_loop = LoopState(iter(range(cpf_index, len(funcionarios.CPF_lista))))
-            restart: bool = False
-            while True:
-                if restart:
-                    # Só reinicia o driver para o CPF caso um erro ocorra
-                    if driver:
-                        driver.quit()
-                    try:
-                        progress_values.t.update_general_msg(
-                            progress_values, "Inicializando motor de busca e recolhimento"
-                        )
-                        driver = inicializar_driver()
-                        progress_values.t.update_general_msg(
-                            progress_values, "Acessando perfil da empresa utilizando o"
-                        )
-                        carregar_pagina_ate_cpf_input(driver, cnpj)
-                    except (ESocialDeslogadoError, TimeoutException):
-                        continue
-
-                if not cpf_form_loop.locked:
-                    try:
-                        cpf_index = Int(next(cpf_form_loop.iterator()))
-                    except StopIteration:
-                        break
-                    with progress_values.get_lock():
-                        progress_values.cpf_current += 1
-                        progress_values.cpf_last_updated_ns = time.time_ns()
-                    cpf_form_loop.lock()
-
-                cnpj_registro = funcionarios.CNPJ_lista[cnpj_index]
-                with progress_values.get_lock():
-                    progress_values.cpf_current = cnpj_index
-                    progress_values.t.set_string(progress_values.cpf_msg, cnpj_registro.CPF)
-                    progress_values.cpf_last_updated_ns = time.time_ns()
-
-                cpf_registro = funcionarios.CPF_lista[cpf_index]
-                with progress_values.get_lock():
-                    progress_values.cpf_current = cpf_index
-                    progress_values.t.set_string(progress_values.cpf_msg, cpf_registro.CPF)
-                    progress_values.cpf_last_updated_ns = time.time_ns()
-
-                try:
-                    entrar_com_cpf(driver, cpf_registro.CPF)
-                    raspar_dados(tabela, cpf_registro, crawler)
-                    restart = False
-                except (FuncionarioNaoEncontradoError, TimeoutException):
-                    restart = True
-                    continue
+        )
 
-                cpf_form_loop.unlock()
 
-    return tabela
+def _trabalhador(
+    empresas: "queue.SimpleQueue[EmpresaPlanejada]",
+    eventos: "queue.SimpleQueue[_EventoRaspagem]",
+    pool: PoolNavegadores,
+    parar: threading.Event,
+    abas_por_navegador: Int,
+) -> None:
+    """Raspa empresas da fila até ela esvaziar, emprestando navegadores do pool.
 
+    Depois de um erro de acesso (veja :attr:`_ERROS_ACESSO`), o navegador é devolvido e o
+    trabalhador espera (veja :func:`~src.webdriver.tentativas.espera_exponencial`) antes de fazer um
+    login novo e continuar de onde parou.
+    Quando a empresa falha demais (veja :class:`DisjuntorEmpresa`), ela é estacionada com os
+    funcionários que faltaram e o trabalhador passa para a próxima.
+    """
 
-def apenas_digitos(texto: str) -> str:
-    """Remove todos os caracteres que não sao números de um texto."""
-    return "".join([s for s in texto if s in digits])
+    def enviar(
+        tipo: str,
+        empresa: RegistroCNPJ | None = None,
+        registros: List[RegistroCPF] | None = None,
+        dados: DadosFuncionario | None = None,
+        erro: BaseException | None = None,
+        medida: TempoInicializacao | TrocaPerfil | None = None,
+    ) -> None:
+        eventos.put(_EventoRaspagem(tipo, empresa, registros or [], dados, erro, medida))
+
+    driver: uc.Chrome | None = None
+    direta: SessaoDireta | None = None
+    # abas do navegador emprestado na pesquisa de funcionários (veja abrir_abas)
+    abas: List[str] | None = None
+    sessao = SessaoESocial()
+
+    def devolver() -> None:
+        nonlocal driver, direta, abas
+        abas = None
+        sessao.esquecer()
+        if direta:
+            direta.fechar()
+            direta = None
+        if driver:
+            pool.devolver(driver)
+            driver = None
 
+    try:
+        while not parar.is_set():
+            try:
+                empresa, pendentes = empresas.get_nowait()
+            except queue.Empty:
+                break
+            enviar("empresa", empresa)
+            pendentes = dict(pendentes)
+            if driver is not None:
+                # o navegador ainda está logado na empresa anterior: só troca o perfil
+                inicio = time.perf_counter()
+                try:
+                    trocar_perfil(driver, empresa.CNPJ)
+                    sessao.atualizar(driver)
+                except (*_ERROS_ACESSO, WebDriverException):
+                    # login completo com um navegador limpo
+                    devolver()
+                    sucesso = False
+                else:
+                    abas = None
+                    if direta:
+                        direta.fechar()
+                        direta = SessaoDireta.do_driver(driver)
+                    sucesso = True
+                troca = TrocaPerfil(empresa.CNPJ, Float(time.perf_counter() - inicio), sucesso)
+                enviar("troca_perfil", medida=troca)
+            # CPFs que o modo direto não conseguiu buscar
+            somente_dom: Set[str] = set()
+            disjuntor = DisjuntorEmpresa()
+            estacionada = False
+
+            while pendentes and not parar.is_set():
+                etapa = "login"
+                try:
+                    if driver is None:
+                        inicializacoes: List[TempoInicializacao] = []
+                        driver = pool.emprestar(inicializacoes)
+                        for tempo in inicializacoes:
+                            enviar("navegador", medida=tempo)
+                        carregar_pagina_ate_cpf_input(driver, empresa.CNPJ)
+                        disjuntor.sucesso(etapa)
+                        pool.registrar_login(driver)
+                        sessao.atualizar(driver)
+                        if MODO_DIRETO:
+                            direta = SessaoDireta.do_driver(driver)
+                    elif sessao.precisa_renovar():
+                        # entre um funcionário e outro, antes que a sessão acabe no meio de um
+                        try:
+                            with metricas.etapa("renovar_sessao"):
+                                trocar_perfil(driver, empresa.CNPJ)
+                                renovada = sessao.renovada(driver)
+                        except (ESocialDeslogadoError, TimeoutException):
+                            renovada = False
+                        if not renovada:
+                            # a sessão não pode ser estendida: login novo agora, com tudo parado
+                            devolver()
+                            continue
+                        abas = None
+                        if direta:
+                            direta.fechar()
+                            direta = SessaoDireta.do_driver(driver)
+
+                    etapa = "funcionarios"
+                    if Caminhos.ESocial.Lista.testar(driver):
+                        with metricas.etapa("lista"):
+                            crawler = Caminhos.ESocial.Lista(driver)
+                            for cpf, _ in crawler.proximo_funcionario():
+                                registros = pendentes.pop(apenas_digitos(cpf), None)
+                                if registros is None:
+                                    continue
+                                disjuntor.sucesso(etapa)
+                                enviar(
+                                    "funcionario", registros=registros, dados=_ler_dados(crawler)
+                                )
+                        # quem não está na lista não foi encontrado nesta empresa
+                        for registros in pendentes.values():
+                            enviar("funcionario", registros=registros)
+                        pendentes.clear()
+                        break
 
-STR_DUMMY = "Processando..."
+                    if direta and direta.aprendida:
+                        lote = [CPF for CPF in pendentes if CPF not in somente_dom]
+                        if lote:
+                            with metricas.etapa("modo_direto"):
+                                buscados = direta.buscar_varios(lote[: DIRETO_CONEXOES * 4])
+                            for CPF, dados in buscados.items():
+                                if dados is None:
+                                    somente_dom.add(CPF)
+                                else:
+                                    disjuntor.sucesso(etapa)
+                                    enviar("funcionario", registros=pendentes.pop(CPF), dados=dados)
+                            continue
+
+                    if abas is None:
+                        abas = abrir_abas(driver, abas_por_navegador)
+                    # os que o modo direto não conseguiu buscar vão primeiro, para aprender com eles
+                    fila = sorted(pendentes, key=lambda CPF: CPF not in somente_dom)
+                    aprendendo = direta is not None and not direta.aprendida
+                    for CPF, dados in _raspar_em_abas(
+                        driver, abas, [(CPF, pendentes[CPF][0].CPF) for CPF in fila]
+                    ):
+                        disjuntor.sucesso(etapa)
+                        # dados None: funcionário não existe nesta empresa
+                        if dados and direta and not direta.completa:
+                            direta.aprender(driver, CPF, dados)
+                        enviar("funcionario", registros=pendentes.pop(CPF), dados=dados)
+                        if aprendendo and direta and direta.aprendida:
+                            # o resto vai pelo modo direto
+                            break
+                        if sessao.precisa_renovar():
+                            break
+                except _ERROS_ACESSO as e:
+                    # reinicia o acesso e tenta os CPFs que faltaram de novo, se ainda valer a pena
+                    devolver()
+                    enviar("falha", empresa, erro=e)
+                    if (espera := disjuntor.falhou(etapa, e)) is None:
+                        registros = [r for registros in pendentes.values() for r in registros]
+                        enviar("estacionada", empresa, registros=registros)
+                        estacionada = True
+                        break
+                    parar.wait(espera)
 
+            if not estacionada:
+                enviar("concluida", empresa)
+    except BaseException as e:
+        enviar("fim", erro=e)
+    else:
+        enviar("fim")
+    finally:
+        devolver()
@@ -0,0 +1,138 @@
+"""Cache persistente dos dados de funcionários, compartilhado entre planilhas, para evitar consultar
+no ESocial funcionários que foram raspados recentemente."""
+
+import sqlite3
+import time
+
+import pandas as pd
+
+from src.webdriver.planilha import DadosFuncionario, apenas_digitos
+from src.webdriver.types import CelulaVazia
+from src.local.types import Int
+
+__all__ = ["CACHE_MAX_ENTRADAS", "CACHE_TTL_SECS", "CacheFuncionarios"]
+
+CACHE_TTL_SECS = Int(3 * 24 * 60 * 60)
+"""Segundos que os dados de um funcionário continuam válidos depois de raspados."""
+CACHE_MAX_ENTRADAS = Int(200_000)
+"""Quantidade máxima de funcionários no cache antes dos menos usados serem descartados."""
+
+
+class CacheFuncionarios:
+    """Cache LRU com prazo de validade, em SQLite, dos dados raspados de cada funcionário.
+
+    A chave é o CNPJ da matriz mais o CPF (ambos sem pontuação), já que o mesmo CPF pode ter dados
+    diferentes em empresas diferentes. Os contadores :attr:`acertos` e :attr:`falhas` medem quantas
+    consultas ao ESocial o cache evitou.
+
+    :param caminho: Caminho do arquivo do banco de dados.
+    :param ttl: Segundos que cada entrada continua válida depois de gravada.
+    :param max_entradas: Quantidade máxima de entradas; as acessadas há mais tempo são descartadas.
+    """
+
+    def __init__(
+        self, caminho: str, ttl: Int = CACHE_TTL_SECS, max_entradas: Int = CACHE_MAX_ENTRADAS
+    ) -> None:
+        self.ttl_ns = ttl * 1_000_000_000
+        self.max_entradas = max_entradas
+        self.acertos = Int(0)
+        self.falhas = Int(0)
+        self.conexao = sqlite3.connect(caminho, isolation_level=None)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.execute(
+            """
+            CREATE TABLE IF NOT EXISTS funcionarios (
+                cnpj TEXT NOT NULL,
+                cpf TEXT NOT NULL,
+                situacao TEXT,
+                admissao TEXT,
+                nascimento TEXT,
+                matricula TEXT,
+                demissao TEXT,
+                gravado_ns INTEGER NOT NULL,
+                acessado_ns INTEGER NOT NULL,
+                PRIMARY KEY (cnpj, cpf)
+            )
+            """
+        )
+        self.conexao.execute(
+            "CREATE INDEX IF NOT EXISTS funcionarios_acessado ON funcionarios (acessado_ns)"
+        )
+        self._entradas = Int(self.conexao.execute("SELECT COUNT(*) FROM funcionarios").fetchone()[0])
+
+    def buscar(self, CNPJ: str, CPF: str) -> DadosFuncionario | None:
+        """Retorna os dados do funcionário se estiverem no cache e dentro do prazo de validade.
+
+        :param CNPJ: CNPJ da matriz com ou sem pontuação.
+        :param CPF: CPF do funcionário com ou sem pontuação.
+        :return: Dados do funcionário ou None se não estiverem no cache.
+        """
+        chave = (apenas_digitos(CNPJ), apenas_digitos(CPF))
+        agora = time.time_ns()
+        linha = self.conexao.execute(
+            """
+            SELECT situacao, admissao, nascimento, matricula, demissao, gravado_ns
+            FROM funcionarios WHERE cnpj = ? AND cpf = ?
+            """,
+            chave,
+        ).fetchone()
+
+        if linha is None:
+            self.falhas = Int(self.falhas + 1)
+            return None
+        *valores, gravado_ns = linha
+        if agora - gravado_ns > self.ttl_ns:
+            self.conexao.execute("DELETE FROM funcionarios WHERE cnpj = ? AND cpf = ?", chave)
+            self._entradas = Int(self._entradas - 1)
+            self.falhas = Int(self.falhas + 1)
+            return None
+
+        self.conexao.execute(
+            "UPDATE funcionarios SET acessado_ns = ? WHERE cnpj = ? AND cpf = ?", (agora, *chave)
+        )
+        self.acertos = Int(self.acertos + 1)
+        return DadosFuncionario(*(CelulaVazia if valor is None else valor for valor in valores))
+
+    def guardar(self, CNPJ: str, CPF: str, dados: DadosFuncionario) -> None:
+        """Grava os dados do funcionário, descartando as entradas menos usadas se o cache estiver
+        cheio.
+
+        :param CNPJ: CNPJ da matriz com ou sem pontuação.
+        :param CPF: CPF do funcionário com ou sem pontuação.
+        :param dados: Dados raspados do funcionário.
+        """
+        chave = (apenas_digitos(CNPJ), apenas_digitos(CPF))
+        agora = time.time_ns()
+        existia = self.conexao.execute(
+            "SELECT 1 FROM funcionarios WHERE cnpj = ? AND cpf = ?", chave
+        ).fetchone()
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO funcionarios VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (*chave, *(None if pd.isna(valor) else str(valor) for valor in dados), agora, agora),
+        )
+        if existia is None:
+            self._entradas = Int(self._entradas + 1)
+        if self._entradas > self.max_entradas:
+            self._descartar_menos_usados()
+
+    def _descartar_menos_usados(self) -> None:
+        # Outros processos podem usar o mesmo banco, então a contagem real é refeita aqui.
+        self.conexao.execute(
+            """
+            DELETE FROM funcionarios WHERE rowid IN (
+                SELECT rowid FROM funcionarios ORDER BY acessado_ns DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entradas,),
+        )
+        self._entradas = Int(self.conexao.execute("SELECT COUNT(*) FROM funcionarios").fetchone()[0])
+
+    def zerar_estatisticas(self) -> None:
+        """Zera os contadores de acertos e falhas."""
+        self.acertos = Int(0)
+        self.falhas = Int(0)
+
+    def fechar(self) -> None:
+        """Fecha a conexão com o banco de dados."""
+        self.conexao.close()
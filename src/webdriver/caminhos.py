@@ -7,13 +7,13 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 from undetected_chromedriver import Chrome
 from unidecode import unidecode
-from typing import List, Generator
+from typing import Any, Dict, List, Generator, Tuple
 
 from src.webdriver.types import SeletorHTML
 from src.local.types import Int
-from src.utils.selenium import esperar_estar_presente
+from src.utils.selenium import esperar_estar_presente, esperar_textos_mudarem
 
-__all__ = ["Caminhos", "DadoNaoEncontrado", "FuncionarioCrawlerBase"]
+__all__ = ["Caminhos", "DadoNaoEncontrado", "FuncionarioCrawlerBase", "nomear_seletores"]
 
 
 class DadoNaoEncontrado(Exception):
@@ -30,17 +30,33 @@ class FuncionarioCrawlerBase:
 
     _rotulos_seletor: SeletorHTML
     _valores_seletor: SeletorHTML
+    _padroes: Tuple[str, ...] = ("situacao", "nascimento", "desligamento", "admissao", "matricula")
+    """Padrões das propriedades de dados, já procurados nos rótulos durante a inicialização."""
 
     def __init__(self, driver: Chrome) -> None:
-        esperar_estar_presente(driver, self._rotulos_seletor)
-        esperar_estar_presente(driver, self._valores_seletor)
-        self.rotulos: List[str] = [
-            elem.text for elem in driver.find_elements(*self._rotulos_seletor)
-        ]
+        # espera os rótulos e valores aparecerem e os lê numa chamada só ao webdriver
+        self._carregar(
+            *esperar_textos_mudarem(driver, None, self._rotulos_seletor, self._valores_seletor)
+        )
+
+    def _carregar(self, rotulos: List[str], valores: List[str]) -> None:
+        """Guarda os rótulos e valores lidos da página e procura os padrões das propriedades."""
+        self.rotulos = rotulos
+        self.valores = valores
         self.rotulos_normalizado: List[str] = [unidecode(rotulo).lower() for rotulo in self.rotulos]
-        self.valores: List[str] = [
-            elem.text for elem in driver.find_elements(*self._valores_seletor)
-        ]
+        self._dados: Dict[str, str] = {}
+        for padrao in self._padroes:
+            try:
+                self._dados[padrao] = self._procurar_dado(padrao)
+            except DadoNaoEncontrado:
+                pass
+
+    def _procurar_dado(self, padrao: str) -> str:
+        for i in range(min(len(self.rotulos), len(self.valores))):
+            # for loop é aceitável pq a quantidade de itens é bem pequena
+            if padrao in self.rotulos_normalizado[i] or padrao in self.rotulos[i]:
+                return self.valores[i]
+        raise DadoNaoEncontrado(padrao)
 
     def _get_dado(self, padrao: str) -> str:
         """Se o rotulo contém o padrão especificado, retorne seu valor.
@@ -48,11 +64,11 @@ class FuncionarioCrawlerBase:
         :param padrao: Versão em minusculo e sem acento do texto ou o texto exato.
         :raises DadoNaoEncontrado: Caso o padrão não tenha sido encontrado em nenhum rótulo.
         """
-        for i in range(len(self.rotulos)):
-            # for loop é aceitável pq a quantidade de itens é bem pequena
-            if padrao in self.rotulos_normalizado[i] or padrao in self.rotulos[i]:
-                return self.valores[i]
-        raise DadoNaoEncontrado(padrao)
+        if padrao in self._dados:
+            return self._dados[padrao]
+        if padrao in self._padroes:
+            raise DadoNaoEncontrado(padrao)
+        return self._procurar_dado(padrao)
 
     @property
     def SITUACAO(self) -> str:
@@ -145,14 +161,9 @@ class Caminhos:
                 By.CSS_SELECTOR,
                 "#div-gestao-trabalhadores fieldset:first-child .MuiGrid-item",
             )
-            _cpfs_nomes_seletor: SeletorHTML = (
-                By.CSS_SELECTOR,
-                "#div-gestao-trabalhadores fieldset:first-child .MuiGrid-item .MuiCardContent-root p:first-child",
-            )
-            _cpfs_seletor: SeletorHTML = (
-                By.CSS_SELECTOR,
-                "#div-gestao-trabalhadores fieldset:first-child .MuiGrid-item .MuiCardContent-root p:last-child",
-            )
+            # relativos a cada elemento de _clicaveis_seletor
+            _nome_no_cartao = ".MuiCardContent-root p:first-child"
+            _cpf_no_cartao = ".MuiCardContent-root p:last-child"
             _rotulos_seletor: SeletorHTML = (
                 By.CSS_SELECTOR,
                 "div[role=tabpanel] ul li .MuiListItemText-primary",
@@ -161,26 +172,45 @@ class Caminhos:
                 By.CSS_SELECTOR,
                 "div[role=tabpanel] ul li .MuiListItemText-secondary",
             )
+            _script_cartoes = """
+            const [clicaveis, nome, cpf] = arguments;
+            const texto = (cartao, seletor) =>
+                (cartao.querySelector(seletor)?.innerText ?? "").trim();
+            return Array.from(document.querySelectorAll(clicaveis)).map((cartao) => [
+                cartao,
+                texto(cartao, cpf),
+                texto(cartao, nome),
+            ]);
+            """
 
             def __init__(self, driver: Chrome) -> None:  # pylint: disable=super-init-not-called
                 esperar_estar_presente(driver, self._clicaveis_seletor)
-                esperar_estar_presente(driver, self._cpfs_seletor)
-                esperar_estar_presente(driver, self._cpfs_nomes_seletor)
                 self.driver = driver
-                self.clicaveis: List[WebElement] = driver.find_elements(*self._clicaveis_seletor)
+                # cartões, CPFs e nomes numa chamada só ao webdriver
+                cartoes: List[List[Any]] = driver.execute_script(
+                    self._script_cartoes,
+                    self._clicaveis_seletor[1],
+                    self._nome_no_cartao,
+                    self._cpf_no_cartao,
+                )
+                self.clicaveis: List[WebElement] = [cartao[0] for cartao in cartoes]
                 self.quantos = Int(len(self.clicaveis))
-                self.cpfs: List[str] = [
-                    elem.text for elem in driver.find_elements(*self._cpfs_seletor)
-                ]
-                self.cpfs_nomes: List[str] = [
-                    elem.text for elem in driver.find_elements(*self._cpfs_nomes_seletor)
-                ]
-
-            def proximo_funcionario(self) -> Generator[str, None, None]:
-                """Toda vez que é executado prepara o objeto com os dados do próximo funcionário."""
+                self.cpfs: List[str] = [cartao[1] for cartao in cartoes]
+                self.cpfs_nomes: List[str] = [cartao[2] for cartao in cartoes]
+
+            def proximo_funcionario(self) -> Generator[Tuple[str, str], None, None]:
+                """Toda vez que é executado prepara o objeto com os dados do próximo funcionário.
+
+                Depois de cada clique, espera o painel de dados mostrar textos diferentes dos do
+                funcionário anterior e já os lê na mesma chamada ao webdriver.
+                """
+                anteriores: List[List[str]] | None = None
                 for i in range(self.quantos):
                     self.clicaveis[i].click()
-                    super().__init__(self.driver)
+                    anteriores = esperar_textos_mudarem(
+                        self.driver, anteriores, self._rotulos_seletor, self._valores_seletor
+                    )
+                    self._carregar(*anteriores)
                     yield self.cpfs[i], self.cpfs_nomes[i]
 
             @classmethod
@@ -195,3 +225,25 @@ class Caminhos:
                     return True
                 else:
                     return False
+
+
+def nomear_seletores(classe: type = Caminhos, prefixo: str = "") -> Dict[SeletorHTML, str]:
+    """Dá um nome legível a cada seletor de :class:`Caminhos`, como ``"ESocial.CNPJ_INPUT"``, para
+    os relatórios de :mod:`src.utils.metricas`.
+
+    :param classe: Classe onde os seletores são procurados, junto com as suas classes internas.
+    :param prefixo: Prefixo dos nomes.
+    :return: Dicionário do seletor para o seu nome. Seletores repetidos ficam com o primeiro nome.
+    """
+    nomes: Dict[SeletorHTML, str] = {}
+    for nome, valor in vars(classe).items():
+        if isinstance(valor, type) and valor.__qualname__.startswith(classe.__qualname__ + "."):
+            for seletor, nome_interno in nomear_seletores(valor, prefixo + nome + ".").items():
+                nomes.setdefault(seletor, nome_interno)
+        elif (
+            isinstance(valor, tuple)
+            and len(valor) == 2
+            and all(isinstance(parte, str) for parte in valor)
+        ):
+            nomes.setdefault(valor, prefixo + nome)
+    return nomes
@@ -0,0 +1,105 @@
+"""Diário persistente dos funcionários já raspados, para que uma planilha interrompida no meio do
+processamento possa continuar de onde parou."""
+
+import hashlib
+import sqlite3
+import time
+from typing import Dict
+
+import pandas as pd
+
+from src.webdriver.planilha import DadosFuncionario, apenas_digitos
+from src.webdriver.types import CelulaVazia
+
+__all__ = ["DiarioRaspagem", "hash_arquivo"]
+
+
+def hash_arquivo(caminho: str) -> str:
+    """Calcula o hash SHA-256 do conteúdo do arquivo.
+
+    :param caminho: Caminho do arquivo.
+    :return: Hash em hexadecimal.
+    """
+    h = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        while bloco := arquivo.read(1024 * 1024):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class DiarioRaspagem:
+    """Diário append-only, em SQLite no modo WAL, dos dados raspados de cada CPF de uma planilha.
+
+    Cada registro é gravado assim que o funcionário é raspado, então se o processo ou o navegador
+    morrer no meio da planilha, os funcionários já raspados não precisam ser raspados de novo. Com
+    ``synchronous=NORMAL`` no modo WAL, os commits não esperam o disco: eles sobrevivem ao fim do
+    processo, mas os últimos podem se perder numa queda de energia ou do sistema operacional, e
+    esses funcionários são raspados de novo. A chave é o hash do conteúdo da planilha mais o CPF sem
+    pontuação, portanto mudar a planilha invalida o diário dela.
+
+    :param caminho: Caminho do arquivo do banco de dados.
+    :param planilha: Hash da planilha sendo processada (veja :func:`hash_arquivo`).
+    """
+
+    def __init__(self, caminho: str, planilha: str) -> None:
+        self.planilha = planilha
+        self.conexao = sqlite3.connect(caminho, isolation_level=None)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.execute(
+            """
+            CREATE TABLE IF NOT EXISTS raspagens (
+                planilha TEXT NOT NULL,
+                cpf TEXT NOT NULL,
+                situacao TEXT,
+                admissao TEXT,
+                nascimento TEXT,
+                matricula TEXT,
+                demissao TEXT,
+                registrado_ns INTEGER NOT NULL,
+                PRIMARY KEY (planilha, cpf)
+            )
+            """
+        )
+
+    def registrar(self, CPF: str, dados: DadosFuncionario) -> None:
+        """Grava os dados raspados de um funcionário.
+
+        :param CPF: CPF do funcionário com ou sem pontuação.
+        :param dados: Dados raspados do funcionário.
+        """
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO raspagens VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.planilha,
+                apenas_digitos(CPF),
+                *(None if pd.isna(valor) else str(valor) for valor in dados),
+                time.time_ns(),
+            ),
+        )
+
+    def carregar(self) -> Dict[str, DadosFuncionario]:
+        """Retorna todos os funcionários já raspados desta planilha.
+
+        :return: Dicionário onde as chaves são CPFs sem pontuação e os valores são os dados
+            raspados.
+        """
+        cursor = self.conexao.execute(
+            """
+            SELECT cpf, situacao, admissao, nascimento, matricula, demissao
+            FROM raspagens WHERE planilha = ?
+            """,
+            (self.planilha,),
+        )
+        return {
+            cpf: DadosFuncionario(*(CelulaVazia if valor is None else valor for valor in valores))
+            for cpf, *valores in cursor
+        }
+
+    def descartar(self) -> None:
+        """Apaga o diário desta planilha; usado quando ela foi processada por completo."""
+        self.conexao.execute("DELETE FROM raspagens WHERE planilha = ?", (self.planilha,))
+
+    def fechar(self) -> None:
+        """Fecha a conexão com o banco de dados."""
+        self.conexao.close()
@@ -0,0 +1,247 @@
+"""Modo direto: busca os dados dos funcionários nas mesmas requisições XHR que a página
+``gestaoTrabalhadores`` faz, usando a sessão autenticada do navegador, sem renderizar a página de
+cada funcionário.
+
+O ESocial não documenta essas requisições, então nada é fixo no código: o endereço e onde cada dado
+fica na resposta são aprendidos comparando a resposta com os dados que o raspador do DOM leu do
+mesmo funcionário (veja :meth:`SessaoDireta.aprender`). Qualquer diferença faz o chamador voltar
+para o raspador do DOM.
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+import undetected_chromedriver as uc
+from unidecode import unidecode
+
+from src.webdriver.planilha import DadosFuncionario, apenas_digitos
+from src.webdriver.types import CelulaVazia
+from src.local.types import Float, Int
+
+__all__ = ["DIRETO_CONEXOES", "DIRETO_TIMEOUT_SECS", "MODO_DIRETO", "SessaoDireta"]
+
+MODO_DIRETO = False
+"""Se o modo direto deve ser tentado. Enquanto ele não é aprendido, ou quando ele falha, os dados
+são raspados do DOM normalmente."""
+DIRETO_CONEXOES = Int(8)
+"""Quantidade de requisições simultâneas (e conexões mantidas abertas) do modo direto."""
+DIRETO_TIMEOUT_SECS = Float(20.0)
+"""Segundos para esperar cada resposta do modo direto."""
+
+Caminho = Tuple[str | int, ...]
+"""Sequência de chaves e índices até um valor dentro de uma resposta JSON."""
+
+_MARCADOR_CPF = "{cpf}"
+_REGEX_DATA_ISO = re.compile(r"(\d{4})-(\d{2})-(\d{2})(?:[T ].*)?\Z")
+
+_SCRIPT_REQUISICOES = """
+return performance.getEntriesByType("resource")
+    .filter((r) => r.initiatorType === "xmlhttprequest" || r.initiatorType === "fetch")
+    .map((r) => r.name);
+"""
+"""Script que retorna os endereços de todas as requisições XHR/fetch feitas pela página."""
+
+
+def _converter(valor: Any) -> str:
+    """Converte um valor da resposta para o formato em que ele aparece na página."""
+    texto = str(valor).strip()
+    if data := _REGEX_DATA_ISO.match(texto):
+        ano, mes, dia = data.groups()
+        return f"{dia}/{mes}/{ano}"
+    return texto
+
+
+def _normalizar(texto: str) -> str:
+    return unidecode(texto).strip().lower()
+
+
+def _folhas(dados: Any, caminho: Caminho = ()) -> Iterable[Tuple[Caminho, Any]]:
+    """Percorre todos os valores simples de uma resposta JSON junto com os seus caminhos."""
+    if isinstance(dados, dict):
+        for chave, valor in dados.items():
+            yield from _folhas(valor, (*caminho, chave))
+    elif isinstance(dados, list):
+        for indice, valor in enumerate(dados):
+            yield from _folhas(valor, (*caminho, indice))
+    elif dados is not None:
+        yield caminho, dados
+
+
+def _seguir(dados: Any, caminho: Caminho) -> Any:
+    for passo in caminho:
+        dados = dados[passo]
+    return dados
+
+
+class SessaoDireta:
+    """Cliente HTTP com os cookies e cabeçalhos da sessão autenticada de um navegador.
+
+    As conexões são mantidas abertas entre requisições e :meth:`buscar_varios` faz até
+    ``conexoes`` requisições ao mesmo tempo.
+
+    :param cookies: Cookies no formato de
+        :meth:`selenium.webdriver.remote.webdriver.WebDriver.get_cookies`.
+    :param cabecalhos: Cabeçalhos enviados em todas as requisições.
+    :param conexoes: Quantidade de requisições simultâneas.
+    :param timeout: Segundos para esperar cada resposta.
+    """
+
+    def __init__(
+        self,
+        cookies: List[Dict[str, Any]],
+        cabecalhos: Dict[str, str],
+        conexoes: Int = DIRETO_CONEXOES,
+        timeout: Float = DIRETO_TIMEOUT_SECS,
+    ) -> None:
+        self.conexoes = conexoes
+        self.timeout = timeout
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=conexoes, pool_maxsize=conexoes)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+        self.sessao.headers.update(cabecalhos)
+        for cookie in cookies:
+            self.sessao.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+            )
+        self.url: str | None = None
+        self.caminhos: Dict[str, Caminho] = {}
+        # Enquanto o caminho da demissão não é conhecido, só funcionários com a mesma situação de um
+        # funcionário aprendido sem demissão podem ser buscados direto.
+        self.situacoes_sem_demissao: Set[str] = set()
+
+    @classmethod
+    def do_driver(cls, driver: uc.Chrome, **kwargs: Any) -> "SessaoDireta":
+        """Cria a sessão com os cookies e cabeçalhos do navegador, depois de :func:`acessar_perfil`.
+
+        :param driver: Webdriver com a sessão autenticada.
+        """
+        cabecalhos = {
+            "User-Agent": driver.execute_script("return navigator.userAgent"),
+            "Referer": driver.current_url,
+            "Accept": "application/json",
+        }
+        return cls(driver.get_cookies(), cabecalhos, **kwargs)
+
+    @property
+    def aprendida(self) -> bool:
+        """Se o endereço e os caminhos dos dados já foram aprendidos."""
+        return self.url is not None
+
+    @property
+    def completa(self) -> bool:
+        """Se o caminho da demissão também já foi aprendido. Até lá, vale a pena continuar
+        chamando :meth:`aprender` com os funcionários raspados do DOM."""
+        return "DEMISSAO" in self.caminhos
+
+    def aprender(self, driver: uc.Chrome, CPF: str, dados: DadosFuncionario) -> bool:
+        """Tenta aprender o modo direto a partir do funcionário que acabou de ser raspado do DOM.
+
+        Procura, entre as requisições XHR que a página fez, uma que tenha o CPF no endereço e cuja
+        resposta contenha todos os dados raspados.
+
+        :param driver: Webdriver na página de dados do funcionário.
+        :param CPF: CPF do funcionário com ou sem pontuação.
+        :param dados: Dados raspados do DOM para o mesmo funcionário.
+        :return: Se o modo direto foi aprendido.
+        """
+        return self.aprender_de_urls(driver.execute_script(_SCRIPT_REQUISICOES), CPF, dados)
+
+    def aprender_de_urls(self, urls: Iterable[str], CPF: str, dados: DadosFuncionario) -> bool:
+        """Mesmo que :meth:`aprender`, mas com os endereços candidatos já conhecidos.
+
+        :param urls: Endereços das requisições feitas pela página.
+        :param CPF: CPF do funcionário com ou sem pontuação.
+        :param dados: Dados raspados do DOM para o mesmo funcionário.
+        :return: Se o modo direto foi aprendido.
+        """
+        digitos = apenas_digitos(CPF)
+        for url in urls:
+            if digitos not in url:
+                continue
+            try:
+                resposta = self._pegar(url)
+            except (requests.RequestException, ValueError):
+                continue
+            if (caminhos := self._caminhos_dos_dados(resposta, dados)) is not None:
+                self.url = url.replace(digitos, _MARCADOR_CPF)
+                self.caminhos = caminhos
+                if "DEMISSAO" not in caminhos:
+                    self.situacoes_sem_demissao.add(_normalizar(dados.SITUACAO))
+                return True
+        return False
+
+    def buscar(self, CPF: str) -> DadosFuncionario | None:
+        """Busca os dados do funcionário direto no servidor.
+
+        :param CPF: CPF do funcionário com ou sem pontuação.
+        :return: Dados do funcionário no mesmo formato do raspador do DOM ou None se o modo
+            direto não foi aprendido ou a resposta não tem o formato aprendido.
+        """
+        if self.url is None:
+            return None
+        try:
+            resposta = self._pegar(self.url.replace(_MARCADOR_CPF, apenas_digitos(CPF)))
+        except (requests.RequestException, ValueError):
+            return None
+
+        valores: Dict[str, Any] = {}
+        for campo in DadosFuncionario._fields:
+            if campo not in self.caminhos:
+                valores[campo] = CelulaVazia
+                continue
+            try:
+                valor = _seguir(resposta, self.caminhos[campo])
+            except (KeyError, IndexError, TypeError):
+                return None
+            valores[campo] = CelulaVazia if valor in (None, "") else _converter(valor)
+        if any(valores[campo] is CelulaVazia for campo in DadosFuncionario._fields[:-1]):
+            return None
+        if not self.completa and _normalizar(valores["SITUACAO"]) not in self.situacoes_sem_demissao:
+            # pode ter uma demissão que não sabemos onde fica
+            return None
+        return DadosFuncionario(**valores)
+
+    def buscar_varios(self, CPFs: Iterable[str]) -> Dict[str, DadosFuncionario | None]:
+        """Busca vários funcionários ao mesmo tempo, veja :meth:`buscar`.
+
+        :param CPFs: CPFs dos funcionários com ou sem pontuação.
+        :return: Dicionário onde as chaves são os CPFs como foram passados.
+        """
+        CPFs = list(CPFs)
+        with ThreadPoolExecutor(max_workers=self.conexoes) as executor:
+            return dict(zip(CPFs, executor.map(self.buscar, CPFs)))
+
+    def fechar(self) -> None:
+        """Fecha as conexões abertas."""
+        self.sessao.close()
+
+    def _pegar(self, url: str) -> Any:
+        resposta = self.sessao.get(url, timeout=self.timeout)
+        resposta.raise_for_status()
+        return resposta.json()
+
+    @staticmethod
+    def _caminhos_dos_dados(resposta: Any, dados: DadosFuncionario) -> Dict[str, Caminho] | None:
+        """Encontra o caminho de cada dado raspado dentro da resposta ou None se faltar algum."""
+        folhas = [(caminho, _normalizar(_converter(valor))) for caminho, valor in _folhas(resposta)]
+        caminhos: Dict[str, Caminho] = {}
+        for campo, valor in zip(DadosFuncionario._fields, dados):
+            if not isinstance(valor, str):
+                # demissão vazia: não dá para saber onde ela fica
+                continue
+            alvo = _normalizar(valor)
+            candidatos = [caminho for caminho, folha in folhas if folha == alvo]
+            if not candidatos:
+                return None
+            # datas iguais (admissão e nascimento, por exemplo) são desempatadas pelo nome da chave
+            caminhos[campo] = next(
+                (c for c in candidatos if campo.lower() in _normalizar(str(c[-1]))), candidatos[0]
+            )
+        return caminhos
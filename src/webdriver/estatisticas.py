@@ -0,0 +1,74 @@
+"""Estatísticas de uma raspagem (veja :func:`~src.webdriver.acesso.processar_planilha`) e o resumo
+mostrado ao fim de cada planilha."""
+
+from dataclasses import dataclass, field
+from typing import List, NamedTuple
+
+from src.utils.acesso import TempoInicializacao
+from src.webdriver.tentativas import TentativasEmpresa
+from src.local.types import Float, Int
+
+__all__ = ["EstatisticasRaspagem", "TrocaPerfil"]
+
+TrocaPerfil = NamedTuple("TrocaPerfil", [("CNPJ", str), ("segundos", Float), ("sucesso", bool)])
+"""Tentativa de trocar de empresa sem um novo login (veja
+:func:`~src.webdriver.acesso.trocar_perfil`). Quando ``sucesso`` é falso, um login completo foi
+feito em seguida."""
+
+
+@dataclass(init=True)
+class EstatisticasRaspagem:
+    """Estatísticas de uma chamada de :func:`~src.webdriver.acesso.processar_planilha`.
+
+    Só a thread que coordena a raspagem as preenche; os trabalhadores mandam o que mediram para ela
+    junto com os resultados. Assim cada planilha tem as suas, mesmo que o pool de navegadores e o
+    cache sejam compartilhados.
+
+    :param do_cache: CPFs cujos dados vieram do cache de funcionários.
+    :param consultados: CPFs que precisaram ser raspados do ESocial.
+    :param inicializacoes: Tempos de cada navegador aberto durante a raspagem.
+    :param trocas_perfil: Trocas de empresa sem um novo login.
+    :param tentativas: Empresas que falharam pelo menos uma vez.
+    """
+
+    do_cache: Int = Int(0)
+    consultados: Int = Int(0)
+    inicializacoes: List[TempoInicializacao] = field(default_factory=list)
+    trocas_perfil: List[TrocaPerfil] = field(default_factory=list)
+    tentativas: List[TentativasEmpresa] = field(default_factory=list)
+
+    def resumo(self) -> str:
+        """Mensagem de progresso do fim da raspagem, com as estatísticas que não estão vazias."""
+        mensagem = "Etapa de processamento concluída ({} funcionários do cache, {} consultados). "
+        mensagem = mensagem.format(self.do_cache, self.consultados)
+        if self.inicializacoes:
+            mensagem += (
+                "{} navegadores abertos: {:.1f}s resolvendo o chromedriver e {:.1f}s abrindo o "
+                "Chrome. "
+            ).format(
+                len(self.inicializacoes),
+                sum(tempo.resolucao for tempo in self.inicializacoes),
+                sum(tempo.navegador for tempo in self.inicializacoes),
+            )
+        if self.trocas_perfil:
+            sucessos = [troca.segundos for troca in self.trocas_perfil if troca.sucesso]
+            mensagem += (
+                "{} trocas de empresa sem novo login ({:.1f}s em média), {} com falha. "
+            ).format(
+                len(sucessos),
+                sum(sucessos) / len(sucessos) if sucessos else 0.0,
+                len(self.trocas_perfil) - len(sucessos),
+            )
+        if self.tentativas:
+            abandonadas = [t for t in self.tentativas if t.resultado == "abandonada"]
+            mensagem += (
+                "{} falhas de acesso em {} empresas, {} recuperadas depois de estacionadas, {} "
+                "abandonadas ({} CPFs sem dados). "
+            ).format(
+                sum(sum(t.falhas.values()) for t in self.tentativas),
+                len(self.tentativas),
+                sum(t.resultado == "recuperada" for t in self.tentativas),
+                len(abandonadas),
+                sum(t.sem_dados for t in abandonadas),
+            )
+        return mensagem
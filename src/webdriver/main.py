@@ -1,21 +1,36 @@
 """Entrypoint da parte da aplicação relacionada ao WebDriver."""
 
-from pathlib import Path
 import time
 from aioprocessing.queues import AioQueue
 
 import pandas as pd
 from typing import Iterable, Any, cast
-from os.path import basename
+from os.path import basename, join, splitext
 
-from src.webdriver.acesso import processar_planilha
-from src.local.io import criar_pastas_de_sistema
+from src.webdriver.acesso import TRABALHADORES_RASPAGEM, processar_planilha
+from src.webdriver.diario import DiarioRaspagem, hash_arquivo
+from src.webdriver.cache import CacheFuncionarios
+from src.webdriver.perfis_chrome import PERFIS_PERSISTENTES, PerfisChrome
+from src.webdriver.pool import PoolNavegadores
+from src.webdriver.caminhos import nomear_seletores
+from src.utils.acesso import resolver_chromedriver
+from src.utils.metricas import metricas
+from src.utils.prazos import prazos
+from src.local.io import (
+    CAMINHO_CACHE,
+    CAMINHO_CHROMEDRIVER,
+    CAMINHO_DIARIO,
+    CAMINHO_PRAZOS,
+    PastasSistema,
+    criar_pastas_de_sistema,
+)
 from src.webdriver.types import PlanilhaPronta
 from src.async_vitals.messaging import ProgressStateNamespace as progress_values_t, STR_DUMMY
 from src.webdriver.planilha import (
     DELTA,
     ColunaPlanilha,
     checar_cpfs_cnpjs,
+    ler_planilha,
     registro_de_dados_relevantes,
 )
 
@@ -30,23 +45,31 @@ def main(
 ) -> None:
     """Entrypoint da aplicação."""
     criar_pastas_de_sistema()
+    cache = CacheFuncionarios(CAMINHO_CACHE)
+    # Prazos das esperas aprendidos nas execuções anteriores.
+    prazos.carregar(CAMINHO_PRAZOS)
+    # Chromedriver resolvido numa execução anterior, se o Chrome não foi atualizado desde então.
+    resolver_chromedriver(CAMINHO_CHROMEDRIVER)
+    # Os navegadores continuam abertos entre uma planilha e outra e, com perfis persistentes,
+    # continuam logados mesmo depois de fechados.
+    pool = PoolNavegadores(
+        TRABALHADORES_RASPAGEM, perfis=PerfisChrome() if PERFIS_PERSISTENTES else None
+    )
     while True:
         caminho_arquivo_excel: str = queue_planilhas.get()
         started_event.set()
         progress_values_t.update_general_msg(progress_values, "Lendo planilha.")
-        tabela: pd.DataFrame
-        if Path(caminho_arquivo_excel).suffix == ".xls":
-            tabela = pd.read_excel(caminho_arquivo_excel, header=None, engine="xlrd")
-        else:
-            tabela = pd.read_excel(caminho_arquivo_excel, header=None, engine="openpyxl")
+        # Apenas as colunas de ColunaPlanilha são lidas; o restante da planilha só é lido de novo
+        # na hora de salvar (veja mesclar_resultado).
+        tabela: pd.DataFrame = ler_planilha(caminho_arquivo_excel)
 
         coluna_cnpj_unidade = cast(
-            Iterable[Any], tabela.iloc[DELTA:, ColunaPlanilha.CNPJ_UNIDADE].values
+            Iterable[Any], tabela.loc[DELTA:, ColunaPlanilha.CNPJ_UNIDADE].values
         )
-        coluna_cnpj = cast(Iterable[Any], tabela.iloc[DELTA:, ColunaPlanilha.CNPJ].values)
-        coluna_cpf = cast(Iterable[Any], tabela.iloc[DELTA:, ColunaPlanilha.CPF].values)
-        coluna_cnpj_nomes = cast(Iterable[Any], tabela.iloc[DELTA:, ColunaPlanilha.NOME_UNIDADE])
-        coluna_cpf_nomes = cast(Iterable[Any], tabela.iloc[DELTA:, ColunaPlanilha.NOME_FUNCIONARIO])
+        coluna_cnpj = cast(Iterable[Any], tabela.loc[DELTA:, ColunaPlanilha.CNPJ].values)
+        coluna_cpf = cast(Iterable[Any], tabela.loc[DELTA:, ColunaPlanilha.CPF].values)
+        coluna_cnpj_nomes = cast(Iterable[Any], tabela.loc[DELTA:, ColunaPlanilha.NOME_UNIDADE])
+        coluna_cpf_nomes = cast(Iterable[Any], tabela.loc[DELTA:, ColunaPlanilha.NOME_FUNCIONARIO])
 
         checar_cpfs_cnpjs(coluna_cpf, coluna_cnpj, coluna_cnpj_unidade)
 
@@ -58,15 +81,38 @@ def main(
         )
         with progress_values.get_lock():
             progress_values.cnpj_max = len(funcionarios.CNPJ_lista)
-            progress_values.cpf_max = len(funcionarios.CPF_lista)
+            progress_values.cpf_max = len(funcionarios.CPF_indice)
             progress_values.cnpj_max_last_updated_ns = time.time_ns()
             progress_values.cpf_max_last_updated_ns = time.time_ns()
 
-        dataframe: pd.DataFrame = processar_planilha(funcionarios, tabela, progress_values)
+        # Funcionários já raspados numa execução anterior interrompida não são raspados de novo.
+        diario = DiarioRaspagem(CAMINHO_DIARIO, hash_arquivo(caminho_arquivo_excel))
+        try:
+            dataframe, estatisticas = processar_planilha(
+                funcionarios, tabela, progress_values, diario, cache, pool
+            )
+        finally:
+            diario.fechar()
+            # Tempos de cada etapa e seletor desta planilha, para encontrar os seletores lentos.
+            try:
+                metricas.salvar(
+                    join(
+                        PastasSistema.dados,
+                        "metricas_" + splitext(basename(caminho_arquivo_excel))[0],
+                    ),
+                    nomear_seletores(),
+                )
+            except OSError:
+                pass
+            metricas.zerar()
+            try:
+                prazos.salvar(CAMINHO_PRAZOS)
+            except OSError:
+                pass
 
         progress_values_t.update_general_msg(
             progress_values,
-            "Etapa de processamento concluída. Agendando geração e salvamento da nova planilha.",
+            estatisticas.resumo() + "Agendando geração e salvamento da nova planilha.",
         )
 
         with progress_values.get_lock():
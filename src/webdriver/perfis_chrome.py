@@ -0,0 +1,104 @@
+"""Pastas de dados de usuário do Chrome (``--user-data-dir``) que sobrevivem ao fechamento do
+navegador, para que um navegador novo continue logado no ESocial sem um novo CAPTCHA (veja
+:func:`~src.webdriver.acesso.retomar_sessao`)."""
+
+import os
+import shutil
+import threading
+from os.path import isdir, join
+from typing import Set
+
+from src.local.io import PASTA_PERFIS_CHROME
+
+__all__ = ["PERFIS_PERSISTENTES", "PerfisChrome"]
+
+PERFIS_PERSISTENTES = True
+"""Se os navegadores do pool usam pastas de dados persistentes. Sem elas, cada navegador começa
+deslogado."""
+
+_IGNORADOS = shutil.ignore_patterns(
+    # caches que o Chrome recria sozinho e que não guardam a sessão
+    "Cache",
+    "Code Cache",
+    "GPUCache",
+    "GrShaderCache",
+    "ShaderCache",
+    "DawnCache",
+    "Service Worker",
+    "Crashpad",
+    "BrowserMetrics*",
+    # travas do navegador que estava usando a pasta
+    "Singleton*",
+    "lockfile",
+)
+
+
+class PerfisChrome:
+    """Gerencia as pastas de dados de um certificado: uma por navegador aberto ao mesmo tempo, mais
+    um modelo.
+
+    O modelo é a cópia de uma pasta que já fez login. Pastas novas são clonadas dele, sem os caches
+    (que são grandes e o Chrome recria), em vez de começarem vazias. Cada pasta só pode ser usada
+    por um navegador de cada vez, então elas são reservadas com :meth:`reservar` e devolvidas com
+    :meth:`liberar`; uma pasta liberada é reaproveitada, com os seus cookies e cache, pelo próximo
+    navegador que reservar.
+
+    :param pasta: Pasta onde ficam os perfis de todos os certificados.
+    :param nome: Nome do certificado, para que certificados diferentes não compartilhem sessões.
+    """
+
+    def __init__(self, pasta: str = PASTA_PERFIS_CHROME, nome: str = "padrao") -> None:
+        self.pasta = join(pasta, nome)
+        self.modelo = join(self.pasta, "modelo")
+        self._em_uso: Set[str] = set()
+        self._trava = threading.Lock()
+        self._trava_modelo = threading.Lock()
+
+    def reservar(self) -> str:
+        """Reserva uma pasta que não está sendo usada, criando-a a partir do modelo se necessário.
+
+        :return: Caminho da pasta, para ser passado para
+            :func:`~src.utils.acesso.inicializar_driver`.
+        """
+        with self._trava:
+            i = 0
+            while (pasta := join(self.pasta, str(i))) in self._em_uso:
+                i += 1
+            self._em_uso.add(pasta)
+
+        if not isdir(pasta):
+            with self._trava_modelo:
+                if isdir(self.modelo):
+                    try:
+                        shutil.copytree(self.modelo, pasta, ignore=_IGNORADOS)
+                    except OSError:
+                        shutil.rmtree(pasta, ignore_errors=True)
+            os.makedirs(pasta, exist_ok=True)
+        return pasta
+
+    def liberar(self, pasta: str) -> None:
+        """Devolve uma pasta reservada. O navegador que a usava já deve estar fechado.
+
+        :param pasta: Pasta retornada por :meth:`reservar`.
+        """
+        with self._trava:
+            self._em_uso.discard(pasta)
+
+    def atualizar_modelo(self, pasta: str) -> None:
+        """Substitui o modelo por uma cópia da pasta especificada, que deve ter feito login. O
+        navegador que a usava já deve estar fechado, senão os arquivos podem estar travados.
+
+        Se a cópia falhar, o modelo anterior continua valendo.
+
+        :param pasta: Pasta retornada por :meth:`reservar`.
+        """
+        temporaria = self.modelo + ".novo"
+        with self._trava_modelo:
+            shutil.rmtree(temporaria, ignore_errors=True)
+            try:
+                shutil.copytree(pasta, temporaria, ignore=_IGNORADOS)
+            except OSError:
+                shutil.rmtree(temporaria, ignore_errors=True)
+                return
+            shutil.rmtree(self.modelo, ignore_errors=True)
+            os.replace(temporaria, self.modelo)
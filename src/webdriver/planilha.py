@@ -2,28 +2,59 @@
 relevantes para interações complanilhas."""
 
 import re
-from dataclasses import dataclass, field
-from math import isnan
-from string import ascii_letters
-from typing import Any, Iterable, List, Dict
+from dataclasses import dataclass, field, fields
+from math import isnan, nan
+from pathlib import Path
+from string import ascii_letters, digits
+from typing import Any, Iterable, List, Dict, NamedTuple, Tuple
+
+import openpyxl
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from openpyxl.utils.cell import column_index_from_string
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+import xlrd
+
+from src.webdriver.types import CelulaVaziaType
 from src.local.types import Int
 
+try:
+    # API interna do openpyxl, usada só nas versões em que foi testada (veja _PARSER_COLUNAS)
+    from openpyxl.worksheet._reader import WorkSheetParser
+except ImportError:  # pragma: no cover
+    WorkSheetParser = object
+
 __all__ = [
+    "COLUNAS_PLANILHA",
+    "COLUNAS_RESULTADO",
     "ColunaPlanilha",
     "DELTA",
+    "DadosFuncionario",
     "RegistroCNPJ",
     "RegistroCPF",
     "RegistroDados",
+    "ResultadosRaspagem",
+    "apenas_digitos",
     "celulas_preenchidas",
     "checar_cpfs_cnpjs",
     "filtrar_cpfs_apenas_matriz",
+    "ler_planilha",
     "letra_para_numero_coluna",
+    "mesclar_resultado",
     "registro_de_dados_relevantes",
 ]
 
 DELTA = Int(2)
 """Quantidade de linhas da planilha a serem ignoradas de cima para baixo."""
 
+_PARSER_COLUNAS = WorkSheetParser is not object and openpyxl.__version__.startswith("3.1.")
+"""Se os arquivos ``.xlsx`` são lidos com :class:`_ParserColunas`, que depende de partes internas
+do openpyxl (``WorkSheetParser``, ``_get_source``, ``_shared_strings`` e os formatos de data do
+livro). Em outras versões do openpyxl, ou se essas partes mudarem, a leitura cai para
+:func:`pandas.read_excel` com ``usecols``, mais lenta mas com o mesmo resultado."""
+
 
 def letra_para_numero_coluna(char: str) -> Int:
     """Retorna o número correspondente a uma lista de letras em formato de index para o pandas.
@@ -59,6 +90,217 @@ class ColunaPlanilha:
     NOME_UNIDADE: Int = letra_para_numero_coluna("B")
 
 
+COLUNAS_PLANILHA: Tuple[Int, ...] = tuple(sorted({f.default for f in fields(ColunaPlanilha)}))
+"""Todas as colunas da planilha que o programa lê ou escreve, em ordem crescente."""
+
+DadosFuncionario = NamedTuple(
+    "DadosFuncionario",
+    [
+        ("SITUACAO", str),
+        ("ADMISSAO", str),
+        ("NASCIMENTO", str),
+        ("MATRICULA", str),
+        ("DEMISSAO", str | CelulaVaziaType),
+    ],
+)
+"""Dados raspados de um funcionário. Cada campo tem o mesmo nome da sua coluna em
+:class:`ColunaPlanilha`."""
+
+COLUNAS_RESULTADO: Tuple[Int, ...] = tuple(
+    getattr(ColunaPlanilha, campo) for campo in DadosFuncionario._fields
+)
+"""Colunas da planilha que são preenchidas com os dados raspados, na ordem de
+:data:`DadosFuncionario`."""
+
+
+def _engine(caminho: str) -> str:
+    """Retorna o engine do pandas capaz de ler o arquivo especificado."""
+    return "xlrd" if Path(caminho).suffix == ".xls" else "openpyxl"
+
+
+def _converter_celula_xlsx(valor: Any, tipo: str) -> Any:
+    """Converte o valor de uma célula do openpyxl da mesma forma que :func:`pandas.read_excel`."""
+    if valor is None:
+        return ""
+    if tipo == TYPE_ERROR:
+        return nan
+    if tipo == TYPE_NUMERIC:
+        inteiro = int(valor)
+        return inteiro if inteiro == valor else float(valor)
+    return valor
+
+
+def _converter_celula_xls(valor: Any, tipo: int, datemode: int) -> Any:
+    """Converte o valor de uma célula do xlrd da mesma forma que :func:`pandas.read_excel`."""
+    if tipo == xlrd.XL_CELL_DATE:
+        try:
+            data = xlrd.xldate.xldate_as_datetime(valor, datemode)
+        except OverflowError:
+            return valor
+        # datas na época do Excel são, na verdade, apenas horários
+        if data.timetuple()[0:3] == ((1904, 1, 1) if datemode else (1899, 12, 31)):
+            return data.time()
+        return data
+    if tipo == xlrd.XL_CELL_ERROR:
+        return nan
+    if tipo == xlrd.XL_CELL_BOOLEAN:
+        return bool(valor)
+    if tipo == xlrd.XL_CELL_NUMBER:
+        inteiro = int(valor)
+        return inteiro if inteiro == valor else valor
+    return valor
+
+
+class _ParserColunas(WorkSheetParser):
+    """Parser de aba do openpyxl que descarta as células fora das colunas desejadas antes de
+    interpretá-las, já que interpretar cada célula é a parte mais cara da leitura.
+
+    :param colunas: Posições numéricas das colunas que devem ser mantidas.
+    """
+
+    def __init__(self, *args: Any, colunas: Tuple[Int, ...], **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._colunas = set(colunas)
+        self._letras_relevantes: Dict[str, bool] = {}
+
+    def _relevante(self, referencia: str) -> bool:
+        letras = referencia.rstrip(digits)
+        if (relevante := self._letras_relevantes.get(letras)) is None:
+            relevante = column_index_from_string(letras) - 1 in self._colunas
+            self._letras_relevantes[letras] = relevante
+        return relevante
+
+    def parse_row(self, row: Any) -> Any:
+        referencias = [celula.get("r") for celula in row]
+        # sem referência a posição da célula depende das células anteriores
+        if None not in referencias:
+            for celula, referencia in zip(list(row), referencias):
+                if not self._relevante(referencia):
+                    row.remove(celula)
+        return super().parse_row(row)
+
+
+def _linhas_xlsx(caminho: str, colunas: Tuple[Int, ...]) -> List[List[Any]]:
+    """Lê a primeira aba de um arquivo ``.xlsx`` linha por linha, guardando apenas as colunas
+    especificadas."""
+    livro = load_workbook(caminho, read_only=True, data_only=True, keep_links=False)
+    posicoes = {coluna: i for i, coluna in enumerate(colunas)}
+    linhas: List[List[Any]] = []
+    try:
+        aba = livro.worksheets[0]
+        # mesmo processo de ReadOnlyWorksheet.iter_rows, mas usando _ParserColunas
+        with aba._get_source() as fonte:
+            parser = _ParserColunas(
+                fonte,
+                aba._shared_strings,
+                data_only=livro.data_only,
+                epoch=livro.epoch,
+                date_formats=livro._date_formats,
+                timedelta_formats=livro._timedelta_formats,
+                colunas=colunas,
+            )
+            for indice, celulas in parser.parse():
+                # linhas ausentes no arquivo são linhas vazias
+                while len(linhas) < indice - 1:
+                    linhas.append([""] * len(colunas))
+                linha: List[Any] = [""] * len(colunas)
+                for celula in celulas:
+                    if (posicao := posicoes.get(celula["column"] - 1)) is not None:
+                        linha[posicao] = _converter_celula_xlsx(
+                            celula["value"], celula["data_type"]
+                        )
+                linhas.append(linha)
+    finally:
+        livro.close()
+    return linhas
+
+
+def _linhas_xls(caminho: str, colunas: Tuple[Int, ...]) -> List[List[Any]]:
+    """Lê a primeira aba de um arquivo ``.xls`` coluna por coluna, guardando apenas as colunas
+    especificadas."""
+    livro = xlrd.open_workbook(caminho, on_demand=True)
+    try:
+        aba = livro.sheet_by_index(0)
+        vazia = [""] * aba.nrows
+        valores: List[List[Any]] = []
+        for c in colunas:
+            if c >= aba.ncols:
+                valores.append(vazia)
+                continue
+            valores.append(
+                [
+                    _converter_celula_xls(valor, tipo, livro.datemode)
+                    for valor, tipo in zip(aba.col_values(c), aba.col_types(c))
+                ]
+            )
+        return [list(linha) for linha in zip(*valores)]
+    finally:
+        livro.release_resources()
+
+
+def _ler_planilha_pandas(caminho: str, colunas: Tuple[Int, ...]) -> pd.DataFrame:
+    """Lê as colunas especificadas com :func:`pandas.read_excel`, sem as partes internas do
+    openpyxl, e descarta as linhas do final que estão vazias nelas, como :func:`ler_planilha`."""
+    tabela: pd.DataFrame = pd.read_excel(
+        caminho, header=None, usecols=lambda coluna: coluna in colunas, engine=_engine(caminho)
+    ).reindex(columns=list(colunas))
+    preenchidas = np.flatnonzero(tabela.notna().any(axis=1).to_numpy())
+    return tabela.iloc[: preenchidas[-1] + 1 if len(preenchidas) else 0]
+
+
+def ler_planilha(caminho: str, colunas: Iterable[Int] = COLUNAS_PLANILHA) -> pd.DataFrame:
+    """Lê apenas as colunas especificadas da primeira aba da planilha.
+
+    O resultado é equivalente a ``pd.read_excel(caminho, header=None)[colunas]`` sem as linhas do
+    final que estão vazias nas colunas lidas (mesmo que tenham valores em outras colunas): as
+    colunas mantêm como rótulo sua posição original na planilha e as linhas mantêm sua posição
+    original (de forma que :attr:`RegistroCPF.linha` continua válido). Os valores passam pelo mesmo
+    tratamento de células vazias e inferência de tipos que o pandas aplica.
+
+    :param caminho: Caminho para o arquivo ``.xls`` ou ``.xlsx``.
+    :param colunas: Posições numéricas das colunas que devem ser lidas.
+    :return: Tabela contendo apenas as colunas especificadas.
+    """
+    colunas = tuple(sorted(set(colunas)))
+    if _engine(caminho) == "xlrd":
+        linhas = _linhas_xls(caminho, colunas)
+    elif not _PARSER_COLUNAS:
+        return _ler_planilha_pandas(caminho, colunas)
+    else:
+        try:
+            linhas = _linhas_xlsx(caminho, colunas)
+        except (AttributeError, TypeError):
+            # as partes internas do openpyxl mudaram nesta versão
+            return _ler_planilha_pandas(caminho, colunas)
+
+    # assim como o pandas, ignora linhas vazias no final da planilha
+    while linhas and all(valor == "" for valor in linhas[-1]):
+        linhas.pop()
+    if not linhas:
+        return pd.DataFrame(columns=list(colunas))
+
+    tabela: pd.DataFrame = TextParser(linhas, header=None, skip_blank_lines=False).read()
+    tabela.columns = list(colunas)
+    return tabela
+
+
+def mesclar_resultado(caminho_original: str, tabela: pd.DataFrame) -> pd.DataFrame:
+    """Lê a planilha original por completo e sobrescreve as colunas de resultado com os valores da
+    tabela processada.
+
+    :param caminho_original: Caminho para a planilha que deu origem a tabela.
+    :param tabela: Tabela lida por :func:`ler_planilha` e preenchida com os dados raspados.
+    :return: Planilha completa pronta para ser salva.
+    """
+    completa: pd.DataFrame = pd.read_excel(
+        caminho_original, header=None, engine=_engine(caminho_original)
+    )
+    for coluna in COLUNAS_RESULTADO:
+        if coluna in tabela.columns:
+            completa.loc[tabela.index, coluna] = tabela[coluna]
+    return completa
+
+
 # catalogando cpf para cada cnpj
 @dataclass(init=True, frozen=True)
 class RegistroCPF:
@@ -97,10 +339,81 @@ class RegistroDados:
     :final:
     :param CNPJ_lista: Lista de CNPJs com pontuação.
     :param CPF_lista: Lista onde cada objeto contém informações sobre o CPF de um funcionário.
+    :param CPF_indice: CPFs sem pontuação e os registros (linhas) onde cada um aparece.
+    :param CNPJ_CPFs: CNPJs da matriz (como em ``CNPJ_lista``) e os registros dos funcionários de
+        todas as suas unidades.
     """
 
     CNPJ_lista: List[RegistroCNPJ] = field(init=False, default_factory=list)
     CPF_lista: List[RegistroCPF] = field(init=False, default_factory=list)
+    CPF_indice: Dict[str, List[RegistroCPF]] = field(init=False, default_factory=dict)
+    CNPJ_CPFs: Dict[str, List[RegistroCPF]] = field(init=False, default_factory=dict)
+
+    def buscar_cpf(self, CPF: str) -> List[RegistroCPF]:
+        """Retorna os registros do CPF especificado, com ou sem pontuação.
+
+        :param CPF: CPF do funcionário.
+        :return: Registros de todas as linhas onde o CPF aparece (vazio se não aparecer em nenhuma).
+        """
+        return self.CPF_indice.get(apenas_digitos(CPF), [])
+
+
+@dataclass(init=True)
+class ResultadosRaspagem:
+    """Buffer colunar dos dados raspados, indexado pela linha da planilha.
+
+    Os dados são acumulados aqui e escritos na tabela de uma vez só por :meth:`aplicar`, com uma
+    atribuição vetorizada por coluna. Escrever célula por célula com indexação encadeada
+    (``tabela[coluna][linha] = valor``) é lento e, com copy-on-write, pode nem alterar a tabela.
+
+    :final:
+    :param linhas: Linhas da planilha com dados pendentes, na ordem em que foram adicionadas.
+    :param colunas: Valores pendentes de cada coluna de :data:`COLUNAS_RESULTADO`, na mesma ordem
+        de ``linhas``.
+    """
+
+    linhas: List[Int] = field(init=False, default_factory=list)
+    colunas: List[List[Any]] = field(
+        init=False, default_factory=lambda: [[] for _ in COLUNAS_RESULTADO]
+    )
+    _posicoes: Dict[Int, Int] = field(init=False, default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.linhas)
+
+    def adicionar(self, linha: Int, dados: DadosFuncionario) -> None:
+        """Guarda os dados de um funcionário para a linha especificada, substituindo dados
+        anteriores da mesma linha.
+
+        :param linha: Posição vertical do CPF na planilha (:attr:`RegistroCPF.linha`).
+        :param dados: Dados raspados do funcionário.
+        """
+        if (posicao := self._posicoes.get(linha)) is None:
+            self._posicoes[linha] = Int(len(self.linhas))
+            self.linhas.append(linha)
+            for valores, valor in zip(self.colunas, dados):
+                valores.append(valor)
+            return
+        for valores, valor in zip(self.colunas, dados):
+            valores[posicao] = valor
+
+    def aplicar(self, tabela: pd.DataFrame) -> None:
+        """Escreve todos os dados pendentes na tabela e esvazia o buffer.
+
+        :param tabela: Tabela lida da planilha, indexada pela posição das linhas.
+        """
+        if not self.linhas:
+            return
+        for coluna, valores in zip(COLUNAS_RESULTADO, self.colunas):
+            tabela.loc[self.linhas, coluna] = np.array(valores, dtype=object)
+        self.linhas = []
+        self.colunas = [[] for _ in COLUNAS_RESULTADO]
+        self._posicoes = {}
+
+
+def apenas_digitos(texto: str) -> str:
+    """Remove todos os caracteres que não sao números de um texto."""
+    return "".join([s for s in texto if s in digits])
 
 
 # ESSA FUNÇÃO NÃO ESTÁ MAIS SENDO USADA; MANTIDA AQUI CASO MUDE DE IDEA
@@ -128,6 +441,29 @@ def filtrar_cpfs_apenas_matriz(
     return CATALOGO_FUNCIONARIOS
 
 
+_REGEX_CNPJ_MATRIZ = re.compile("[^/-]*[/-]0001(?:[/-]|\\Z)")
+"""Equivalente a ``re.split("[\\/-]", CNPJ)[1] == "0001"``, isto é, CNPJs de matriz."""
+
+
+_REGEX_NAO_DIGITO = re.compile("[^0-9]")
+
+
+def _raiz_cnpj(CNPJ: str) -> str:
+    """Retorna os 8 primeiros dígitos do CNPJ, que identificam a empresa independente da unidade."""
+    return apenas_digitos(CNPJ)[:8]
+
+
+def _serie(coluna: Iterable[Any]) -> "pd.Series[Any]":
+    """Transforma uma coluna da planilha em uma série de objetos indexada a partir de zero, com NaN
+    em toda célula que não é texto (números, datas, células vazias).
+
+    Assim o acessor ``.str`` pode ser usado mesmo quando nenhuma célula da coluna é texto, como
+    numa coluna de CPFs digitados como números no Excel.
+    """
+    serie = pd.Series(np.asarray(coluna, dtype=object), dtype=object)
+    return serie.where(serie.map(lambda valor: isinstance(valor, str)), np.nan)
+
+
 def registro_de_dados_relevantes(
     coluna_cnpj_unidade: Iterable[str],
     coluna_cnpj: Iterable[str],
@@ -137,31 +473,63 @@ def registro_de_dados_relevantes(
 ) -> RegistroDados:
     """Cria um registro de todos os cpnjs da MATRIZ e TODOS os cpfs.
 
+    As colunas são processadas de forma vetorizada pelo pandas; CNPJs repetidos são descartados por
+    hash, mantendo a primeira ocorrência.
+
     :param coluna_cnpj_unidade: Objeto iterável contendo CNPJs.
     :param coluna_cnpj: Objeto iterável contendo CNPJs.
     :param coluna_cpf: Objeto iterável contendo CPFs.
+    :param coluna_cnpj_nomes: Objeto iterável contendo os nomes das empresas.
+    :param coluna_cpf_nomes: Objeto iterável contendo os nomes dos funcionários.
     :return: Registro contendo listas com todos os CNPJs e todos os CPFs. Cada CPF é um objeto com o
         próprio CPF e informações adicionais relevantes (confira).
     """
     registro = RegistroDados()
-    for index, info in enumerate(zip(coluna_cpf, coluna_cpf_nomes)):
-        CPF, nome = info
-        if not isinstance(CPF, str):
-            continue
-        pos_linha = Int(DELTA + index)
-        registro.CPF_lista.append(RegistroCPF(CPF, pos_linha, nome.strip()))
 
-    cnpj_nomes = coluna_cnpj_nomes.to_list()
-    cnpj_length = len(cnpj_nomes)
-    for index, CNPJ in enumerate([*coluna_cnpj_unidade, *coluna_cnpj]):
-        nome = cnpj_nomes[index - cnpj_length] if index >= cnpj_length else cnpj_nomes[index]
-        if not isinstance(CNPJ, str):
-            continue
-        if not re.split("[\\/-]", CNPJ)[1] == "0001":
-            continue
-        if len(registro.CNPJ_lista) != 0 and CNPJ in (r.CNPJ for r in registro.CNPJ_lista):
-            continue
-        registro.CNPJ_lista.append(RegistroCNPJ(CNPJ, nome.strip()))
+    cpfs = _serie(coluna_cpf)
+    cpf_nomes = _serie(coluna_cpf_nomes).str.strip().fillna("")
+    # apenas células com texto são CPFs; as outras já são NaN (veja _serie)
+    cpf_validos = cpfs.str.len().notna().to_numpy()
+    registro.CPF_lista.extend(
+        RegistroCPF(CPF, Int(linha), nome)
+        for CPF, linha, nome in zip(
+            cpfs[cpf_validos],
+            np.flatnonzero(cpf_validos) + DELTA,
+            cpf_nomes[cpf_validos],
+        )
+    )
+
+    cnpjs_unidade = _serie(coluna_cnpj_unidade)
+    cnpjs_matriz = _serie(coluna_cnpj)
+    cnpj_nomes = _serie(coluna_cnpj_nomes).str.strip().fillna("")
+    cnpjs = pd.DataFrame(
+        {
+            "CNPJ": pd.concat([cnpjs_unidade, cnpjs_matriz], ignore_index=True),
+            "nome": pd.concat([cnpj_nomes, cnpj_nomes], ignore_index=True),
+        }
+    )
+    # a matriz é identificada pelo "0001" entre a raiz e o dígito verificador do CNPJ
+    cnpjs = cnpjs[cnpjs["CNPJ"].str.match(_REGEX_CNPJ_MATRIZ).fillna(False).to_numpy(dtype=bool)]
+    cnpjs = cnpjs.drop_duplicates(subset="CNPJ", keep="first")
+    registro.CNPJ_lista.extend(
+        RegistroCNPJ(CNPJ, nome) for CNPJ, nome in zip(cnpjs["CNPJ"], cnpjs["nome"])
+    )
+
+    # Índices construídos uma única vez para que a raspagem não precise percorrer CPF_lista.
+    cpf_digitos = cpfs[cpf_validos].str.replace(_REGEX_NAO_DIGITO, "", regex=True)
+    for digitos_cpf, cpf_registro in zip(cpf_digitos, registro.CPF_lista):
+        registro.CPF_indice.setdefault(digitos_cpf, []).append(cpf_registro)
+
+    # Cada funcionário pertence a matriz com a mesma raiz (8 primeiros dígitos) do CNPJ da sua
+    # linha, seja ele da unidade ou da própria matriz.
+    matriz_por_raiz: Dict[str, str] = {}
+    for CNPJ in cnpjs["CNPJ"]:
+        matriz_por_raiz.setdefault(_raiz_cnpj(CNPJ), CNPJ)
+    cnpj_linha = cnpjs_unidade.where(cnpjs_unidade.str.len().notna(), cnpjs_matriz)
+    raizes = cnpj_linha[cpf_validos].str.replace(_REGEX_NAO_DIGITO, "", regex=True).str[:8]
+    for raiz, cpf_registro in zip(raizes, registro.CPF_lista):
+        if isinstance(raiz, str) and (matriz := matriz_por_raiz.get(raiz)) is not None:
+            registro.CNPJ_CPFs.setdefault(matriz, []).append(cpf_registro)
 
     return registro
 
@@ -0,0 +1,42 @@
+"""Planejamento da raspagem: em que ordem as empresas e os funcionários de uma planilha são
+consultados no ESocial."""
+
+from typing import Dict, List, NamedTuple, Set
+
+from src.webdriver.planilha import RegistroCNPJ, RegistroCPF, RegistroDados, apenas_digitos
+
+__all__ = ["EmpresaPlanejada", "planejar_raspagem"]
+
+
+EmpresaPlanejada = NamedTuple(
+    "EmpresaPlanejada",
+    [("empresa", RegistroCNPJ), ("funcionarios", Dict[str, List[RegistroCPF]])],
+)
+"""Empresa (matriz) cujo perfil deve ser acessado e os funcionários que devem ser raspados nela,
+indexados pelo CPF sem pontuação. Cada CPF aparece uma vez só, com os registros de todas as suas
+linhas na planilha."""
+
+
+def planejar_raspagem(
+    funcionarios: RegistroDados, cpfs_ja_vistos: Set[str]
+) -> List[EmpresaPlanejada]:
+    """Agrupa os funcionários pela matriz da empresa, para que o perfil de cada empresa seja
+    acessado uma vez só e todos os seus funcionários sejam raspados antes de passar para a próxima.
+
+    Funcionários cujas empresas não têm o CNPJ da matriz na planilha ficam de fora do plano, já que
+    não há perfil para acessar.
+
+    :param funcionarios: Registro de dados dos funcionários.
+    :param cpfs_ja_vistos: CPFs sem pontuação que não precisam ser raspados (diário, cache).
+    :return: Empresas na ordem de ``funcionarios.CNPJ_lista``, sem as que não têm nada a raspar.
+    """
+    plano: List[EmpresaPlanejada] = []
+    for empresa in funcionarios.CNPJ_lista:
+        pendentes: Dict[str, List[RegistroCPF]] = {}
+        for registro in funcionarios.CNPJ_CPFs.get(empresa.CNPJ, []):
+            CPF = apenas_digitos(registro.CPF)
+            if CPF not in cpfs_ja_vistos:
+                pendentes.setdefault(CPF, []).append(registro)
+        if pendentes:
+            plano.append(EmpresaPlanejada(empresa, pendentes))
+    return plano
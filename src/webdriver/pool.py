@@ -0,0 +1,219 @@
+"""Pool de navegadores reaproveitáveis, para evitar abrir um Chrome novo (e resolver o chromedriver
+de novo) a cada empresa ou a cada erro de acesso."""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import WebDriverException
+import undetected_chromedriver as uc
+
+from src.utils.acesso import (
+    PERFIL_NAVEGADOR,
+    PerfilNavegador,
+    TempoInicializacao,
+    bloquear_recursos,
+    inicializar_driver,
+)
+from src.webdriver.perfis_chrome import PerfisChrome
+from src.utils.selenium import fechar_abas_extras
+from src.local.types import Float, Int
+
+__all__ = ["POOL_MAX_IDADE_SECS", "POOL_MAX_USOS", "POOL_TAMANHO", "PoolNavegadores"]
+
+POOL_TAMANHO = Int(1)
+"""Quantidade máxima de navegadores abertos ao mesmo tempo."""
+POOL_MAX_USOS = Int(50)
+"""Quantidade de empréstimos antes do navegador ser fechado e substituído por um novo."""
+POOL_MAX_IDADE_SECS = Float(60 * 60)
+"""Segundos de vida do navegador antes dele ser fechado e substituído por um novo."""
+
+
+@dataclass
+class _Navegador:
+    driver: uc.Chrome
+    pasta: str | None = None
+    criado_ns: int = field(default_factory=time.time_ns)
+    usos: Int = Int(0)
+    logado: bool = False
+
+
+class PoolNavegadores:
+    """Pool de instâncias do webdriver.
+
+    Ao ser devolvido, o navegador volta a um estado limpo (cookies, cache e armazenamento apagados,
+    recursos desbloqueados, abas extras fechadas e página em branco), então o próximo empréstimo
+    começa deslogado, como um navegador recém aberto. Com ``perfis``, os cookies, o cache e o
+    armazenamento são mantidos, inclusive quando o navegador é substituído por um novo, para que o
+    próximo empréstimo possa continuar a sessão (veja :func:`~src.webdriver.acesso.retomar_sessao`).
+    Antes de cada empréstimo o navegador passa por uma checagem de saúde e é substituído se não
+    responder, se já foi emprestado ``max_usos`` vezes ou se tem mais de ``max_idade`` segundos.
+
+    :param tamanho: Quantidade máxima de navegadores abertos ao mesmo tempo. Quando todos estão
+        emprestados, :meth:`emprestar` espera algum ser devolvido.
+    :param max_usos: Quantidade de empréstimos de cada navegador antes de ser substituído.
+    :param max_idade: Segundos de vida de cada navegador antes de ser substituído.
+    :param perfil: Como os navegadores são abertos (veja :func:`inicializar_driver`).
+    :param perfis: Pastas de dados de usuário persistentes, uma para cada navegador aberto.
+    """
+
+    def __init__(
+        self,
+        tamanho: Int = POOL_TAMANHO,
+        max_usos: Int = POOL_MAX_USOS,
+        max_idade: Float = POOL_MAX_IDADE_SECS,
+        perfil: PerfilNavegador = PERFIL_NAVEGADOR,
+        perfis: PerfisChrome | None = None,
+    ) -> None:
+        self.tamanho = tamanho
+        self.perfil = perfil
+        self.perfis = perfis
+        self.max_usos = max_usos
+        self.max_idade_ns = int(max_idade * 1_000_000_000)
+        self._livres: List[_Navegador] = []
+        self._emprestados: Dict[int, _Navegador] = {}
+        # navegadores abertos ou sendo abertos, livres ou emprestados
+        self._abertos = Int(0)
+        self._condicao = threading.Condition()
+        # o undetected_chromedriver modifica o executável do chromedriver ao abrir o navegador,
+        # então dois navegadores não podem ser abertos ao mesmo tempo
+        self._trava_abertura = threading.Lock()
+        self._fechado = False
+
+    def emprestar(self, tempos: List[TempoInicializacao] | None = None) -> uc.Chrome:
+        """Empresta um navegador saudável e limpo, abrindo um novo se for necessário.
+
+        :param tempos: Lista onde os tempos de abertura são adicionados quando um navegador novo é
+            aberto (veja :func:`inicializar_driver`).
+        :return: Instância do webdriver. Deve ser devolvida com :meth:`devolver`.
+        """
+        with self._condicao:
+            while not self._livres and self._abertos >= self.tamanho:
+                self._condicao.wait()
+            if self._livres:
+                navegador: _Navegador | None = self._livres.pop()
+            else:
+                # a vaga é reservada antes de abrir o navegador, que acontece fora do lock
+                navegador = None
+                self._abertos = Int(self._abertos + 1)
+
+        if navegador and not self._pode_reusar(navegador):
+            self._fechar_navegador(navegador)
+            navegador = None
+        if navegador is None:
+            pasta = self.perfis.reservar() if self.perfis else None
+            try:
+                with self._trava_abertura:
+                    navegador = _Navegador(inicializar_driver(self.perfil, pasta, tempos), pasta)
+            except BaseException:
+                if self.perfis and pasta:
+                    self.perfis.liberar(pasta)
+                self._liberar_vaga()
+                raise
+
+        navegador.usos = Int(navegador.usos + 1)
+        with self._condicao:
+            self._emprestados[id(navegador.driver)] = navegador
+        return navegador.driver
+
+    def devolver(self, driver: uc.Chrome, descartar: bool = False) -> None:
+        """Devolve o navegador ao pool depois de limpá-lo.
+
+        :param driver: Instância emprestada com :meth:`emprestar`.
+        :param descartar: Fecha o navegador em vez de devolvê-lo, por exemplo quando ele travou.
+        """
+        with self._condicao:
+            navegador = self._emprestados.pop(id(driver))
+
+        if not descartar and not self._fechado and self._limpar(navegador, self.perfis is None):
+            with self._condicao:
+                self._livres.append(navegador)
+                self._condicao.notify()
+            return
+
+        self._fechar_navegador(navegador)
+        self._liberar_vaga()
+
+    def registrar_login(self, driver: uc.Chrome) -> None:
+        """Avisa que o navegador emprestado chegou a fazer login. Quando ele for fechado, a sua
+        pasta de dados vira o modelo das pastas novas (veja :meth:`PerfisChrome.atualizar_modelo`).
+
+        :param driver: Instância emprestada com :meth:`emprestar`.
+        """
+        with self._condicao:
+            self._emprestados[id(driver)].logado = True
+
+    @contextmanager
+    def emprestado(self) -> Iterator[uc.Chrome]:
+        """Abstração de :meth:`emprestar` e :meth:`devolver` para ser usada com ``with``. Se uma
+        exceção de webdriver escapar, o navegador é descartado."""
+        driver = self.emprestar()
+        descartar = False
+        try:
+            yield driver
+        except WebDriverException:
+            descartar = True
+            raise
+        finally:
+            self.devolver(driver, descartar)
+
+    def fechar(self) -> None:
+        """Fecha todos os navegadores livres. Os emprestados são fechados ao serem devolvidos."""
+        with self._condicao:
+            self._fechado = True
+            livres, self._livres = self._livres, []
+        for navegador in livres:
+            self._fechar_navegador(navegador)
+            self._liberar_vaga()
+
+    def _liberar_vaga(self) -> None:
+        with self._condicao:
+            self._abertos = Int(self._abertos - 1)
+            self._condicao.notify()
+
+    def _pode_reusar(self, navegador: _Navegador) -> bool:
+        if navegador.usos >= self.max_usos:
+            return False
+        if time.time_ns() - navegador.criado_ns >= self.max_idade_ns:
+            return False
+        try:
+            # checagem de saúde: qualquer comando que precise de resposta do navegador serve
+            navegador.driver.execute_script("return 1")
+        except WebDriverException:
+            return False
+        return True
+
+    @staticmethod
+    def _limpar(navegador: _Navegador, apagar_dados: bool) -> bool:
+        driver = navegador.driver
+        try:
+            fechar_abas_extras(driver)
+            if apagar_dados:
+                origem = urlparse(driver.current_url)
+                if origem.scheme in ("http", "https"):
+                    driver.execute_cdp_cmd(
+                        "Storage.clearDataForOrigin",
+                        {"origin": f"{origem.scheme}://{origem.netloc}", "storageTypes": "all"},
+                    )
+                # delete_all_cookies só apaga os cookies do domínio atual, o login passa por vários
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+                driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            # o próximo login precisa das imagens do CAPTCHA
+            bloquear_recursos(driver, False)
+            driver.get("about:blank")
+        except WebDriverException:
+            return False
+        return True
+
+    def _fechar_navegador(self, navegador: _Navegador) -> None:
+        try:
+            navegador.driver.quit()
+        except WebDriverException:
+            pass
+        if self.perfis and navegador.pasta:
+            if navegador.logado:
+                self.perfis.atualizar_modelo(navegador.pasta)
+            self.perfis.liberar(navegador.pasta)
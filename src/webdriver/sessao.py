@@ -0,0 +1,67 @@
+"""Acompanhamento do tempo restante da sessão do ESocial, para renová-la antes que ela acabe no meio
+da raspagem de uma empresa."""
+
+import time
+
+import undetected_chromedriver as uc
+
+from src.utils.acesso import segundos_restantes_de_sessao
+from src.local.types import Float, Int
+
+__all__ = ["MARGEM_RENOVACAO_SECS", "SessaoESocial"]
+
+MARGEM_RENOVACAO_SECS = Int(15 * 60)
+"""Segundos restantes de sessão a partir dos quais ela é renovada. Tem que ser maior que os 10
+minutos a partir dos quais :func:`~src.utils.acesso.teste_deslogado` considera o ESocial
+deslogado."""
+
+
+class SessaoESocial:
+    """Tempo restante da sessão de um navegador.
+
+    O tempo é lido da página só depois de um login ou de uma renovação (veja :meth:`atualizar`); no
+    resto do tempo ele é estimado pelo relógio, então :meth:`precisa_renovar` não custa nenhuma
+    chamada ao webdriver e pode ser consultado entre um funcionário e outro. A renovação em si
+    fica com quem usa o navegador, já que o webdriver não pode ser usado por duas threads ao mesmo
+    tempo.
+
+    :param margem: Segundos restantes a partir dos quais a sessão precisa ser renovada.
+    """
+
+    def __init__(self, margem: Int = MARGEM_RENOVACAO_SECS) -> None:
+        self.margem = margem
+        self.expira: float | None = None
+
+    @property
+    def restantes(self) -> Float:
+        """Estimativa dos segundos restantes de sessão ou infinito antes da primeira leitura."""
+        if self.expira is None:
+            return Float(float("inf"))
+        return Float(self.expira - time.monotonic())
+
+    def atualizar(self, driver: uc.Chrome) -> Int:
+        """Lê o tempo restante da sessão na página atual.
+
+        :param driver: Webdriver logado numa página com o tempo de sessão.
+        :return: Segundos restantes.
+        """
+        restantes = segundos_restantes_de_sessao(driver)
+        self.expira = time.monotonic() + restantes
+        return restantes
+
+    def precisa_renovar(self) -> bool:
+        """Se a sessão está perto de acabar."""
+        return self.restantes <= self.margem
+
+    def renovada(self, driver: uc.Chrome) -> bool:
+        """Lê o tempo restante depois de uma renovação.
+
+        :param driver: Webdriver logado numa página com o tempo de sessão.
+        :return: Se a renovação afastou o fim da sessão para além da margem. Se não afastou (a
+            sessão tem um tempo máximo, por exemplo), só um login novo resolve.
+        """
+        return self.atualizar(driver) > self.margem
+
+    def esquecer(self) -> None:
+        """Esquece o tempo lido, quando o navegador é devolvido."""
+        self.expira = None
@@ -0,0 +1,115 @@
+"""Política de novas tentativas da raspagem: espera exponencial com jitter entre as tentativas, um
+limite de falhas seguidas por etapa e um disjuntor que estaciona a empresa que não para de falhar,
+para que ela seja tentada de novo só no fim, depois das outras."""
+
+import random
+from typing import Dict, Literal, Mapping, NamedTuple
+
+from src.local.types import Float, Int
+
+__all__ = [
+    "ESPERA_BASE_SECS",
+    "ESPERA_MAXIMA_SECS",
+    "LIMITE_FALHAS_EMPRESA",
+    "LIMITES_ETAPAS",
+    "RODADAS_ESTACIONADAS",
+    "DisjuntorEmpresa",
+    "TentativasEmpresa",
+    "espera_exponencial",
+]
+
+ESPERA_BASE_SECS = Float(2.0)
+"""Espera depois da primeira falha de uma etapa. Cada falha seguida dobra a espera."""
+ESPERA_MAXIMA_SECS = Float(60.0)
+"""Maior espera entre duas tentativas."""
+LIMITES_ETAPAS: Dict[str, Int] = {"login": Int(3), "funcionarios": Int(4)}
+"""Falhas seguidas de cada etapa a partir das quais a empresa é estacionada. Uma tentativa bem
+sucedida da etapa zera a contagem dela."""
+LIMITE_FALHAS_EMPRESA = Int(6)
+"""Falhas de uma empresa numa rodada, somando todas as etapas, a partir das quais ela é estacionada
+mesmo que as etapas tenham tido sucessos no meio."""
+RODADAS_ESTACIONADAS = Int(1)
+"""Quantas vezes as empresas estacionadas são tentadas de novo depois que a fila acaba. As que
+continuam falhando depois disso são abandonadas e os seus funcionários ficam sem dados."""
+
+
+def espera_exponencial(
+    falhas: Int, base: Float = ESPERA_BASE_SECS, maxima: Float = ESPERA_MAXIMA_SECS
+) -> Float:
+    """Calcula a espera antes da próxima tentativa.
+
+    A espera dobra a cada falha, até ``maxima``, e é sorteada entre metade e o total desse valor,
+    para que vários trabalhadores que falharam juntos (numa queda do ESocial, por exemplo) não
+    tentem de novo todos ao mesmo tempo.
+
+    :param falhas: Falhas seguidas, contando a que acabou de acontecer.
+    :param base: Espera depois da primeira falha.
+    :param maxima: Maior espera.
+    :return: Segundos para esperar.
+    """
+    teto = min(maxima, base * 2 ** max(0, falhas - 1))
+    return Float(random.uniform(teto / 2, teto))
+
+
+class DisjuntorEmpresa:
+    """Falhas de uma empresa numa rodada e a decisão de tentar de novo ou estacioná-la.
+
+    Cada trabalhador tem o seu, zerado a cada empresa, então ele não precisa ser thread-safe.
+
+    :param limites: Falhas seguidas permitidas em cada etapa (veja :attr:`LIMITES_ETAPAS`).
+        Etapas que não estão nele não têm limite próprio.
+    :param limite_total: Falhas permitidas na rodada, somando as etapas.
+    """
+
+    def __init__(
+        self,
+        limites: Mapping[str, Int] = LIMITES_ETAPAS,
+        limite_total: Int = LIMITE_FALHAS_EMPRESA,
+    ) -> None:
+        self.limites = limites
+        self.limite_total = limite_total
+        self.seguidas: Dict[str, Int] = {}
+        self.falhas: Dict[str, Int] = {}
+
+    @property
+    def total(self) -> Int:
+        """Falhas na rodada, somando as etapas."""
+        return Int(sum(self.falhas.values()))
+
+    def falhou(self, etapa: str, erro: BaseException) -> Float | None:
+        """Registra uma falha.
+
+        :param etapa: Etapa que falhou, como ``"login"``.
+        :param erro: Exceção que causou a falha. Só o nome da classe é guardado.
+        :return: Segundos para esperar antes de tentar de novo ou None se o disjuntor abriu e a
+            empresa deve ser estacionada.
+        """
+        seguidas = self.seguidas[etapa] = Int(self.seguidas.get(etapa, 0) + 1)
+        nome = type(erro).__name__
+        self.falhas[nome] = Int(self.falhas.get(nome, 0) + 1)
+        if seguidas >= self.limites.get(etapa, seguidas + 1) or self.total >= self.limite_total:
+            return None
+        return espera_exponencial(seguidas)
+
+    def sucesso(self, etapa: str) -> None:
+        """Registra que uma tentativa da etapa deu certo, zerando as suas falhas seguidas.
+
+        :param etapa: Etapa que deu certo.
+        """
+        self.seguidas.pop(etapa, None)
+
+
+TentativasEmpresa = NamedTuple(
+    "TentativasEmpresa",
+    [
+        ("CNPJ", str),
+        ("falhas", Dict[str, Int]),
+        ("estacionamentos", Int),
+        ("resultado", Literal["concluida", "recuperada", "abandonada"]),
+        ("sem_dados", Int),
+    ],
+)
+"""Resultado das novas tentativas de uma empresa que falhou pelo menos uma vez. ``falhas`` conta as
+falhas de todas as rodadas pelo nome da exceção; ``resultado`` é ``"concluida"`` se ela terminou
+sem ser estacionada, ``"recuperada"`` se terminou numa rodada de estacionadas e ``"abandonada"`` se
+continuou falhando, quando ``sem_dados`` é a quantidade de CPFs que ficaram sem ser raspados."""
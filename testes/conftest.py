@@ -0,0 +1,7 @@
+"""Configuração dos testes, executados a partir da raiz do repositório com ``python -m pytest``."""
+
+import os
+
+# src.local.types importa o Kivy, que tomaria para si os argumentos de linha de comando do pytest.
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
@@ -0,0 +1,114 @@
+"""Testes de :class:`~src.webdriver.cache.CacheFuncionarios`."""
+
+import pytest
+
+from src.webdriver import cache as modulo_cache
+from src.webdriver.cache import CacheFuncionarios
+from src.webdriver.planilha import DadosFuncionario
+from src.webdriver.types import CelulaVazia
+from src.local.types import Int
+
+SEGUNDO_NS = 1_000_000_000
+CNPJ = "11.222.333/0001-81"
+DADOS = DadosFuncionario("Ativo", "01/02/2020", "03/04/1990", "123", CelulaVazia)
+
+
+class _Relogio:
+    """Substituto do módulo ``time`` do cache, com um relógio que só anda quando mandado."""
+
+    def __init__(self) -> None:
+        self.agora_ns = 1_700_000_000 * SEGUNDO_NS
+
+    def time_ns(self) -> int:
+        return self.agora_ns
+
+    def andar(self, segundos: float) -> None:
+        self.agora_ns += int(segundos * SEGUNDO_NS)
+
+
+@pytest.fixture
+def relogio(monkeypatch: pytest.MonkeyPatch) -> _Relogio:
+    relogio = _Relogio()
+    monkeypatch.setattr(modulo_cache, "time", relogio)
+    return relogio
+
+
+def _cache(tmp_path, **kwargs) -> CacheFuncionarios:
+    return CacheFuncionarios(str(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+def test_buscar_retorna_dados_guardados(tmp_path, relogio):
+    cache = _cache(tmp_path)
+    cache.guardar(CNPJ, "123.456.789-09", DADOS)
+
+    dados = cache.buscar("11222333000181", "12345678909")
+
+    assert dados is not None
+    assert dados[:4] == DADOS[:4]
+    assert dados.DEMISSAO != dados.DEMISSAO  # célula vazia volta como NaN
+    assert cache.buscar(CNPJ, "000.000.000-00") is None
+    assert cache.buscar("99.888.777/0001-66", "123.456.789-09") is None
+
+
+def test_entrada_expira_depois_do_ttl(tmp_path, relogio):
+    cache = _cache(tmp_path, ttl=Int(60))
+    cache.guardar(CNPJ, "12345678909", DADOS)
+
+    relogio.andar(60)
+    assert cache.buscar(CNPJ, "12345678909") is not None
+
+    relogio.andar(1)
+    assert cache.buscar(CNPJ, "12345678909") is None
+    # a entrada vencida é apagada, não só ignorada
+    assert cache.conexao.execute("SELECT COUNT(*) FROM funcionarios").fetchone()[0] == 0
+
+
+def test_descarta_as_entradas_acessadas_ha_mais_tempo(tmp_path, relogio):
+    cache = _cache(tmp_path, max_entradas=Int(2))
+    cache.guardar(CNPJ, "11111111111", DADOS)
+    relogio.andar(1)
+    cache.guardar(CNPJ, "22222222222", DADOS)
+    relogio.andar(1)
+    # acessar a primeira a torna a mais recente (acessado_ns), então a segunda é a descartada
+    assert cache.buscar(CNPJ, "11111111111") is not None
+    relogio.andar(1)
+    cache.guardar(CNPJ, "33333333333", DADOS)
+
+    assert cache.buscar(CNPJ, "11111111111") is not None
+    assert cache.buscar(CNPJ, "22222222222") is None
+    assert cache.buscar(CNPJ, "33333333333") is not None
+
+
+def test_guardar_de_novo_nao_conta_como_entrada_nova(tmp_path, relogio):
+    cache = _cache(tmp_path, max_entradas=Int(2))
+    cache.guardar(CNPJ, "11111111111", DADOS)
+    cache.guardar(CNPJ, "22222222222", DADOS)
+    relogio.andar(1)
+    cache.guardar(CNPJ, "22222222222", DADOS._replace(SITUACAO="Afastado"))
+
+    assert cache.buscar(CNPJ, "11111111111") is not None
+    dados = cache.buscar(CNPJ, "22222222222")
+    assert dados is not None and dados.SITUACAO == "Afastado"
+
+
+def test_contadores_de_acertos_e_falhas(tmp_path, relogio):
+    cache = _cache(tmp_path, ttl=Int(60))
+    cache.guardar(CNPJ, "11111111111", DADOS)
+
+    cache.buscar(CNPJ, "11111111111")
+    cache.buscar(CNPJ, "22222222222")
+    relogio.andar(61)
+    cache.buscar(CNPJ, "11111111111")  # vencida conta como falha
+
+    assert (cache.acertos, cache.falhas) == (1, 2)
+    cache.zerar_estatisticas()
+    assert (cache.acertos, cache.falhas) == (0, 0)
+
+
+def test_dados_persistem_entre_conexoes(tmp_path, relogio):
+    cache = _cache(tmp_path)
+    cache.guardar(CNPJ, "11111111111", DADOS)
+    cache.fechar()
+
+    cache = _cache(tmp_path)
+    assert cache.buscar(CNPJ, "11111111111") is not None
@@ -0,0 +1,54 @@
+"""Testes de :class:`~src.webdriver.diario.DiarioRaspagem`."""
+
+from src.webdriver.diario import DiarioRaspagem, hash_arquivo
+from src.webdriver.planilha import DadosFuncionario
+from src.webdriver.types import CelulaVazia
+
+DADOS = DadosFuncionario("Ativo", "01/02/2020", "03/04/1990", "123", CelulaVazia)
+
+
+def test_retoma_os_funcionarios_ja_raspados(tmp_path):
+    caminho = str(tmp_path / "diario.sqlite3")
+    diario = DiarioRaspagem(caminho, "planilha")
+    diario.registrar("123.456.789-09", DADOS)
+    diario.registrar("111.111.111-11", DADOS._replace(DEMISSAO="05/06/2024"))
+    # o processo morre sem descartar o diário
+    diario.fechar()
+
+    carregados = DiarioRaspagem(caminho, "planilha").carregar()
+
+    assert set(carregados) == {"12345678909", "11111111111"}
+    assert carregados["11111111111"] == DADOS._replace(DEMISSAO="05/06/2024")
+    assert carregados["12345678909"][:4] == DADOS[:4]
+    assert carregados["12345678909"].DEMISSAO != carregados["12345678909"].DEMISSAO  # NaN
+
+
+def test_registrar_de_novo_substitui_os_dados(tmp_path):
+    diario = DiarioRaspagem(str(tmp_path / "diario.sqlite3"), "planilha")
+    diario.registrar("12345678909", DADOS)
+    diario.registrar("123.456.789-09", DADOS._replace(SITUACAO="Afastado"))
+
+    assert diario.carregar()["12345678909"].SITUACAO == "Afastado"
+
+
+def test_cada_planilha_tem_o_seu_diario(tmp_path):
+    caminho = str(tmp_path / "diario.sqlite3")
+    primeira = DiarioRaspagem(caminho, "primeira")
+    segunda = DiarioRaspagem(caminho, "segunda")
+    primeira.registrar("11111111111", DADOS)
+    segunda.registrar("22222222222", DADOS)
+
+    primeira.descartar()
+
+    assert primeira.carregar() == {}
+    assert set(segunda.carregar()) == {"22222222222"}
+
+
+def test_hash_muda_com_o_conteudo(tmp_path):
+    arquivo = tmp_path / "planilha.xlsx"
+    arquivo.write_bytes(b"conteudo")
+    original = hash_arquivo(str(arquivo))
+
+    assert hash_arquivo(str(arquivo)) == original
+    arquivo.write_bytes(b"conteudo mudado")
+    assert hash_arquivo(str(arquivo)) != original
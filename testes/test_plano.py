@@ -0,0 +1,58 @@
+"""Testes de :func:`~src.webdriver.plano.planejar_raspagem`."""
+
+from math import nan
+
+from src.webdriver.plano import planejar_raspagem
+from src.webdriver.planilha import DELTA, registro_de_dados_relevantes
+
+MATRIZ_A = "11.222.333/0001-81"
+UNIDADE_A = "11.222.333/0002-62"
+MATRIZ_B = "44.555.666/0001-00"
+UNIDADE_C = "77.888.999/0002-10"
+
+# (CNPJ da unidade, CNPJ da matriz, CPF, empresa, funcionário)
+LINHAS = [
+    (nan, MATRIZ_B, "222.222.222-22", "B", "Bruna"),
+    (nan, MATRIZ_A, "111.111.111-11", "A", "Ana"),
+    (UNIDADE_A, MATRIZ_A, "333.333.333-33", "A filial", "Caio"),
+    (nan, MATRIZ_A, "111.111.111-11", "A", "Ana"),  # segundo contrato
+    (UNIDADE_C, nan, "444.444.444-44", "C filial", "Davi"),  # matriz fora da planilha
+    (nan, MATRIZ_B, nan, "B", ""),  # sem CPF
+]
+
+
+def _funcionarios():
+    return registro_de_dados_relevantes(*(list(coluna) for coluna in zip(*LINHAS)))
+
+
+def test_agrupa_os_funcionarios_pela_matriz():
+    plano = planejar_raspagem(_funcionarios(), set())
+
+    assert [empresa.empresa.CNPJ for empresa in plano] == [MATRIZ_B, MATRIZ_A]
+    assert list(plano[0].funcionarios) == ["22222222222"]
+    # a unidade vai junto com a matriz e o CPF repetido aparece uma vez, com as duas linhas
+    assert list(plano[1].funcionarios) == ["11111111111", "33333333333"]
+    assert [r.linha for r in plano[1].funcionarios["11111111111"]] == [DELTA + 1, DELTA + 3]
+
+
+def test_descarta_funcionarios_sem_matriz_na_planilha():
+    funcionarios = _funcionarios()
+    plano = planejar_raspagem(funcionarios, set())
+
+    planejados = {CPF for empresa in plano for CPF in empresa.funcionarios}
+    assert "44444444444" not in planejados
+    # o CPF continua no registro, só não tem perfil para acessar
+    assert funcionarios.buscar_cpf("444.444.444-44")
+
+
+def test_ignora_cpfs_ja_vistos():
+    plano = planejar_raspagem(_funcionarios(), {"22222222222", "11111111111"})
+
+    # a empresa B não tem mais nada a raspar e sai do plano
+    assert [empresa.empresa.CNPJ for empresa in plano] == [MATRIZ_A]
+    assert list(plano[0].funcionarios) == ["33333333333"]
+
+
+def test_plano_vazio_quando_tudo_foi_visto():
+    CPFs = {"11111111111", "22222222222", "33333333333", "44444444444"}
+    assert planejar_raspagem(_funcionarios(), CPFs) == []
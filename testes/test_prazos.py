@@ -0,0 +1,103 @@
+"""Testes de :class:`~src.utils.prazos.PrazosAdaptativos`."""
+
+import pytest
+
+from src.utils import prazos as modulo_prazos
+from src.utils.prazos import PrazosAdaptativos
+from src.local.types import Float, Int
+
+SELETOR = ("css selector", "#botao")
+CHAVE = ("elemento", SELETOR)
+
+
+def _prazos() -> PrazosAdaptativos:
+    return PrazosAdaptativos(Int(10), Int(5), Float(3.0), Float(1.0), Float(30.0))
+
+
+def _registrar(prazos: PrazosAdaptativos, *segundos: float, chave=CHAVE) -> None:
+    for s in segundos:
+        prazos.registrar(chave, Float(s))
+
+
+def test_usa_o_prazo_fixo_sem_amostras_suficientes():
+    prazos = _prazos()
+    _registrar(prazos, 1, 1, 1, 1)
+
+    assert prazos.aprendido(CHAVE) is None
+    assert prazos.prazo(CHAVE, Float(20.0)) == 20.0
+
+
+def test_prazo_aprendido_e_o_percentil_99_vezes_a_margem():
+    prazos = _prazos()
+    _registrar(prazos, 1, 2, 1, 3, 2)
+
+    assert prazos.aprendido(CHAVE) == pytest.approx(9.0)
+    assert prazos.prazo(CHAVE, Float(20.0)) == pytest.approx(9.0)
+
+
+@pytest.mark.parametrize("segundos, esperado", [(0.1, 1.0), (50.0, 30.0)])
+def test_prazo_aprendido_fica_entre_o_minimo_e_o_maximo(segundos, esperado):
+    prazos = _prazos()
+    _registrar(prazos, *[segundos] * 5)
+
+    assert prazos.aprendido(CHAVE) == pytest.approx(esperado)
+
+
+def test_prazo_nunca_passa_do_prazo_de_quem_espera():
+    prazos = _prazos()
+    _registrar(prazos, *[5.0] * 5)
+
+    # uma sondagem curta continua curta mesmo que o seletor costume demorar
+    assert prazos.prazo(CHAVE, Float(2.0)) == 2.0
+    assert prazos.prazo(CHAVE, Float(60.0)) == pytest.approx(15.0)
+
+
+def test_janela_guarda_so_as_amostras_mais_recentes():
+    prazos = _prazos()
+    _registrar(prazos, *[9.0] * 10)
+    _registrar(prazos, *[1.0] * 10)
+
+    assert prazos.aprendido(CHAVE) == pytest.approx(3.0)
+
+
+def test_tipos_de_espera_tem_amostras_separadas():
+    prazos = _prazos()
+    _registrar(prazos, *[2.0] * 5)
+
+    assert prazos.aprendido(("clicavel", SELETOR)) is None
+
+
+def test_desligado_usa_sempre_o_prazo_fixo(monkeypatch):
+    monkeypatch.setattr(modulo_prazos, "PRAZOS_ADAPTATIVOS", False)
+    prazos = _prazos()
+    _registrar(prazos, *[2.0] * 5)
+
+    assert prazos.aprendido(CHAVE) is None
+    assert prazos.prazo(CHAVE, Float(20.0)) == 20.0
+
+
+def test_salvar_e_carregar(tmp_path):
+    caminho = str(tmp_path / "prazos.json")
+    prazos = _prazos()
+    _registrar(prazos, 1, 2, 1, 3, 2)
+    prazos.salvar(caminho)
+
+    carregados = _prazos()
+    carregados.carregar(caminho)
+
+    assert carregados.aprendido(CHAVE) == pytest.approx(9.0)
+
+
+# o último é um arquivo de antes das esperas terem tipo
+@pytest.mark.parametrize(
+    "conteudo", ["", "{", '[{"seletor": ["css selector", "#a"], "amostras": [1]}]']
+)
+def test_carregar_ignora_arquivos_invalidos(tmp_path, conteudo):
+    arquivo = tmp_path / "prazos.json"
+    arquivo.write_text(conteudo, encoding="utf-8")
+    prazos = _prazos()
+
+    prazos.carregar(str(arquivo))
+    prazos.carregar(str(tmp_path / "nao_existe.json"))
+
+    assert prazos.amostras == {}
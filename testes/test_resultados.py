@@ -0,0 +1,68 @@
+"""Testes de :class:`~src.webdriver.planilha.ResultadosRaspagem`."""
+
+import numpy as np
+import pandas as pd
+
+from src.webdriver.planilha import (
+    COLUNAS_RESULTADO,
+    ColunaPlanilha,
+    DadosFuncionario,
+    ResultadosRaspagem,
+)
+from src.webdriver.types import CelulaVazia
+from src.local.types import Int
+
+DADOS = DadosFuncionario("Ativo", "01/02/2020", "03/04/1990", "123", CelulaVazia)
+
+
+def _tabela(linhas: int = 6) -> pd.DataFrame:
+    return pd.DataFrame(np.full((linhas, max(COLUNAS_RESULTADO) + 1), "", dtype=object))
+
+
+def test_aplicar_escreve_cada_campo_na_sua_coluna():
+    tabela = _tabela()
+    resultados = ResultadosRaspagem()
+    resultados.adicionar(Int(2), DADOS)
+    resultados.adicionar(Int(4), DADOS._replace(SITUACAO="Desligado", DEMISSAO="05/06/2024"))
+
+    resultados.aplicar(tabela)
+
+    assert tabela.loc[2, ColunaPlanilha.SITUACAO] == "Ativo"
+    assert tabela.loc[2, ColunaPlanilha.MATRICULA] == "123"
+    assert pd.isna(tabela.loc[2, ColunaPlanilha.DEMISSAO])
+    assert tabela.loc[4, ColunaPlanilha.SITUACAO] == "Desligado"
+    assert tabela.loc[4, ColunaPlanilha.DEMISSAO] == "05/06/2024"
+    # as outras linhas e colunas não mudam
+    assert (tabela.loc[[0, 1, 3, 5], list(COLUNAS_RESULTADO)] == "").all().all()
+    assert tabela.loc[2, ColunaPlanilha.NOME_FUNCIONARIO] == ""
+
+
+def test_adicionar_a_mesma_linha_substitui_os_dados():
+    tabela = _tabela()
+    resultados = ResultadosRaspagem()
+    resultados.adicionar(Int(3), DADOS)
+    resultados.adicionar(Int(3), DADOS._replace(SITUACAO="Afastado"))
+
+    assert len(resultados) == 1
+    resultados.aplicar(tabela)
+    assert tabela.loc[3, ColunaPlanilha.SITUACAO] == "Afastado"
+
+
+def test_aplicar_esvazia_o_buffer():
+    tabela = _tabela()
+    resultados = ResultadosRaspagem()
+    resultados.adicionar(Int(1), DADOS)
+    resultados.aplicar(tabela)
+
+    assert len(resultados) == 0
+    # uma linha já aplicada pode receber dados novos, como num checkpoint seguinte
+    resultados.adicionar(Int(1), DADOS._replace(SITUACAO="Afastado"))
+    resultados.aplicar(tabela)
+    assert tabela.loc[1, ColunaPlanilha.SITUACAO] == "Afastado"
+
+
+def test_aplicar_sem_dados_nao_muda_a_tabela():
+    tabela = _tabela()
+    ResultadosRaspagem().aplicar(tabela)
+
+    assert tabela.equals(_tabela())
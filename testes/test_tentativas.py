@@ -0,0 +1,106 @@
+"""Testes de :mod:`src.webdriver.tentativas` e do resumo de
+:class:`~src.webdriver.estatisticas.EstatisticasRaspagem`."""
+
+import pytest
+
+from src.webdriver.estatisticas import EstatisticasRaspagem, TrocaPerfil
+from src.webdriver.erros import ErroInternoSistema, ESocialDeslogadoError
+from src.webdriver.tentativas import DisjuntorEmpresa, TentativasEmpresa, espera_exponencial
+from src.utils.acesso import TempoInicializacao
+from src.local.types import Float, Int
+
+
+@pytest.mark.parametrize(
+    "falhas, teto", [(0, 2.0), (1, 2.0), (2, 4.0), (3, 8.0), (6, 60.0), (100, 60.0)]
+)
+def test_espera_exponencial_fica_entre_metade_e_o_teto(falhas, teto):
+    esperas = [espera_exponencial(Int(falhas), Float(2.0), Float(60.0)) for _ in range(200)]
+
+    assert all(teto / 2 <= espera <= teto for espera in esperas)
+    # com jitter, os trabalhadores não tentam de novo todos juntos
+    assert len(set(esperas)) > 1
+
+
+def test_disjuntor_abre_no_limite_de_falhas_seguidas_da_etapa():
+    disjuntor = DisjuntorEmpresa({"login": Int(3)}, Int(100))
+    erro = ESocialDeslogadoError()
+
+    assert disjuntor.falhou("login", erro) is not None
+    assert disjuntor.falhou("login", erro) is not None
+    assert disjuntor.falhou("login", erro) is None
+
+
+def test_sucesso_zera_as_falhas_seguidas_da_etapa():
+    disjuntor = DisjuntorEmpresa({"login": Int(2), "funcionarios": Int(2)}, Int(100))
+    erro = ESocialDeslogadoError()
+
+    disjuntor.falhou("login", erro)
+    disjuntor.falhou("funcionarios", erro)
+    disjuntor.sucesso("login")
+
+    assert disjuntor.falhou("login", erro) is not None
+    assert disjuntor.falhou("funcionarios", erro) is None
+
+
+def test_disjuntor_abre_no_limite_total_mesmo_com_sucessos():
+    disjuntor = DisjuntorEmpresa({"login": Int(3)}, Int(4))
+    erro = ErroInternoSistema()
+
+    for _ in range(3):
+        assert disjuntor.falhou("login", erro) is not None
+        disjuntor.sucesso("login")
+    assert disjuntor.falhou("login", erro) is None
+    assert disjuntor.total == 4
+
+
+def test_etapa_sem_limite_proprio_so_para_no_limite_total():
+    disjuntor = DisjuntorEmpresa({"login": Int(1)}, Int(3))
+    erro = ErroInternoSistema()
+
+    assert disjuntor.falhou("outra", erro) is not None
+    assert disjuntor.falhou("outra", erro) is not None
+    assert disjuntor.falhou("outra", erro) is None
+
+
+def test_falhas_contadas_pelo_nome_da_excecao():
+    disjuntor = DisjuntorEmpresa()
+    disjuntor.falhou("login", ESocialDeslogadoError())
+    disjuntor.falhou("funcionarios", ESocialDeslogadoError())
+    disjuntor.falhou("login", ErroInternoSistema())
+
+    assert disjuntor.falhas == {"ESocialDeslogadoError": 2, "ErroInternoSistema": 1}
+
+
+def test_resumo_sem_estatisticas_opcionais():
+    resumo = EstatisticasRaspagem(Int(3), Int(7)).resumo()
+
+    assert resumo == "Etapa de processamento concluída (3 funcionários do cache, 7 consultados). "
+
+
+def test_resumo_com_todas_as_estatisticas():
+    estatisticas = EstatisticasRaspagem(
+        Int(0),
+        Int(10),
+        [TempoInicializacao(Float(1.0), Float(2.5)), TempoInicializacao(Float(0.5), Float(2.0))],
+        [
+            TrocaPerfil("A", Float(1.0), True),
+            TrocaPerfil("B", Float(3.0), True),
+            TrocaPerfil("C", Float(9.0), False),
+        ],
+        [
+            TentativasEmpresa("A", {"TimeoutException": Int(2)}, Int(0), "concluida", Int(0)),
+            TentativasEmpresa("B", {"ErroInternoSistema": Int(6)}, Int(1), "recuperada", Int(0)),
+            TentativasEmpresa("C", {"ErroInternoSistema": Int(6)}, Int(2), "abandonada", Int(4)),
+        ],
+    )
+
+    resumo = estatisticas.resumo()
+
+    assert (
+        "2 navegadores abertos: 1.5s resolvendo o chromedriver e 4.5s abrindo o Chrome. "
+    ) in resumo
+    assert "2 trocas de empresa sem novo login (2.0s em média), 1 com falha. " in resumo
+    assert (
+        "14 falhas de acesso em 3 empresas, 1 recuperadas depois de estacionadas, 1 abandonadas "
+        "(4 CPFs sem dados). "
+    ) in resumo